@@ -17,16 +17,46 @@
 #
 ###############################################################################
 
+import importlib
+
 from gym.envs.registration import register
 
-from .spaces import DictSpace
-from .strategy import BTgymBaseStrategy
-from .server import BTgymServer
-from .datafeed import BTgymDataset, BTgymRandomDataDomain, BTgymSequentialDataDomain
-from .datafeed import DataSampleConfig, EnvResetConfig
-from .dataserver import BTgymDataFeedServer
-from .rendering import BTgymRendering
-from .envs.backtrader import BTgymEnv
+# Public classes are imported on first access, so spawned server, data server and worker processes
+# do not pay for loading backtrader, pandas, zmq etc. unless actually using them:
+_LAZY_IMPORTS = {
+    'DictSpace': '.spaces',
+    'BTgymBaseStrategy': '.strategy',
+    'BTgymServer': '.server',
+    'BTgymDataset': '.datafeed',
+    'BTgymRandomDataDomain': '.datafeed',
+    'BTgymSequentialDataDomain': '.datafeed',
+    'DataSampleConfig': '.datafeed',
+    'EnvResetConfig': '.datafeed',
+    'BTgymDataFeedServer': '.dataserver',
+    'BTgymRendering': '.rendering',
+    'BTgymEnv': '.envs.backtrader',
+    'BTgymVectorEngine': '.engine',
+    'BTgymVectorStrategy': '.engine',
+}
+
+__all__ = list(_LAZY_IMPORTS.keys())
+
+
+def __getattr__(name):
+    try:
+        module_name = _LAZY_IMPORTS[name]
+
+    except KeyError:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + __all__)
+
 
 register(
     id='backtrader-v0000',
@@ -32,6 +32,8 @@ from btgym.algorithms.math_utils import log_uniform
 from btgym.algorithms.nn.losses import value_fn_loss_def, rp_loss_def, pc_loss_def, aac_loss_def, ppo_loss_def
 from btgym.algorithms.utils import feed_dict_rnn_context, feed_dict_from_nested, batch_stack
 from btgym.spaces import DictSpace as ObSpace  # now can simply be gym.Dict
+from btgym.utils import LATENCY_PHASES
+from btgym.monitor.writer import BTgymSummaryWriter
 
 
 class BaseAAC(object):
@@ -65,6 +67,8 @@ class BaseAAC(object):
                  runner_config=None,
                  runner_fn_ref=BaseEnvRunnerFn,
                  cluster_spec=None,
+                 param_store=None,
+                 worker_device=None,
                  random_seed=None,
                  model_gamma=0.99,  # decay
                  model_gae_lambda=1.00,  # GAE lambda
@@ -84,6 +88,8 @@ class BaseAAC(object):
                  model_summary_freq=100,  # every i`th algorithm iteration
                  test_mode=False,  # gym_atari test mode
                  replay_memory_size=2000,
+                 replay_window_keys=None,
+                 replay_context_interval=None,
                  replay_batch_size=None,
                  replay_rollout_length=None,
                  use_off_policy_aac=False,
@@ -125,6 +131,14 @@ class BaseAAC(object):
             runner_fn_ref:          callable defining environment runner execution logic,
                                     valid only if no 'runner_config' arg is provided
             cluster_spec:           dict, full training cluster spec (may be used by meta-trainer)
+            param_store:            btgym.algorithms.store.SharedParamStore instance to keep global network
+                                    weights in, instead of parameter server; single host only.
+                                    Note: optimizer slots (e.g. Adam moments) are not shared in this mode
+                                    but kept by every worker for its own updates; trainers overriding
+                                    _make_train_op() are not supported.
+            worker_device:          str or None, if given - tf device to place both global and worker networks on
+                                    for in-process session without parameter server cluster, e.g. '/cpu:0';
+                                    default is cluster worker device or '/cpu:0' if `param_store` is used.
             random_seed:            int or None
             model_gamma:            scalar, gamma discount factor
             model_gae_lambda:       scalar, GAE lambda
@@ -147,6 +161,11 @@ class BaseAAC(object):
             model_summary_freq:     int, write model summary for every i'th train step
             test_mode:              bool, True: Atari, False: BTGym
             replay_memory_size:     int, in number of experiences
+            replay_window_keys:     list of time-embedded observation keys, e.g. ['external'], to store
+                                    deduplicated in replay memory, see btgym.algorithms.memory.Memory
+            replay_context_interval: int, keep rnn context in replay memory only every that many experiences,
+                                    e.g. equal to `rollout_length`; ignored if time_flat=True;
+                                    not supported with reward prediction task
             replay_batch_size:      int, mini-batch size for off-policy training, def = 1
             replay_rollout_length:  int off-policy rollout length by def. equals on_policy_rollout_length
             use_off_policy_aac:     bool, use full AAC off-policy loss instead of Value-replay
@@ -209,6 +228,8 @@ class BaseAAC(object):
         self.name = name
         self.task = task
         self.cluster_spec = cluster_spec
+        self.param_store = param_store
+        self.worker_device = worker_device
         StreamHandler(sys.stdout).push_application()
         self.log = Logger('{}_{}'.format(self.name, self.task), level=self.log_level)
 
@@ -224,6 +245,16 @@ class BaseAAC(object):
             if kwargs != {}:
                 self.log.warning('Unexpected kwargs found: {}, ignored.'.format(kwargs))
 
+            try:
+                assert self.param_store is None or type(self)._make_train_op is BaseAAC._make_train_op
+
+            except AssertionError:
+                self.log.exception(
+                    '{} defines its own train op, which does not sync with parameter store; '.format(type(self)) +
+                    'use parameter server instead.'
+                )
+                raise AssertionError
+
             self.env_list = env
             try:
                 assert isinstance(self.env_list, list)
@@ -323,6 +354,9 @@ class BaseAAC(object):
             self.vr_lambda = log_uniform(vr_lambda, 1)
             self.gamma_pc = gamma_pc
             self.replay_memory_size = replay_memory_size
+            self.replay_window_keys = replay_window_keys
+            # Time-flattened batches need every experience rnn context:
+            self.replay_context_interval = None if time_flat else replay_context_interval
 
             if replay_rollout_length is not None:
                 self.replay_rollout_length = replay_rollout_length
@@ -353,6 +387,16 @@ class BaseAAC(object):
             else:
                 self.use_value_replay = use_value_replay
 
+            try:
+                assert self.replay_context_interval is None or not self.use_reward_prediction
+
+            except AssertionError:
+                self.log.exception(
+                    'Reward prediction samples of exactly `rp_sequence_size` frames can not be made to start ' +
+                    'at frames keeping rnn context; set replay_context_interval=None.'
+                )
+                raise AssertionError
+
             self.use_any_aux_tasks = use_value_replay or use_pixel_control or use_reward_prediction
             self.use_local_memory = _use_local_memory
             self.use_memory = (self.use_any_aux_tasks or self.use_off_policy_aac) and not self.use_local_memory
@@ -378,7 +422,13 @@ class BaseAAC(object):
             #    'AAC_{}: max_steps: {}, decay_steps: {}, end_rate: {:1.6f},'.
             #        format(self.task, self.opt_max_env_steps, self.opt_decay_steps, self.opt_end_learn_rate))
 
-            self.worker_device = "/job:worker/task:{}/cpu:0".format(task)
+            # No cluster, in-process session, if either device or parameter store is given:
+            use_cluster = self.worker_device is None and self.param_store is None
+            if use_cluster:
+                self.worker_device = "/job:worker/task:{}/cpu:0".format(task)
+
+            elif self.worker_device is None:
+                self.worker_device = "/cpu:0"
 
             # Update policy configuration
             self.policy_kwargs.update(
@@ -413,8 +463,14 @@ class BaseAAC(object):
             # Start building graphs:
             self.log.debug('started building graphs...')
             if self.use_global_network:
-                # PS:
-                with tf.device(tf.train.replica_device_setter(1, worker_device=self.worker_device)):
+                # PS or, if no cluster is used, local copy of global network:
+                if use_cluster:
+                    global_device = tf.train.replica_device_setter(1, worker_device=self.worker_device)
+
+                else:
+                    global_device = self.worker_device
+
+                with tf.device(global_device):
                     self.network = pi_global = self._make_policy('global')
                     if self.use_target_policy:
                         self.network_prime = self._make_policy('global_prime')
@@ -638,9 +694,13 @@ class BaseAAC(object):
         )
         self.grads_global_norm = tf.global_norm(self.grads)
         # Copy weights from the parameter server to the local model
-        self.sync = self.sync_pi = tf.group(
-            *[v1.assign(v2) for v1, v2 in zip(pi.var_list, pi_global.var_list)]
-        )
+        if self.param_store is None:
+            self.sync = self.sync_pi = tf.group(
+                *[v1.assign(v2) for v1, v2 in zip(pi.var_list, pi_global.var_list)]
+            )
+
+        else:
+            self.sync = self.sync_pi = self._make_store_pull_op(pi, pi_global)
         if self.use_target_policy:
             # Copy weights from new policy model to target one:
             self.sync_pi_prime = tf.group(
@@ -653,12 +713,82 @@ class BaseAAC(object):
 
         assert 'external' in obs_space_keys, \
             'Expected observation space to contain `external` mode, got: {}'.format(obs_space_keys)
-        self.inc_step = self.global_step.assign_add(tf.shape(pi.on_state_in['external'])[0])
+        if self.param_store is None:
+            self.inc_step = self.global_step.assign_add(tf.shape(pi.on_state_in['external'])[0])
+
+        else:
+            self.inc_step = self.global_step.assign(
+                self._make_store_counter_op(
+                    self.param_store.add_step,
+                    [tf.shape(pi.on_state_in['external'])[0]],
+                    name='param_store_add_step'
+                )
+            )
 
         train_op = self.optimizer.apply_gradients(grads_and_vars)
+
+        if self.param_store is not None:
+            # Local copy of global network has been updated, push update to store:
+            with tf.control_dependencies([train_op]):
+                train_op = tf.py_func(
+                    self.param_store.push,
+                    [v.read_value() for v in pi_global.var_list],
+                    tf.int64,
+                    stateful=True,
+                    name='param_store_push'
+                )
+
         self.log.debug('train_op defined')
         return train_op
 
+    def _make_store_pull_op(self, pi, pi_global):
+        """
+        Defines op copying weights from parameter store to both local policy and local copy of global one,
+        updates global step and episode counters.
+
+        Args:
+            pi:                 policy network obj.
+            pi_global:          local copy of shared policy network obj.
+
+        Returns:
+            pull op
+        """
+        values = tf.py_func(
+            self.param_store.pull,
+            [],
+            [v.dtype.base_dtype for v in pi_global.var_list],
+            stateful=True,
+            name='param_store_pull'
+        )
+        counters = tf.py_func(
+            self.param_store.get_counters,
+            [],
+            [tf.int64, tf.int64],
+            stateful=True,
+            name='param_store_get_counters'
+        )
+        assign_ops = []
+        for v, v_global, value in zip(pi.var_list, pi_global.var_list, values):
+            value.set_shape(v_global.get_shape())
+            assign_ops += [v.assign(value), v_global.assign(value)]
+
+        for counter, value in zip([self.global_step, self.global_episode], counters):
+            assign_ops.append(counter.assign(tf.cast(value, tf.int32)))
+
+        return tf.group(*assign_ops)
+
+    @staticmethod
+    def _make_store_counter_op(func, inp, name):
+        """
+        Wraps parameter store counter method returning int64 scalar.
+
+        Returns:
+            int32 scalar tensor
+        """
+        value = tf.py_func(func, inp, tf.int64, stateful=True, name=name)
+        value.set_shape([])
+        return tf.cast(value, tf.int32)
+
     def _combine_summaries(self, policy=None, model_summaries=None):
         """
         Defines model-wide and episode-related summaries
@@ -697,6 +827,28 @@ class BaseAAC(object):
             final_value=tf.placeholder(tf.float32, ),
             steps=tf.placeholder(tf.int32, ),
         )
+        # Episode summaries tags, values get written directly by process_summary(), see BTgymSummaryWriter;
+        # ops are kept for subclasses running those in session:
+        self.ep_summary_scope = tf.get_default_graph().get_name_scope()
+        self.ep_summary_tags = dict(
+            btgym_stat_op=dict(
+                total_r='episode_train/total_reward',
+                cpu_time='episode_train/cpu_time_sec',
+                final_value='episode_train/final_value',
+                steps='episode_train/env_steps',
+            ),
+            test_btgym_stat_op=dict(
+                total_r='episode_test/total_reward',
+                final_value='episode_test/final_value',
+                steps='episode_test/env_steps',
+            ),
+            # Env. step phases latencies, written if reported by environment:
+            latency_ops={'latency_' + phase: 'episode_train/latency/{}_ms'.format(phase) for phase in LATENCY_PHASES},
+            atari_stat_op=dict(
+                total_r='episode/total_reward',
+                steps='episode/steps',
+            ),
+        )
         if self.test_mode:
             # For Atari:
             ep_summary['render_op'] = tf.summary.image("model/state", ep_summary['render_atari'])
@@ -713,32 +865,24 @@ class BaseAAC(object):
                 [tf.summary.image(mode, ep_summary[mode])
                  for mode in self.env_list[0].render_modes + self.aux_render_modes]
             )
-        # Episode stat. summary:
-        ep_summary['btgym_stat_op'] = tf.summary.merge(
-            [
-                tf.summary.scalar('episode_train/total_reward', ep_summary['total_r']),
-                tf.summary.scalar('episode_train/cpu_time_sec', ep_summary['cpu_time']),
-                tf.summary.scalar('episode_train/final_value', ep_summary['final_value']),
-                tf.summary.scalar('episode_train/env_steps', ep_summary['steps'])
-            ],
-            name='episode_train_btgym'
-        )
-        # Test episode stat. summary:
-        ep_summary['test_btgym_stat_op'] = tf.summary.merge(
-            [
-                tf.summary.scalar('episode_test/total_reward', ep_summary['total_r']),
-                tf.summary.scalar('episode_test/final_value', ep_summary['final_value']),
-                tf.summary.scalar('episode_test/env_steps', ep_summary['steps'])
-            ],
-            name='episode_test_btgym'
-        )
-        ep_summary['atari_stat_op'] = tf.summary.merge(
-            [
-                tf.summary.scalar('episode/total_reward', ep_summary['total_r']),
-                tf.summary.scalar('episode/steps', ep_summary['steps'])
-            ],
-            name='episode_atari'
-        )
+        # Episode stat. summaries:
+        for key, name in [
+            ('btgym_stat_op', 'episode_train_btgym'),
+            ('test_btgym_stat_op', 'episode_test_btgym'),
+            ('atari_stat_op', 'episode_atari'),
+        ]:
+            ep_summary[key] = tf.summary.merge(
+                [
+                    tf.summary.scalar(tag, ep_summary[value_key])
+                    for value_key, tag in self.ep_summary_tags[key].items()
+                ],
+                name=name
+            )
+        ep_summary['latency_ops'] = {}
+        for value_key, tag in self.ep_summary_tags['latency_ops'].items():
+            ep_summary[value_key] = tf.placeholder(tf.float32, name=value_key + '_pl')
+            ep_summary['latency_ops'][value_key] = tf.summary.scalar(tag, ep_summary[value_key])
+
         self.log.debug('model-wide and episode summaries ok.')
         return model_summary, ep_summary
 
@@ -762,6 +906,8 @@ class BaseAAC(object):
                     priority_sample_size=self.rp_sequence_size,
                     reward_threshold=self.rp_reward_threshold,
                     use_priority_sampling=self.use_reward_prediction,
+                    window_keys=self.replay_window_keys,
+                    context_interval=self.replay_context_interval,
                     task=self.task,
                     log_level=self.log_level,
                 )
@@ -823,7 +969,13 @@ class BaseAAC(object):
             trainable=False
         )
         # Increment episode count:
-        self.inc_episode = self.global_episode.assign_add(1)
+        if self.param_store is None:
+            self.inc_episode = self.global_episode.assign_add(1)
+
+        else:
+            self.inc_episode = self.global_episode.assign(
+                self._make_store_counter_op(self.param_store.add_episode, [], name='param_store_add_episode')
+            )
 
     def _make_policy(self, scope):
         """
@@ -966,6 +1118,17 @@ class BaseAAC(object):
             kwargs:         not used by default.
         """
         try:
+            if self.param_store is not None:
+                # Chief worker makes parameter store from initialized or restored global weights:
+                if self.task == 0:
+                    self.param_store.create(
+                        sess.run(self.network.var_list),
+                        *sess.run([self.global_step, self.global_episode])
+                    )
+
+                else:
+                    self.param_store.attach([v.get_shape().as_list() for v in self.network.var_list])
+
             # Copy weights from global to local:
             sess.run(self.sync)
 
@@ -988,6 +1151,10 @@ class BaseAAC(object):
         Returns:
 
         """
+        # Summaries get written off the training thread:
+        if not isinstance(summary_writer, BTgymSummaryWriter):
+            summary_writer = BTgymSummaryWriter(summary_writer, log_level=self.log_level)
+
         for runner in self.runners:
             runner.start_runner(sess, summary_writer, **kwargs)  # starting runner threads
 
@@ -1244,20 +1411,24 @@ class BaseAAC(object):
 
         # Average values among thread_runners, if any, and write episode summary:
         if ep_summary_feeder != {}:
-            ep_summary_feed_dict = {
-                self.ep_summary[key]: np.average(list) for key, list in ep_summary_feeder.items()
-            }
+            ep_summary_values = {key: np.average(values) for key, values in ep_summary_feeder.items()}
 
             if self.test_mode:
                 # Atari:
-                fetched_episode_stat = sess.run(self.ep_summary['atari_stat_op'], ep_summary_feed_dict)
+                tags = self.ep_summary_tags['atari_stat_op']
 
             else:
                 # BTGym
-                fetched_episode_stat = sess.run(self.ep_summary['btgym_stat_op'], ep_summary_feed_dict)
+                tags = dict(self.ep_summary_tags['btgym_stat_op'])
+                tags.update(self.ep_summary_tags['latency_ops'])
 
-            self.summary_writer.add_summary(fetched_episode_stat, episode)
-            self.summary_writer.flush()
+            self.summary_writer.add_scalars(
+                {
+                    self._summary_tag(tag): ep_summary_values[key]
+                    for key, tag in tags.items() if key in ep_summary_values.keys()
+                },
+                episode
+            )
 
         # Every worker writes test episode  summaries:
         test_ep_summary_feeder = {}
@@ -1272,30 +1443,40 @@ class BaseAAC(object):
                         test_ep_summary_feeder[key] = [stat[key]]
                         # Average values among thread_runners, if any, and write episode summary:
             if test_ep_summary_feeder != {}:
-                test_ep_summary_feed_dict = {
-                    self.ep_summary[key]: np.average(list) for key, list in test_ep_summary_feeder.items()
-                }
-                fetched_test_episode_stat = sess.run(self.ep_summary['test_btgym_stat_op'], test_ep_summary_feed_dict)
-                self.summary_writer.add_summary(fetched_test_episode_stat, episode)
+                self.summary_writer.add_scalars(
+                    {
+                        self._summary_tag(tag): np.average(test_ep_summary_feeder[key])
+                        for key, tag in self.ep_summary_tags['test_btgym_stat_op'].items()
+                        if key in test_ep_summary_feeder.keys()
+                    },
+                    episode
+                )
 
         # Look for renderings (chief worker only, always 0-numbered environment in a list):
         if self.task == 0:
             if data['render_summary'][0] is not None:
-
-                #self.log.warning('data[render_summary]: {}'.format(data['render_summary']))
-                #self.log.warning('self.ep_summary: {}'.format(self.ep_summary))
-
-                render_feed_dict = {
-                    self.ep_summary[key]: pic for key, pic in data['render_summary'][0].items()
-                }
-                renderings = sess.run(self.ep_summary['render_op'], render_feed_dict)
-                self.summary_writer.add_summary(renderings, episode)
-                self.summary_writer.flush()
+                # PNG encoding is done by writer thread:
+                self.summary_writer.add_images(
+                    {
+                        self._summary_tag('model/state' if key == 'render_atari' else key): pic
+                        for key, pic in data['render_summary'][0].items()
+                    },
+                    episode
+                )
 
         # Every worker writes train episode summaries:
         if model_data is not None:
-            self.summary_writer.add_summary(tf.Summary.FromString(model_data), step)
-            self.summary_writer.flush()
+            self.summary_writer.add_summary(model_data, step)
+
+    def _summary_tag(self, name):
+        """
+        Returns summary tag as `tf.summary` ops defined in _combine_summaries() name scope would have.
+        """
+        if self.ep_summary_scope:
+            return self.ep_summary_scope + '/' + name
+
+        else:
+            return name
 
     def process(self, sess, **kwargs):
         """
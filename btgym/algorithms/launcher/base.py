@@ -33,6 +33,8 @@ import numpy as np
 import copy
 
 from btgym.algorithms.worker import Worker
+from btgym.algorithms.store import SharedParamStore
+from btgym.utils import clear_port, wait_for_ready
 from btgym.algorithms.aac import A3C
 from btgym.algorithms.policy import BaseAacPolicy
 
@@ -87,6 +89,10 @@ class Launcher():
                                 - 'num_ps':       number of parameter servers, def: 1
                                 - 'num_envs':     number of environments to run in parallel for each worker, def: 1
                                 - 'log_dir':      directory to save model and summaries, def: './tmp/btgym_aac_log'
+                                - 'param_store':  None or shared memory parameter store mode: `hogwild` or `seqlock`;
+                                                  if set, global weights are kept in memory-mapped file instead of
+                                                  parameter server and no tf.server is started, single host only;
+                                                  def: None
 
         """
 
@@ -105,6 +111,7 @@ class Launcher():
             num_ps=1,
             log_dir='./tmp/btgym_aac_log',
             num_envs=1,
+            param_store=None,
         )
         self.policy_config = dict(
             class_ref=BaseAacPolicy,
@@ -117,6 +124,7 @@ class Launcher():
             kwargs={}
         )
         self.max_env_steps = 100 * 10 ** 6
+        self.worker_ready_timeout = 300  # seconds to wait for every worker to start up
         self.ports_to_use = []
         self.root_random_seed = root_random_seed
         self.purge_previous = purge_previous
@@ -181,6 +189,17 @@ class Launcher():
 
         assert self.env_config['class_ref'] is not None
 
+        # Shared memory parameter store:
+        if self.cluster_config['param_store'] is not None:
+            self.param_store = SharedParamStore(
+                mode=self.cluster_config['param_store'],
+                ready_timeout=self.worker_ready_timeout
+            )
+            self.log.notice('using {} parameter store.'.format(self.param_store.mode))
+
+        else:
+            self.param_store = None
+
         # Make cluster specification dict:
         self.cluster_spec = self.make_cluster_spec(self.cluster_config)
 
@@ -241,7 +260,8 @@ class Launcher():
                         'log_dir': self.cluster_config['log_dir'],
                         'max_env_steps': self.max_env_steps,
                         'log_level': self.log_level,
-                        'random_seed': self.workers_rnd_seeds.pop()
+                        'random_seed': self.workers_rnd_seeds.pop(),
+                        'param_store': self.param_store,
                     }
                 )
                 self.clear_port(env_config['kwargs']['port'])
@@ -258,12 +278,13 @@ class Launcher():
         all_ps = []
         port = config['port']
 
-        for _ in range(config['num_ps']):
-            self.clear_port(port)
-            self.ports_to_use.append(port)
-            all_ps.append('{}:{}'.format(config['host'], port))
-            port += 1
-        cluster['ps'] = all_ps
+        if config['param_store'] is None:
+            for _ in range(config['num_ps']):
+                self.clear_port(port)
+                self.ports_to_use.append(port)
+                all_ps.append('{}:{}'.format(config['host'], port))
+                port += 1
+            cluster['ps'] = all_ps
 
         all_workers = []
         for _ in range(config['num_workers']):
@@ -281,12 +302,7 @@ class Launcher():
         if not isinstance(port_list, list):
             port_list = [port_list]
 
-        for port in port_list:
-            p = psutil.Popen(['lsof', '-i:{}'.format(port), '-t'], stdout=PIPE, stderr=PIPE)
-            pid = p.communicate()[0].decode()[:-1]  # retrieving PID
-            if pid is not '':
-                p = psutil.Popen(['kill', pid])
-                self.log.info('port {} cleared'.format(port))
+        clear_port(port_list, self.log)
 
     def _update_config_dict(self, old_dict, new_dict=None):
         """
@@ -337,7 +353,7 @@ class Launcher():
             stop_worker([chief_worker])
             stop_worker(p_servers_list)
 
-        # Start workers:
+        # Start workers, all at once: non data-master environments just wait for datafeed_server to answer:
         for worker_config in self.workers_config_list:
             # Make:
             worker = Worker(**worker_config)
@@ -346,9 +362,7 @@ class Launcher():
             worker.start()
 
             if worker.job_name in 'worker':
-                # Allow data-master to launch datafeed_server:
                 if worker_config['env_config']['kwargs']['data_master']:
-                    time.sleep(5)
                     chief_worker = worker
 
                 else:
@@ -357,6 +371,20 @@ class Launcher():
             else:
                 p_servers_list.append(worker)
 
+        # Wait for cluster to get ready:
+        for worker in p_servers_list + [chief_worker] + workers_list:
+            try:
+                wait_for_ready(worker, self.worker_ready_timeout)
+                self.log.debug('{}_{} ready.'.format(worker.job_name, worker.task))
+
+            except TimeoutError as e:
+                self.log.warning(e)
+
+            except ChildProcessError as e:
+                self.log.error(e)
+                signal_handler(None, None)
+                raise
+
         # TODO: auto-launch tensorboard?
 
         signal.signal(signal.SIGINT, signal_handler)
@@ -380,6 +408,9 @@ class Launcher():
             ps.join()
             self.log.notice('parameter_server_{} has joined.'.format(ps.task))
 
+        if self.param_store is not None:
+            self.param_store.close()
+
         # TODO: close tensorboard
 
         self.log.notice('Launcher closed.')
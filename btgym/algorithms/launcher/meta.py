@@ -99,7 +99,8 @@ class MetaLauncher(Launcher):
                         'max_env_steps': self.max_env_steps,
                         'log_level': self.log_level,
                         'random_seed': self.workers_rnd_seeds.pop(),
-                        'render_last_env': self.render_slave_env  # last env in a pair is slave
+                        'render_last_env': self.render_slave_env,  # last env in a pair is slave
+                        'param_store': self.param_store,
                     }
                 )
                 self.clear_port(env_config['kwargs']['port'])
@@ -32,6 +32,40 @@ def log_uniform(lo_hi, size):
         return np.exp(v)[0]
 
 
+def pixel_change_2d(state, last_state, stride=(2, 2)):
+    """
+    Numpy equivalent of `btgym.algorithms.nn.networks.pixel_change_2d_estimator` graph,
+    vectorized over leading batch dimension; no session call required.
+
+    Args:
+        state:      array of shape [batch_dim, H, W, C]
+        last_state: array of shape [batch_dim, H, W, C]
+        stride:     max. pooling window and stride as [h_stride, w_stride]
+
+    Returns:
+        estimated absolute difference between subsampled states as array of shape [batch_dim, H', W'].
+    """
+    x = np.abs(np.asarray(state, dtype=np.float32) - np.asarray(last_state, dtype=np.float32))
+
+    if x.shape[-2] <= 3:
+        x = x[:, 1:-1, :, :]  # Assume 1D signal, crop H dim only
+    else:
+        x = x[:, 1:-1, 1:-1, :]  # True 2D, crop H, W dims
+
+    x = x.mean(axis=-1)
+
+    # Max. pooling with window == stride and `SAME` padding:
+    pad = []
+    for size, s in zip(x.shape[1:], stride):
+        total = int(np.ceil(size / s)) * s - size
+        pad.append((total // 2, total - total // 2))
+
+    x = np.pad(x, [(0, 0)] + pad, mode='constant', constant_values=-np.inf)
+    batch_dim, h, w = x.shape
+
+    return x.reshape(batch_dim, h // stride[0], stride[0], w // stride[1], stride[1]).max(axis=(2, 4))
+
+
 def cat_entropy(logits):
     a0 = logits - tf.reduce_max(logits, 1, keepdims=True)
     ea0 = tf.exp(a0)
@@ -10,6 +10,43 @@ from collections import deque
 from btgym.algorithms.rollout import Rollout
 
 
+class _WindowBuffer(object):
+    """
+    Growing contiguous array of time-embedded observation rows, shared by successive frames of an episode.
+    Rows are only appended, so windows once taken as views of it never change.
+    """
+    def __init__(self, rows):
+        self.data = np.array(rows)
+        self.size = rows.shape[0]
+
+    def append(self, rows):
+        if self.size + rows.shape[0] > self.data.shape[0]:
+            data = np.empty((2 * (self.size + rows.shape[0]),) + self.data.shape[1:], dtype=self.data.dtype)
+            data[:self.size] = self.data[:self.size]
+            self.data = data
+
+        self.data[self.size: self.size + rows.shape[0]] = rows
+        self.size += rows.shape[0]
+
+    def window(self, end, length):
+        return self.data[end - length: end]
+
+
+class _WindowRef(object):
+    """
+    Stored frame observation window: `length` buffer rows ending at `end`.
+    """
+    __slots__ = ['buffer', 'end', 'length']
+
+    def __init__(self, buffer, end, length):
+        self.buffer = buffer
+        self.end = end
+        self.length = length
+
+    def get(self):
+        return self.buffer.window(self.end, self.length)
+
+
 class Memory(object):
     """
     Replay memory with rebalanced replay based on reward value.
@@ -18,7 +55,8 @@ class Memory(object):
         must be filled up before calling sampling methods.
     """
     def __init__(self, history_size, max_sample_size, priority_sample_size, log_level=WARNING,
-                 rollout_provider=None, task=-1, reward_threshold=0.1, use_priority_sampling=False):
+                 rollout_provider=None, task=-1, reward_threshold=0.1, use_priority_sampling=False,
+                 window_keys=None, context_interval=None):
         """
 
         Args:
@@ -29,9 +67,25 @@ class Memory(object):
             rollout_provider:       callable returning list of Rollouts NOT USED
             task:                   parent worker id;
             reward_threshold:       if |experience.reward| > reward_threshold: experience is saved as 'prioritized';
+            use_priority_sampling:  bool, enable priority_sample() method;
+            window_keys:            list of `state` keys holding time-embedded observations, e.g. ['external'];
+                                    if given, rows successive frames windows share are stored once
+                                    and windows are rebuilt as views on sampling, see _pack_frame().
+            context_interval:       int, if given, frame keeps its own rnn `context` only at start of
+                                    experience sequence and every `context_interval` frames since, others
+                                    refer to last kept one. Samples are moved back to start at preceding
+                                    context keeping frame, so sample `context` is always one of its first frame.
+                                    Only frame sample starts with is used when rollouts are processed with
+                                    time_flat=False. Can not be used with priority sampling, which
+                                    samples are of exact size.
         """
+        if use_priority_sampling and context_interval is not None:
+            raise ValueError('Priority sampling is not supported with `context_interval` set.')
+
         self._history_size = history_size
         self._frames = deque(maxlen=history_size)
+        # Number of frames since one holding frame context, zero if frame keeps it's own, aligned with _frames:
+        self._context_offsets = deque(maxlen=history_size)
         self.reward_threshold = reward_threshold
         self.max_sample_size = int(max_sample_size)
         self.priority_sample_size = int(priority_sample_size)
@@ -41,6 +95,14 @@ class Memory(object):
         StreamHandler(sys.stdout).push_application()
         self.log = Logger('ReplayMemory_{}'.format(self.task), level=self.log_level)
         self.use_priority_sampling = use_priority_sampling
+        self.window_keys = window_keys or []
+        # Last stored window reference and rows shift found, per key:
+        self._last_windows = {}
+        self._last_shifts = {}
+        self.context_interval = context_interval
+        # Last kept context and number of frames referring to it:
+        self._last_context = None
+        self._last_context_age = 0
         # Indices for non-priority frames:
         self._zero_reward_indices = deque()
         # Indices for priority frames:
@@ -70,7 +132,9 @@ class Memory(object):
         was_full = self.is_full()
 
         # Append frame:
+        frame, context_offset = self._pack_frame(frame)
         self._frames.append(frame)
+        self._context_offsets.append(context_offset)
 
         # Decide and append index:
         if frame_index >= self.max_sample_size - 1:
@@ -94,6 +158,116 @@ class Memory(object):
                             self._non_zero_reward_indices[0] < cut_frame_index:
                 self._non_zero_reward_indices.popleft()
 
+    def _pack_frame(self, frame):
+        """
+        Makes compact copy of frame to store, as set by `window_keys` and `context_interval`.
+
+        Time-embedded `state` windows are replaced with references to episode buffers.
+        If frame directly follows previously added one, only rows its window does not share
+        with previous one are appended to buffer; otherwise new buffer is started.
+        Buffer is freed once no stored frame refers to it.
+
+        Rnn context of frame in between of context keeping ones is replaced with reference to last kept one.
+
+        Args:
+            frame:  dictionary of values.
+
+        Returns:
+            frame to store, number of frames since one frame context is taken from
+        """
+        context_offset = 0
+        if len(self.window_keys) == 0 and self.context_interval is None:
+            return frame, context_offset
+
+        is_continuation = len(self._frames) > 0 and not self._frames[-1]['terminal'] and \
+            self._frames[-1]['position']['episode'] == frame['position']['episode'] and \
+            self._frames[-1]['position']['step'] + 1 == frame['position']['step']
+
+        frame = dict(frame)
+
+        if self.context_interval is not None and 'context' in frame:
+            if is_continuation and self._last_context_age < self.context_interval:
+                frame['context'] = self._last_context
+                context_offset = self._last_context_age
+                self._last_context_age += 1
+
+            else:
+                self._last_context = frame['context']
+                self._last_context_age = 1
+
+        if len(self.window_keys) == 0 or not isinstance(frame.get('state'), dict):
+            return frame, context_offset
+
+        state = dict(frame['state'])
+        for key in self.window_keys:
+            window = state.get(key)
+            if not isinstance(window, np.ndarray) or window.ndim == 0:
+                continue
+
+            ref = self._last_windows.get(key) if is_continuation else None
+            if ref is not None and ref.end == ref.buffer.size and ref.length == window.shape[0] and \
+                    ref.buffer.data.dtype == window.dtype and ref.buffer.data.shape[1:] == window.shape[1:]:
+                shift = self._find_shift(window, ref.get(), self._last_shifts.get(key))
+                self._last_shifts[key] = shift
+                ref.buffer.append(window[-shift:])
+                ref = _WindowRef(ref.buffer, ref.buffer.size, window.shape[0])
+
+            else:
+                buffer = _WindowBuffer(window)
+                ref = _WindowRef(buffer, buffer.size, window.shape[0])
+
+            self._last_windows[key] = ref
+            state[key] = ref
+
+        frame['state'] = state
+        return frame, context_offset
+
+    def _context_start(self, raw_index):
+        """
+        Returns index of frame holding context of frame at `raw_index`;
+        if that one has already been discarded, index of next frame holding it's own context.
+        """
+        offset = self._context_offsets[raw_index]
+        if offset <= raw_index:
+            return raw_index - offset
+
+        while raw_index < len(self._context_offsets) - 1 and self._context_offsets[raw_index] > 0:
+            raw_index += 1
+
+        return raw_index
+
+    @staticmethod
+    def _find_shift(window, last_window, hint=None):
+        """
+        Returns least number of rows `window` is shifted by relative to `last_window`, trying `hint` first;
+        window length if no rows are shared.
+        """
+        length = window.shape[0]
+        candidates = range(1, length)
+        if hint is not None and 0 < hint < length:
+            candidates = [hint] + list(candidates)
+
+        for shift in candidates:
+            # Compare first row before the whole window:
+            if np.array_equal(window[0], last_window[shift]) and np.array_equal(window[:-shift], last_window[shift:]):
+                return shift
+
+        return length
+
+    def _unpack_frame(self, frame):
+        """
+        Restores stored frame windows as views of episode buffers.
+        """
+        if len(self.window_keys) == 0 or not isinstance(frame.get('state'), dict):
+            return frame
+
+        state = {
+            key: value.get() if isinstance(value, _WindowRef) else value for key, value in frame['state'].items()
+        }
+        frame = dict(frame)
+        frame['state'] = state
+        return frame
+
     def add_rollout(self, rollout):
         """
         Adds frames from given rollout to memory with respect to episode continuation.
@@ -155,11 +329,14 @@ class Memory(object):
         if self._frames[start_pos]['terminal']:
             start_pos += 1  # assuming that there are no successive terminal frames.
 
+        # Start with frame rnn context belongs to:
+        start_pos = self._context_start(start_pos)
+
         sampled_rollout = Rollout()
 
-        for i in range(sequence_size):
+        for i in range(min(sequence_size, len(self._frames) - start_pos)):
             frame = self._frames[start_pos + i]
-            sampled_rollout.add(frame)
+            sampled_rollout.add(self._unpack_frame(frame))
             if frame['terminal']:
                 break  # it's ok to return less than `sequence_size` frames if `terminal` frame encountered.
 
@@ -228,7 +405,7 @@ class Memory(object):
 
             for i in range(size - 1):
                 frame = self._frames[raw_start_frame_index + i]
-                sampled_rollout.add(frame)
+                sampled_rollout.add(self._unpack_frame(frame))
                 if check_sequence:
                     if frame['terminal']:
                         if exact_size:
@@ -238,7 +415,7 @@ class Memory(object):
                         break
             # Last frame can be terminal anyway:
             frame = self._frames[raw_start_frame_index + size - 1]
-            sampled_rollout.add(frame)
+            sampled_rollout.add(self._unpack_frame(frame))
 
             if is_full:
                 break
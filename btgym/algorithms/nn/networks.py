@@ -9,6 +9,7 @@ import tensorflow as tf
 import tensorflow.contrib.rnn as rnn
 from tensorflow.contrib.layers import layer_norm as norm_layer
 from tensorflow.python.util.nest import flatten as flatten_nested
+from tensorflow.contrib.rnn.python.ops.lstm_ops import LSTMBlockWrapper
 
 from btgym.algorithms.nn.layers import normalized_columns_initializer, categorical_sample
 from btgym.algorithms.nn.layers import linear, noisy_linear, conv2d, deconv2d, conv1d
@@ -113,12 +114,20 @@ def lstm_network(
     Stage2 network: from features to flattened LSTM output.
     Defines [multi-layered] dynamic [possibly shared] LSTM network.
 
+    Note:
+        fused LSTM implementations (`tf.contrib.rnn.LSTMBlockFusedCell` or any other subclass of
+        `lstm_ops.LSTMBlockWrapper`) are supported as `lstm_class` and are unrolled by own single kernel
+        instead of `tf.nn.dynamic_rnn` loop; state structure and placeholders are same as for `MultiRNNCell`.
+
     Returns:
          batch-wise flattened output tensor;
          lstm initial state tensor;
          lstm state output tensor;
          lstm flattened feed placeholders as tuple.
     """
+    if isinstance(lstm_class, type) and issubclass(lstm_class, LSTMBlockWrapper):
+        return fused_lstm_network(x, lstm_sequence_length, lstm_class, lstm_layers, name, reuse)
+
     with tf.variable_scope(name, reuse=reuse):
         # Prepare rnn type:
         if static:
@@ -163,6 +172,62 @@ def lstm_network(
     return x_out, lstm_init_state, state_out, lstm_state_pl_flatten
 
 
+def fused_lstm_network(
+        x,
+        lstm_sequence_length,
+        lstm_class=rnn.LSTMBlockFusedCell,
+        lstm_layers=(256,),
+        name='lstm',
+        reuse=False,
+    ):
+    """
+    Stage2 network: from features to flattened LSTM output, fused kernel version.
+    Defines [multi-layered] [possibly shared] LSTM network of fused cells, each layer unrolled in time
+    by single op. Serves both batch training and single-step inference as well as `static` case
+    since fused cell handles any time dimension, including one.
+
+    Returns:
+         batch-wise flattened output tensor;
+         lstm initial state tensor;
+         lstm state output tensor;
+         lstm flattened feed placeholders as tuple.
+    """
+    with tf.variable_scope(name, reuse=reuse):
+        # Same context structure as of MultiRNNCell with LSTMStateTuple cells:
+        lstm_init_state = tuple(
+            [
+                rnn.LSTMStateTuple(
+                    tf.zeros([1, size], dtype=tf.float32, name='cell_{}_c_init'.format(i)),
+                    tf.zeros([1, size], dtype=tf.float32, name='cell_{}_h_init'.format(i)),
+                )
+                for i, size in enumerate(lstm_layers)
+            ]
+        )
+        lstm_state_pl = rnn_placeholders(lstm_init_state)
+        lstm_state_pl_flatten = flatten_nested(lstm_state_pl)
+
+        # Fused cells expect [batch]-shaped int32 sequence lengths:
+        sequence_length = tf.reshape(tf.cast(lstm_sequence_length, tf.int32), [-1])
+
+        # Fused cells are time-major:
+        x_out = tf.transpose(x, [1, 0, 2])
+        state_out = []
+        for i, size in enumerate(lstm_layers):
+            with tf.variable_scope('cell_{}'.format(i)):
+                x_out, layer_state_out = lstm_class(size, reuse=reuse)(
+                    x_out,
+                    initial_state=lstm_state_pl[i],
+                    dtype=tf.float32,
+                    sequence_length=sequence_length,
+                )
+                state_out.append(rnn.LSTMStateTuple(*layer_state_out))
+
+        x_out = tf.transpose(x_out, [1, 0, 2])
+        state_out = tuple(state_out)
+
+    return x_out, lstm_init_state, state_out, lstm_state_pl_flatten
+
+
 def dense_aac_network(x, ac_space, name='dense_aac', linear_layer_ref=noisy_linear, reuse=False):
     """
     Stage3 network: from LSTM flattened output to advantage actor-critic.
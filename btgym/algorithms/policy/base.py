@@ -12,6 +12,7 @@ import tensorflow as tf
 
 from btgym.algorithms.nn.networks import *
 from btgym.algorithms.utils import *
+from btgym.algorithms.math_utils import pixel_change_2d
 from btgym.datafeed.base import EnvResetConfig
 
 
@@ -54,7 +55,10 @@ class BaseAacPolicy(object):
         self.lstm_class = lstm_class
         self.lstm_layers = lstm_layers
         self.aux_estimate = aux_estimate
+        self.pc_estimator_stride = kwargs.get('pc_estimator_stride', (2, 2))
         self.callback = {}
+        self.batch_callback = {}
+        self.inference_callables = None
 
         # Placeholders for obs. state input:
         self.on_state_in = nested_placeholders(ob_space, batch_dim=None, name='on_policy_state_in')
@@ -212,7 +216,7 @@ class BaseAacPolicy(object):
 
         # Callbacks:
         if self.aux_estimate:
-            self.callback['pixel_change'] = self.get_pc_target
+            self.batch_callback['pixel_change'] = self.get_pc_target_batch
 
     def get_initial_features(self, **kwargs):
         """
@@ -225,6 +229,63 @@ class BaseAacPolicy(object):
         sess = tf.get_default_session()
         return sess.run(self.on_lstm_init_state)
 
+    @property
+    def inference_feed_list(self):
+        """
+        Ordered flat list of placeholders to feed single-step on-policy inference with:
+        [rnn context, observation, action_reward, batch_size, time_length].
+        """
+        return list(self.on_lstm_state_pl_flatten) + flatten_nested(self.on_state_in) +\
+            [self.on_a_r_in, self.on_batch_size, self.on_time_length]
+
+    def get_inference_callables(self):
+        """
+        Returns session callables running pruned inference-only part of policy graph.
+
+        Callables are built once per session with fixed feed list and fetches, so only on-policy ops
+        leading to action, value and context outputs are executed, `train_phase` is left at its default value and
+        no feed dictionary gets built on every call. Variables are shared with policy instance itself, so
+        any `sync_pi` operation updates inference weights as well.
+
+        Returns:
+            tuple of callables: (act, value_fn)
+        """
+        sess = tf.get_default_session()
+        if self.inference_callables is None or self.inference_callables[0] is not sess:
+            self.inference_callables = (
+                sess,
+                sess.make_callable(
+                    [self.on_sample, self.on_logits, self.on_vf, self.on_lstm_state_out],
+                    feed_list=self.inference_feed_list
+                ),
+                sess.make_callable(self.on_vf, feed_list=self.inference_feed_list)
+            )
+        return self.inference_callables[1:]
+
+    def get_inference_graph_def(self):
+        """
+        Exports pruned inference-only policy graph with current variables values frozen as constants.
+
+        Returns:
+            tf.GraphDef instance holding single-step on-policy subgraph; input names are those of
+            `self.inference_feed_list` placeholders, output names are those of action, logits, value and
+            flattened context output tensors.
+        """
+        sess = tf.get_default_session()
+        outputs = [self.on_sample, self.on_logits, self.on_vf] + flatten_nested(self.on_lstm_state_out)
+        return tf.graph_util.convert_variables_to_constants(
+            sess,
+            sess.graph.as_graph_def(),
+            [tensor.op.name for tensor in outputs]
+        )
+
+    def _inference_feed_values(self, observation, lstm_state, action_reward):
+        """
+        Returns flat list of values ordered as `self.inference_feed_list`.
+        """
+        return flatten_nested(lstm_state) + [[value] for value in flatten_nested(observation)] +\
+            [[action_reward], 1, 1]
+
     def act(self, observation, lstm_state, action_reward):
         """
         Predicts action.
@@ -237,22 +298,8 @@ class BaseAacPolicy(object):
         Returns:
             Action [one-hot], actions logits, V-fn value, output RNN state
         """
-        sess = tf.get_default_session()
-        feeder = {pl: value for pl, value in zip(self.on_lstm_state_pl_flatten, flatten_nested(lstm_state))}
-        feeder.update(feed_dict_from_nested(self.on_state_in, observation, expand_batch=True))
-        feeder.update(
-            {
-                self.on_a_r_in: [action_reward],
-                self.on_batch_size: 1,
-                self.on_time_length: 1,
-                self.train_phase: False
-            }
-        )
-        #print('feeder keys:')
-        #for k in feeder.keys():
-        #    print('key: {}, type: <{}>'.format(k, type(feeder[k])))
-        #print('ops:', [self.on_sample, self.on_vf, self.on_lstm_state_out])
-        return sess.run([self.on_sample, self.on_logits, self.on_vf, self.on_lstm_state_out], feeder)
+        act_fn, _ = self.get_inference_callables()
+        return act_fn(*self._inference_feed_values(observation, lstm_state, action_reward))
 
     def get_value(self, observation, lstm_state, action_reward):
         """
@@ -266,19 +313,8 @@ class BaseAacPolicy(object):
         Returns:
             V-function value
         """
-        sess = tf.get_default_session()
-        feeder = feed_dict_rnn_context(self.on_lstm_state_pl_flatten, lstm_state)
-        feeder.update(feed_dict_from_nested(self.on_state_in, observation, expand_batch=True))
-        feeder.update(
-            {
-                self.on_a_r_in: [action_reward],
-                self.on_batch_size: 1,
-                self.on_time_length: 1,
-                self.train_phase: False
-            }
-        )
-
-        return sess.run(self.on_vf, feeder)[0]
+        _, value_fn = self.get_inference_callables()
+        return value_fn(*self._inference_feed_values(observation, lstm_state, action_reward))[0]
 
     def get_pc_target(self, state, last_state, **kwargs):
         """
@@ -292,10 +328,25 @@ class BaseAacPolicy(object):
         Returns:
             Estimated absolute difference between two subsampled states.
         """
-        sess = tf.get_default_session()
-        feeder = {self.pc_change_state_in: state['external'], self.pc_change_last_state_in: last_state['external']}
+        return self.get_pc_target_batch(states=[last_state], next_states=[state])[0]
+
+    def get_pc_target_batch(self, states, next_states, **kwargs):
+        """
+        Estimates pixel-control task targets for entire rollout at once, in numpy.
+
+        Args:
+            states:         list of observations
+            next_states:    list of observations, each one following corresponding entry of `states`
+            **kwargs:       not used
 
-        return sess.run(self.pc_target, feeder)[0,...,0]
+        Returns:
+            Estimated absolute differences between subsampled consecutive states as array of shape [rollout_len, ...].
+        """
+        return pixel_change_2d(
+            state=np.stack([state['external'] for state in next_states], axis=0),
+            last_state=np.stack([state['external'] for state in states], axis=0),
+            stride=self.pc_estimator_stride
+        )
 
     def get_sample_config(self):
         """
@@ -390,6 +441,7 @@ class __Aac1dPolicy(BaseAacPolicy):
         self.aux_estimate = aux_estimate
         self.time_flat = time_flat
         self.callback = {}
+        self.inference_callables = None
 
         # Placeholders for obs. state input:
         self.on_state_in = nested_placeholders(ob_space, batch_dim=None, name='on_policy_state_in')
@@ -416,6 +468,7 @@ class __Aac1dPolicy(BaseAacPolicy):
             duell_pc_filter_size=(4, 1),
             duell_pc_stride=(2, 1),
         )
+        self.pc_estimator_stride = kwargs['pc_estimator_stride']
 
         # Base on-policy AAC network:
         # Conv. layers:
@@ -41,7 +41,7 @@ class StackedLstmPolicy(BaseAacPolicy):
             ob_space:           dictionary of observation state shapes
             ac_space:           discrete action space shape (length)
             rp_sequence_size:   reward prediction sample length
-            lstm_class_ref:     tf.nn.lstm class to use
+            lstm_class_ref:     tf.nn.lstm class to use, fused `tf.contrib.rnn.LSTMBlockFusedCell` is supported
             lstm_layers:        tuple of LSTM layers sizes
             linear_layer_ref:   linear layer class to use
             aux_estimate:       (bool), if True - add auxiliary tasks estimations to self.callbacks dictionary.
@@ -67,7 +67,10 @@ class StackedLstmPolicy(BaseAacPolicy):
         self.lstm_class = lstm_class_ref
         self.lstm_layers = lstm_layers
         self.aux_estimate = aux_estimate
+        self.pc_estimator_stride = kwargs['pc_estimator_stride']
         self.callback = {}
+        self.batch_callback = {}
+        self.inference_callables = None
         self.encode_internal_state = encode_internal_state
         self.static_rnn = static_rnn
         self.debug = {}
@@ -506,7 +509,7 @@ class StackedLstmPolicy(BaseAacPolicy):
 
         # Callbacks:
         if self.aux_estimate:
-            self.callback['pixel_change'] = self.get_pc_target
+            self.batch_callback['pixel_change'] = self.get_pc_target_batch
 
         # print('policy_debug_dict:\n', self.debug)
 
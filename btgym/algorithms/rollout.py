@@ -101,6 +101,8 @@ class Rollout(dict):
         Converts single-trajectory rollout of experiences to dictionary of ready-to-feed arrays.
         Computes rollout returns and the advantages.
         Pads with zeroes to desired length, if size arg is given.
+        Float values are kept as float32: returns and advantages are computed in float64 and cast back,
+        experience arrays keep dtypes they have been collected with.
 
         Args:
             gamma:          discount factor
@@ -132,16 +134,16 @@ class Rollout(dict):
         #self._check_it(batch['context'])
 
         # Total accumulated empirical return:
-        rewards = np.asarray(self['reward'])
+        rewards = np.asarray(self['reward'], dtype=np.float64)
         rollout_r = self['r'][-1][0]  # bootstrapped V_next or 0 if terminal
-        vpred_t = np.asarray(self['value'] + [rollout_r])
-        rewards_plus_v = np.asarray(self['reward'] + [rollout_r])
-        batch['r'] = discount(rewards_plus_v, gamma)[:-1]
+        vpred_t = np.asarray(self['value'] + [rollout_r], dtype=np.float64)
+        rewards_plus_v = np.asarray(self['reward'] + [rollout_r], dtype=np.float64)
+        batch['r'] = discount(rewards_plus_v, gamma)[:-1].astype(np.float32)
 
         # This formula for the advantage is (16) from "Generalized Advantage Estimation" paper:
         # https://arxiv.org/abs/1506.02438
         delta_t = rewards + gamma * vpred_t[1:] - vpred_t[:-1]
-        batch['advantage'] = discount(delta_t, gamma * gae_lambda)
+        batch['advantage'] = discount(delta_t, gamma * gae_lambda).astype(np.float32)
 
         # Shape it out:
         if time_flat:
@@ -177,7 +179,7 @@ class Rollout(dict):
 
         # Make one hot vector for target rewards (i.e. reward taken from last of sampled frames):
         r = last_frame['reward']
-        rp_t = np.zeros(3)
+        rp_t = np.zeros(3, dtype=np.float32)
         if r > reward_threshold:
             rp_t[1] = 1.0  # positive [010]
 
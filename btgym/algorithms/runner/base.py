@@ -53,10 +53,10 @@ def BaseEnvRunnerFn(sess,
     length = 0
     local_episode = 0
     reward_sum = 0
-    last_action = np.zeros(env.action_space.n)
+    last_action = np.zeros(env.action_space.n, dtype=np.float32)
     last_action[0] = 1
     last_reward = 0.0
-    last_action_reward = np.concatenate([last_action, np.asarray([last_reward])], axis=-1)
+    last_action_reward = np.concatenate([last_action, np.asarray([last_reward], dtype=np.float32)], axis=-1)
 
     # Summary averages accumulators:
     total_r = []
@@ -64,6 +64,7 @@ def BaseEnvRunnerFn(sess,
     final_value = []
     total_steps = []
     total_steps_atari = []
+    latency = {}
 
     ep_stat = None
     test_ep_stat = None
@@ -72,6 +73,7 @@ def BaseEnvRunnerFn(sess,
     while True:
         terminal_end = False
         rollout = Rollout()
+        experiences = []
 
         action, _, value_, context = policy.act(last_state, last_context, last_action_reward)
 
@@ -101,7 +103,7 @@ def BaseEnvRunnerFn(sess,
         last_context = context
         last_action = action
         last_reward = reward
-        last_action_reward = np.concatenate([last_action, np.asarray([last_reward])], axis=-1)
+        last_action_reward = np.concatenate([last_action, np.asarray([last_reward], dtype=np.float32)], axis=-1)
 
         for roll_step in range(1, rollout_length):
             if not terminal:
@@ -128,10 +130,9 @@ def BaseEnvRunnerFn(sess,
                 for key, callback in policy.callback.items():
                     experience[key] = callback(**locals())
 
-                # Bootstrap to complete and push previous experience:
+                # Bootstrap to complete previous experience:
                 last_experience['r'] = value_
-                rollout.add(last_experience)
-                memory.add(last_experience)
+                experiences.append(last_experience)
 
                 # Housekeeping:
                 length += 1
@@ -140,7 +141,7 @@ def BaseEnvRunnerFn(sess,
                 last_context = context
                 last_action = action
                 last_reward = reward
-                last_action_reward = np.concatenate([last_action, np.asarray([last_reward])], axis=-1)
+                last_action_reward = np.concatenate([last_action, np.asarray([last_reward], dtype=np.float32)], axis=-1)
                 last_experience = experience
 
             if terminal:
@@ -157,6 +158,9 @@ def BaseEnvRunnerFn(sess,
                     cpu_time += [episode_stat['runtime'].total_seconds()]
                     final_value += [last_i['broker_value']]
                     total_steps += [episode_stat['length']]
+                    # Step phases mean latencies, if env instrumentation is on:
+                    for phase, phase_stat in episode_stat.get('latency', {}).items():
+                        latency.setdefault(phase, []).append(phase_stat['mean_ms'])
 
                 # Episode statistics:
                 try:
@@ -186,6 +190,9 @@ def BaseEnvRunnerFn(sess,
                                 final_value=np.average(final_value),
                                 steps=np.average(total_steps)
                             )
+                            ep_stat.update(
+                                {'latency_' + phase: np.average(values) for phase, values in latency.items()}
+                            )
                         else:
                             # Atari:
                             ep_stat = dict(
@@ -197,6 +204,7 @@ def BaseEnvRunnerFn(sess,
                         final_value = []
                         total_steps = []
                         total_steps_atari = []
+                        latency = {}
 
                 if task == 0 and local_episode % env_render_freq == 0 :
                     if not atari_test:
@@ -219,10 +227,10 @@ def BaseEnvRunnerFn(sess,
                 last_context = policy.get_initial_features(state=last_state, context=last_context)
                 length = 0
                 reward_sum = 0
-                last_action = np.zeros(env.action_space.n)
+                last_action = np.zeros(env.action_space.n, dtype=np.float32)
                 last_action[0] = 1
                 last_reward = 0.0
-                last_action_reward = np.concatenate([last_action, np.asarray([last_reward])], axis=-1)
+                last_action_reward = np.concatenate([last_action, np.asarray([last_reward], dtype=np.float32)], axis=-1)
 
                 # Increment global and local episode counts:
                 sess.run(policy.inc_episode)
@@ -238,7 +246,23 @@ def BaseEnvRunnerFn(sess,
             )
 
         else:
-            last_experience['r'] = np.asarray([0.0])
+            last_experience['r'] = np.asarray([0.0], dtype=np.float32)
+
+        experiences.append(last_experience)
+
+        # Execute user-defined batch callbacks to policy, if any;
+        # `state` holds observation following last experience of the rollout, even if episode has been reset:
+        if len(policy.batch_callback) > 0:
+            next_states = [experience['state'] for experience in experiences[1:]] + [state]
+            for key, callback in policy.batch_callback.items():
+                values = callback(states=[experience['state'] for experience in experiences], next_states=next_states)
+                for experience, callback_value in zip(experiences, values):
+                    experience[key] = callback_value
+
+        # Push all but last experience:
+        for experience in experiences[:-1]:
+            rollout.add(experience)
+            memory.add(experience)
 
         rollout.add(last_experience)
 
@@ -204,10 +204,10 @@ class BaseSynchroRunner():
         # self.log.warning('init_context_passed: {}'.format(init_context))
         # self.log.warning('state_metadata: {}'.format(state['metadata']))
 
-        init_action = np.zeros(self.env.action_space.n)
+        init_action = np.zeros(self.env.action_space.n, dtype=np.float32)
         init_action[0] = 1
         init_reward = 0.0
-        init_action_reward = np.concatenate([init_action, np.asarray([init_reward])], axis=-1)
+        init_action_reward = np.concatenate([init_action, np.asarray([init_reward], dtype=np.float32)], axis=-1)
 
         # Update policy:
         if policy_sync_op is not None:
@@ -217,7 +217,7 @@ class BaseSynchroRunner():
         action, logits, value, next_context = policy.act(init_state, init_context, init_action_reward)
         next_state, reward, terminal, self.info = self.env.step(init_action.argmax())
 
-        next_action_reward = np.concatenate([action, np.asarray([reward])], axis=-1)
+        next_action_reward = np.concatenate([action, np.asarray([reward], dtype=np.float32)], axis=-1)
 
         experience = {
             'position': {'episode': self.local_episode, 'step': self.length},
@@ -235,6 +235,9 @@ class BaseSynchroRunner():
         for key, callback in policy.callback.items():
             experience[key] = callback(**locals())
 
+        for key, callback in policy.batch_callback.items():
+            experience[key] = callback(states=[init_state], next_states=[next_state])[0]
+
         # reset per-episode  counters and accumulators:
         self.ep_accum = {
             'logits': [logits],
@@ -290,7 +293,7 @@ class BaseSynchroRunner():
         # Argmax to convert from one-hot:
         next_state, reward, terminal, self.info = self.env.step(action.argmax())
 
-        next_action_reward = np.concatenate([action, np.asarray([reward])], axis=-1)
+        next_action_reward = np.concatenate([action, np.asarray([reward], dtype=np.float32)], axis=-1)
 
         # Partially collect experience:
         experience = {
@@ -308,6 +311,9 @@ class BaseSynchroRunner():
         for key, callback in policy.callback.items():
             experience[key] = callback(**locals())
 
+        for key, callback in policy.batch_callback.items():
+            experience[key] = callback(states=[state], next_states=[next_state])[0]
+
         # Housekeeping:
         self.length += 1
 
@@ -398,7 +404,7 @@ class BaseSynchroRunner():
             # log.notice('ep_value shape: {}'.format(np.asarray(ep_value).shape))
 
             # Unpack LSTM states:
-            rnn_1, rnn_2 = zip(*self.ep_accum['context'])
+            rnn_1, rnn_2 = zip(*[context[:2] for context in self.ep_accum['context']])
             rnn_1 = [state[0] for state in rnn_1]
             rnn_2 = [state[0] for state in rnn_2]
             c1, h1 = zip(*rnn_1)
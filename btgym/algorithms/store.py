@@ -0,0 +1,223 @@
+###############################################################################
+#
+# Copyright (C) 2017 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import os
+import time
+import tempfile
+import multiprocessing
+
+import numpy as np
+
+
+class SharedParamStore(object):
+    """
+    Single host alternative to tf parameter server: global model weights are kept as flat float32 vector
+    in memory-mapped file all worker processes attach to, along with global step and episode counters.
+
+    Workers pull weights by copying the vector and push updates by adding difference between weights
+    they have computed and ones they have pulled, so concurrent updates of other workers are kept.
+    Two update modes are supported:
+
+        `hogwild`:  lock-free pushes and pulls, concurrent updates may partially overwrite each other;
+        `seqlock`:  pushes are serialized with lock and bump sequence counter, pulls retry copying
+                    until no push is found to overlap, so workers always get consistent weights.
+
+    Counters are always updated under lock.
+
+    Usage: instance is made by launcher and passed to every worker; chief worker calls `create()` with
+    initial weights once global variables are initialized, other workers call `attach()`.
+    """
+    modes = ('hogwild', 'seqlock')
+
+    # Header fields, int64 each:
+    _SEQ, _STEP, _EPISODE, _HEADER_SIZE = 0, 1, 2, 8
+
+    def __init__(self, mode='hogwild', filename=None, ready_timeout=300):
+        """
+
+        Args:
+            mode:           str, either `hogwild` or `seqlock`
+            filename:       str, shared file to make; default is unique one on shared memory filesystem
+            ready_timeout:  int, seconds to wait for chief worker to create store when attaching
+        """
+        if mode not in self.modes:
+            raise ValueError('Expected param. store mode to be one of {}, got: {}'.format(self.modes, mode))
+
+        self.mode = mode
+        if filename is None:
+            filename = os.path.join(
+                '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(),
+                'btgym_params_{}_{}'.format(os.getpid(), id(self))
+            )
+        self.filename = filename
+        self.ready_timeout = ready_timeout
+        self.lock = multiprocessing.Lock()
+
+        self.header = None
+        self.params = None
+        self.shapes = None
+        self.sizes = None
+        self.last_pulled = None
+
+    def __getstate__(self):
+        # Mappings are made by every process itself:
+        state = self.__dict__.copy()
+        for key in ['header', 'params', 'last_pulled']:
+            state[key] = None
+        return state
+
+    def create(self, values, step=0, episode=0):
+        """
+        Makes store holding given weights and attaches to it; chief worker only.
+
+        Args:
+            values:     list of arrays, global model weights
+            step:       int, initial global step
+            episode:    int, initial global episode
+        """
+        header = np.zeros(self._HEADER_SIZE, dtype=np.int64)
+        header[self._STEP] = step
+        header[self._EPISODE] = episode
+        params = np.concatenate([np.asarray(value, dtype=np.float32).ravel() for value in values])
+
+        # Write and rename, so others never see store partially written:
+        temp_filename = self.filename + '.tmp'
+        with open(temp_filename, 'wb') as f:
+            header.tofile(f)
+            params.tofile(f)
+
+        os.rename(temp_filename, self.filename)
+        self.attach([np.shape(value) for value in values])
+
+    def attach(self, shapes):
+        """
+        Maps store, waiting for chief worker to create it.
+
+        Args:
+            shapes:     list of global model weights shapes
+        """
+        self.shapes = [tuple(shape) for shape in shapes]
+        self.sizes = [int(np.prod(shape)) for shape in self.shapes]
+
+        start = time.time()
+        while not os.path.exists(self.filename):
+            if time.time() - start > self.ready_timeout:
+                raise TimeoutError('Parameter store <{}> has not been created in {} seconds.'.
+                                   format(self.filename, self.ready_timeout))
+            time.sleep(0.1)
+
+        self.header = np.memmap(self.filename, dtype=np.int64, mode='r+', shape=(self._HEADER_SIZE,))
+        self.params = np.memmap(
+            self.filename,
+            dtype=np.float32,
+            mode='r+',
+            offset=self.header.nbytes,
+            shape=(sum(self.sizes),)
+        )
+
+    def close(self):
+        """
+        Removes store file; processes already attached keep their mappings valid.
+        """
+        try:
+            os.remove(self.filename)
+
+        except OSError:
+            pass
+
+    def _split(self, flat):
+        values = []
+        start = 0
+        for shape, size in zip(self.shapes, self.sizes):
+            values.append(flat[start: start + size].reshape(shape))
+            start += size
+        return values
+
+    def pull(self):
+        """
+        Returns:
+            list of arrays, copy of global weights
+        """
+        if self.mode == 'seqlock':
+            while True:
+                seq = self.header[self._SEQ]
+                if seq % 2 == 0:
+                    flat = np.array(self.params)
+                    if self.header[self._SEQ] == seq:
+                        break
+
+        else:
+            flat = np.array(self.params)
+
+        self.last_pulled = flat.copy()
+        return self._split(flat)
+
+    def push(self, *values):
+        """
+        Adds to global weights difference between given ones and weights last pulled or pushed by this process.
+
+        Args:
+            values:     arrays, updated weights, same shapes as global ones
+
+        Returns:
+            int64, update sequence number
+        """
+        flat = np.concatenate([np.asarray(value, dtype=np.float32).ravel() for value in values])
+        delta = flat - self.last_pulled
+        self.last_pulled = flat
+
+        if self.mode == 'seqlock':
+            with self.lock:
+                self.header[self._SEQ] += 1
+                self.params += delta
+                self.header[self._SEQ] += 1
+
+        else:
+            self.params += delta
+
+        return np.int64(self.header[self._SEQ])
+
+    def add_step(self, increment):
+        """
+        Increments global step.
+
+        Returns:
+            int64, global step value
+        """
+        with self.lock:
+            self.header[self._STEP] += increment
+            return np.int64(self.header[self._STEP])
+
+    def add_episode(self):
+        """
+        Increments global episode count.
+
+        Returns:
+            int64, global episode value
+        """
+        with self.lock:
+            self.header[self._EPISODE] += 1
+            return np.int64(self.header[self._EPISODE])
+
+    def get_counters(self):
+        """
+        Returns:
+            int64 global step, int64 global episode
+        """
+        return np.int64(self.header[self._STEP]), np.int64(self.header[self._EPISODE])
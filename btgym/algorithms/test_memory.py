@@ -0,0 +1,181 @@
+
+import unittest
+import numpy as np
+
+from .memory import Memory
+
+
+def make_frames(num_episodes, episode_length, context_size=4):
+    """
+    Yields experience frames which rnn `context` encodes frame step.
+    """
+    for episode in range(num_episodes):
+        for step in range(episode_length):
+            yield {
+                'position': {'episode': episode, 'step': step},
+                'state': {'external': np.full((1, 3), step, dtype=np.float32)},
+                'action': np.eye(2)[step % 2],
+                'reward': 1.0 if step % 7 == 0 else 0.0,
+                'terminal': step == episode_length - 1,
+                'context': np.full((1, context_size), step, dtype=np.float32),
+            }
+
+
+def make_window_frames(episodes, time_dim=30, shift=1, normalize=False):
+    """
+    Yields experience frames which `external` state is time-embedded window of episode series,
+    moved by `shift` rows every step; if `normalize` is True, every window is scaled by its last row.
+    """
+    for episode, series in enumerate(episodes):
+        episode_length = (series.shape[0] - time_dim) // shift + 1
+        for step in range(episode_length):
+            window = series[step * shift: step * shift + time_dim].copy()
+            if normalize:
+                window /= window[-1]
+            yield {
+                'position': {'episode': episode, 'step': step},
+                'state': {'external': window, 'internal': np.full((1, 5), step, dtype=np.float32)},
+                'reward': 1.0 if step % 7 == 0 else 0.0,
+                'terminal': step == episode_length - 1,
+            }
+
+
+class MemoryWindowTest(unittest.TestCase):
+    """Testing replay memory time-embedded windows deduplication"""
+
+    def setUp(self):
+        self.rng = np.random.RandomState(0)
+
+    def random_episodes(self, num_episodes=4, episode_length=100):
+        return [
+            self.rng.standard_normal((episode_length, 1, 3)).astype(np.float32) + 2.0
+            for _ in range(num_episodes)
+        ]
+
+    def check_windows(self, frames, history_size=1000):
+        """
+        Adds frames to memory, checks all stored windows are equal to original ones;
+        returns memory.
+        """
+        memory = Memory(history_size=history_size, max_sample_size=20, priority_sample_size=3, window_keys=['external'])
+        for frame in frames:
+            memory.add(frame)
+
+        kept_frames = frames[-len(memory._frames):]
+        for frame, stored_frame in zip(kept_frames, memory._frames):
+            unpacked_frame = memory._unpack_frame(stored_frame)
+            self.assertEqual(frame['position'], unpacked_frame['position'])
+            self.assertEqual(frame['state']['external'].dtype, unpacked_frame['state']['external'].dtype)
+            self.assertTrue(np.array_equal(frame['state']['external'], unpacked_frame['state']['external']))
+            self.assertIs(frame['state']['internal'], unpacked_frame['state']['internal'])
+
+        return memory
+
+    @staticmethod
+    def stored_rows(memory):
+        buffers = {id(frame['state']['external'].buffer): frame['state']['external'].buffer for frame in memory._frames}
+        return sum([buffer.size for buffer in buffers.values()])
+
+    def test_one_row_shift(self):
+        """
+        Tests windows moved by single row
+        """
+        frames = list(make_window_frames(self.random_episodes()))
+        memory = self.check_windows(frames)
+        self.assertLess(self.stored_rows(memory), len(frames) * 30 // 10)
+
+    def test_skip_frame_shift(self):
+        """
+        Tests windows moved by number of rows (e.g. skip frame)
+        """
+        frames = list(make_window_frames(self.random_episodes(episode_length=300), shift=4))
+        memory = self.check_windows(frames)
+        self.assertLess(self.stored_rows(memory), len(frames) * 30 // 5)
+
+    def test_normalized_windows(self):
+        """
+        Tests windows sharing no rows with previous ones
+        """
+        frames = list(make_window_frames(self.random_episodes(), normalize=True))
+        self.check_windows(frames)
+
+    def test_flat_stretches(self):
+        """
+        Tests windows containing repeated rows
+        """
+        episodes = [
+            np.repeat(series[:25], 4, axis=0) for series in self.random_episodes()
+        ]
+        episodes[0][40:] = episodes[0][40]
+        for shift in [1, 3]:
+            frames = list(make_window_frames(episodes, shift=shift))
+            memory = self.check_windows(frames)
+            self.assertLess(self.stored_rows(memory), len(frames) * 30)
+
+    def test_episode_boundaries(self):
+        """
+        Tests episode continuing previous one data is not appended to previous episode buffer
+        """
+        series = self.random_episodes(num_episodes=1, episode_length=400)[0]
+        episodes = [series[:100], series[71:200], series[171:300]]
+        frames = list(make_window_frames(episodes))
+        memory = self.check_windows(frames)
+        buffers = {id(frame['state']['external'].buffer) for frame in memory._frames}
+        self.assertEqual(len(buffers), len(episodes))
+
+    def test_discarded_frames(self):
+        """
+        Tests windows of frames kept after memory got full
+        """
+        frames = list(make_window_frames(self.random_episodes()))
+        memory = self.check_windows(frames, history_size=150)
+        self.assertEqual(len(memory._frames), 150)
+        self.assertLess(self.stored_rows(memory), 150 * 30 // 5)
+
+
+class MemoryContextTest(unittest.TestCase):
+    """Testing replay memory rnn context keeping"""
+
+    def setUp(self):
+        self.memory = Memory(
+            history_size=500,
+            max_sample_size=20,
+            priority_sample_size=3,
+            context_interval=10,
+        )
+        for frame in make_frames(num_episodes=10, episode_length=73):
+            self.memory.add(frame)
+
+    def test_context_kept_at_interval(self):
+        """
+        Tests only every `context_interval` frame keeps it's own context
+        """
+        kept = {id(frame['context']) for frame in self.memory._frames}
+        self.assertLess(len(kept), len(self.memory._frames) // 5)
+
+    def test_uniform_sample_context(self):
+        """
+        Tests uniform sample context belongs to sample first frame
+        """
+        np.random.seed(0)
+        for i in range(200):
+            sample = self.memory.sample_uniform(sequence_size=20)
+            first_frame = sample.get_frame(0)
+            self.assertEqual(first_frame['context'][0, 0], first_frame['position']['step'])
+
+    def test_priority_sampling_rejected(self):
+        """
+        Tests priority sampling can not be used with context interval
+        """
+        with self.assertRaises(ValueError):
+            Memory(
+                history_size=500,
+                max_sample_size=20,
+                priority_sample_size=3,
+                use_priority_sampling=True,
+                context_interval=10,
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
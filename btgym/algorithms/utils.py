@@ -220,7 +220,8 @@ def batch_pad(batch, to_size, _one_hot=False):
         to_size:    desired batch size
 
     Returns:
-        dictionary with all included np.arrays being zero-padded to size [to_size, own_depth].
+        dictionary with all included np.arrays being zero-padded to size [to_size, own_depth],
+        padding is of the same dtype as array padded.
     """
     if isinstance(batch, dict):
         padded_batch = {}
@@ -239,7 +240,7 @@ def batch_pad(batch, to_size, _one_hot=False):
         assert shape[0] < to_size, \
             'Padded batch size must be greater than initial, got: {}, {}'.format(to_size, shape[0])
 
-        pad = np.zeros((to_size - shape[0],) + shape[1:])
+        pad = np.zeros((to_size - shape[0],) + shape[1:], dtype=batch.dtype)
         if _one_hot:
             pad[:, 0, ...] = 1
         padded_batch = np.concatenate([batch, pad], axis=0)
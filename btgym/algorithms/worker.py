@@ -19,6 +19,8 @@ import tensorflow as tf
 tf.logging.set_verbosity(tf.logging.INFO) # suppress tf.train.MonitoredTrainingSession deprecation warning
 # TODO: switch to tf.train.MonitoredTrainingSession
 
+from btgym.monitor.writer import BTgymSummaryWriter
+
 
 class _FastSaver(tf.train.Saver):
     """
@@ -60,7 +62,8 @@ class Worker(multiprocessing.Process):
                  max_env_steps,
                  random_seed=None,
                  render_last_env=False,
-                 test_mode=False):
+                 test_mode=False,
+                 param_store=None):
         """
 
         Args:
@@ -76,6 +79,8 @@ class Worker(multiprocessing.Process):
             random_seed:        int or None
             render_last_env:    bool, if True - render enabled for last environment in a list; first otherwise
             test_mode:          if True - use Atari mode, BTGym otherwise.
+            param_store:        btgym.algorithms.store.SharedParamStore instance or None; if given, global
+                                weights are kept in shared memory store and no tf.server is started.
 
             Note:
                 - Conventional `self.global_step` refers to number of environment steps,
@@ -104,6 +109,10 @@ class Worker(multiprocessing.Process):
         self.test_mode = test_mode
         self.random_seed = random_seed
         self.render_last_env = render_last_env
+        self.param_store = param_store
+
+        # Set when tf.server is started and environments are made, see btgym.utils.wait_for_ready():
+        self.ready = multiprocessing.Event()
 
     def run(self):
         """Worker runtime body.
@@ -121,7 +130,7 @@ class Worker(multiprocessing.Process):
         cluster = tf.train.ClusterSpec(self.cluster_spec).as_cluster_def()
 
         # Start tf.server:
-        if self.job_name in 'ps':
+        if self.job_name in 'ps' and self.param_store is None:
             server = tf.train.Server(
                 cluster,
                 job_name=self.job_name,
@@ -129,20 +138,28 @@ class Worker(multiprocessing.Process):
                 config=tf.ConfigProto(device_filters=["/job:ps"])
             )
             self.log.debug('parameters_server started.')
+            self.ready.set()
             # Just block here:
             server.join()
 
         else:
-            server = tf.train.Server(
-                cluster,
-                job_name='worker',
-                task_index=self.task,
-                config=tf.ConfigProto(
-                    intra_op_parallelism_threads=1,  # original was: 1
-                    inter_op_parallelism_threads=2  # original was: 2
+            if self.param_store is None:
+                server = tf.train.Server(
+                    cluster,
+                    job_name='worker',
+                    task_index=self.task,
+                    config=tf.ConfigProto(
+                        intra_op_parallelism_threads=1,  # original was: 1
+                        inter_op_parallelism_threads=2  # original was: 2
+                    )
                 )
-            )
-            self.log.debug('tf.server started.')
+                target = server.target
+                self.log.debug('tf.server started.')
+
+            else:
+                # Global weights are kept in shared memory store, run in-process session:
+                target = ''
+                self.log.debug('using {} parameter store: {}'.format(self.param_store.mode, self.param_store.filename))
 
             self.log.debug('making environments:')
             # Making as many environments as many entries in env_config `port` list:
@@ -212,6 +229,10 @@ class Worker(multiprocessing.Process):
             self.log.debug('Defining trainer...')
 
             # Define trainer:
+            trainer_kwargs = self.trainer_kwargs.copy()
+            if self.param_store is not None:
+                trainer_kwargs['param_store'] = self.param_store
+
             trainer = self.trainer_class(
                 env=self.env_list,
                 task=self.task,
@@ -219,10 +240,11 @@ class Worker(multiprocessing.Process):
                 log_level=self.log_level,
                 cluster_spec=self.cluster_spec,
                 random_seed=self.random_seed,
-                **self.trainer_kwargs,
+                **trainer_kwargs,
             )
 
             self.log.debug('trainer ok.')
+            self.ready.set()
 
             # Saver-related:
             variables_to_save = [v for v in tf.global_variables() if not 'local' in v.name]
@@ -241,18 +263,30 @@ class Worker(multiprocessing.Process):
                 self.log.info("initializing all parameters.")
                 ses.run(init_all_op)
 
-            config = tf.ConfigProto(device_filters=["/job:ps", "/job:worker/task:{}/cpu:0".format(self.task)])
             logdir = os.path.join(self.log_dir, 'train')
+            if self.param_store is None:
+                config = tf.ConfigProto(device_filters=["/job:ps", "/job:worker/task:{}/cpu:0".format(self.task)])
+                is_chief = self.task == 0
+                sv_logdir = logdir
+
+            else:
+                # Every worker initializes it's own graph, chief only saves and restores global variables:
+                config = tf.ConfigProto(
+                    intra_op_parallelism_threads=1,
+                    inter_op_parallelism_threads=2
+                )
+                is_chief = True
+                sv_logdir = logdir if self.task == 0 else None
             summary_dir = logdir + "_{}".format(self.task)
 
-            summary_writer = tf.summary.FileWriter(summary_dir)
+            summary_writer = BTgymSummaryWriter(tf.summary.FileWriter(summary_dir), log_level=self.log_level)
 
             self.log.debug('before tf.train.Supervisor... ')
 
             # TODO: switch to tf.train.MonitoredTrainingSession
             sv = tf.train.Supervisor(
-                is_chief=(self.task == 0),
-                logdir=logdir,
+                is_chief=is_chief,
+                logdir=sv_logdir,
                 saver=saver,
                 summary_op=None,
                 init_op=init_op,
@@ -265,7 +299,7 @@ class Worker(multiprocessing.Process):
             )
             self.log.info("connecting to the parameter server... ")
 
-            with sv.managed_session(server.target, config=config) as sess, sess.as_default():
+            with sv.managed_session(target, config=config) as sess, sess.as_default():
                 #sess.run(trainer.sync)
                 trainer.start(sess, summary_writer)
 
@@ -283,6 +317,7 @@ class Worker(multiprocessing.Process):
                     env.close()
 
                 sv.stop()
+            summary_writer.close()
             self.log.notice('reached {} steps, exiting.'.format(global_step))
 
 
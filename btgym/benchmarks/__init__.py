@@ -0,0 +1,27 @@
+###############################################################################
+#
+# Copyright (C) 2017 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+#
+# Runnable performance benchmarks, e.g.:
+#
+#   python -m btgym.benchmarks.lstm_cells
+#   python -m btgym.benchmarks.env_step --strategies BTgymBaseStrategy --data sine --output env_step.json
+#   python -m btgym.benchmarks.trainer --trainers A3C PPO --rollout_lengths 20 40 --batch_sizes 1 4
+#   python -m btgym.benchmarks.param_store --backends ps hogwild seqlock --workers 4
+#
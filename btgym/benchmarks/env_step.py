@@ -0,0 +1,430 @@
+###############################################################################
+#
+# Copyright (C) 2017 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import os
+import time
+import json
+import argparse
+import tempfile
+import datetime
+import threading
+
+import numpy as np
+import zmq
+from gym import spaces
+
+from btgym import BTgymEnv, BTgymDataset, BTgymDataFeedServer, BTgymBaseStrategy
+from btgym.research import DevStrat_4_6, DevStrat_4_7
+from btgym.utils import clear_port, wait_for_ready
+
+
+DATA_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'examples', 'data'))
+
+DATA_FILES = {
+    'sine': os.path.join(DATA_DIR, 'test_sine_1min_period256_delta0002.csv'),
+    'eurusd': os.path.join(DATA_DIR, 'DAT_ASCII_EURUSD_M1_201703.csv'),
+    'synthetic': None,  # generated on demand, see make_synthetic_csv()
+}
+
+# Strategy state keys time-embedded over `avg_period` steps, other Box spaces are embedded over `time_dim`:
+AVG_PERIOD_KEYS = ('internal', 'action', 'reward')
+
+STRATEGY_CLASSES = {
+    'BTgymBaseStrategy': BTgymBaseStrategy,
+    'DevStrat_4_6': DevStrat_4_6,
+    'DevStrat_4_7': DevStrat_4_7,
+}
+
+
+def make_synthetic_csv(filename=None, num_days=30, period=256, amplitude=0.01, noise=0.0005, start=None, seed=0):
+    """
+    Writes 1 minute OHLCV sine-with-noise price series in the same format as bundled `examples/data` files.
+
+    Args:
+        filename:   str, file to write to, temporary file if None
+        num_days:   int, series duration in days
+        period:     int, sine period in minutes
+        amplitude:  float, sine amplitude
+        noise:      float, gaussian noise std.
+        start:      datetime, first record time, def. 2017-01-01 00:00
+        seed:       int, random seed
+
+    Returns:
+        file name
+    """
+    if filename is None:
+        fd, filename = tempfile.mkstemp(prefix='btgym_synthetic_', suffix='.csv')
+        os.close(fd)
+
+    if start is None:
+        start = datetime.datetime(2017, 1, 1)
+
+    rng = np.random.RandomState(seed)
+    num_records = num_days * 24 * 60
+    close = 1.1 + amplitude * np.sin(2 * np.pi * np.arange(num_records) / period) + \
+        noise * rng.standard_normal(num_records)
+    open_ = np.concatenate([close[:1], close[:-1]])
+    spread = np.abs(noise * rng.standard_normal(num_records))
+    high = np.maximum(open_, close) + spread
+    low = np.minimum(open_, close) - spread
+
+    with open(filename, 'w') as f:
+        f.write('1_O;2_H;3_L;4_C;5_V\n')
+        for i in range(num_records):
+            f.write(
+                '{};{};{};{};{};0.0\n'.format(
+                    (start + datetime.timedelta(minutes=i)).strftime('%Y%m%d %H%M%S'),
+                    open_[i],
+                    high[i],
+                    low[i],
+                    close[i],
+                )
+            )
+    return filename
+
+
+def make_strategy(strategy_class, time_dim=None):
+    """
+    Rescales strategy time embedding dimension.
+
+    Strategy classes keep `time_dim` and `avg_period` as class attributes baked into default `state_shape`;
+    makes subclass with those overridden and `state_shape` with time dimension of every Box space rescaled:
+    spaces listed in AVG_PERIOD_KEYS are rescaled to new `avg_period`, others to new `time_dim`, if
+    embedded over class default one.
+
+    Args:
+        strategy_class:     BTgymBaseStrategy subclass
+        time_dim:           int, new time embedding dimension or None for class default
+
+    Returns:
+        strategy class, dictionary of strategy kwargs
+    """
+    if time_dim is None or time_dim == strategy_class.time_dim:
+        return strategy_class, {}
+
+    avg_period = min(strategy_class.avg_period, time_dim)
+
+    state_shape = {}
+    for key, space in dict(strategy_class.params._gettuple())['state_shape'].items():
+        if key in AVG_PERIOD_KEYS:
+            old_dim, new_dim = strategy_class.avg_period, avg_period
+
+        else:
+            old_dim, new_dim = strategy_class.time_dim, time_dim
+
+        if isinstance(space, spaces.Box) and len(space.shape) > 0 and space.shape[0] == old_dim:
+            space = spaces.Box(
+                low=np.min(space.low),
+                high=np.max(space.high),
+                shape=(new_dim,) + space.shape[1:],
+                dtype=space.dtype,
+            )
+        state_shape[key] = space
+
+    new_class = type(
+        '{}_t{}'.format(strategy_class.__name__, time_dim),
+        (strategy_class,),
+        dict(time_dim=time_dim, avg_period=avg_period)
+    )
+    return new_class, dict(state_shape=state_shape)
+
+
+def benchmark_env(
+        strategy_class,
+        filename,
+        skip_frame=1,
+        time_dim=None,
+        num_envs=1,
+        num_steps=1000,
+        num_resets=5,
+        port=5000,
+        data_port=4999,
+        delta_observations=False,
+):
+    """
+    Measures `BTgymEnv` reset latency and steps/sec. for given configuration.
+
+    Environments share single data server (first one is data_master, as it is configured by Launcher) and are
+    stepped concurrently with random actions, each from its own thread.
+
+    Args:
+        strategy_class:     BTgymBaseStrategy subclass
+        filename:           str, CSV data file
+        skip_frame:         int, environment skip frame
+        time_dim:           int, strategy time embedding dimension or None for class default
+        num_envs:           int, number of concurrently stepped environments
+        num_steps:          int, number of timed steps per environment
+        num_resets:         int, number of timed resets per environment
+        port:               int, first environment port, others take consecutive ones
+        data_port:          int, data server port
+        delta_observations: bool, enable environment observations delta encoding
+
+    Returns:
+        dictionary of reset latency and steps rate statistics
+    """
+    strategy_class, strategy_kwargs = make_strategy(strategy_class, time_dim)
+
+    envs = []
+    try:
+        for i in range(num_envs):
+            envs.append(
+                BTgymEnv(
+                    dataset=BTgymDataset(filename=filename),
+                    strategy=strategy_class,
+                    skip_frame=skip_frame,
+                    port=port + i,
+                    data_port=data_port,
+                    data_master=i == 0,
+                    task=i,
+                    render_enabled=False,
+                    delta_observations=delta_observations,
+                    verbose=0,
+                    **strategy_kwargs
+                )
+            )
+        reset_timing = []
+        for env in envs:
+            for _ in range(num_resets):
+                start = time.time()
+                env.reset()
+                reset_timing.append(time.time() - start)
+
+        steps_done = np.zeros(num_envs, dtype=np.int64)
+        episodes_done = np.zeros(num_envs, dtype=np.int64)
+
+        def step_loop(i):
+            env = envs[i]
+            for _ in range(num_steps):
+                o, r, done, info = env.step(env.action_space.sample())
+                steps_done[i] += 1
+                if done:
+                    env.reset()
+                    episodes_done[i] += 1
+
+        threads = [threading.Thread(target=step_loop, args=(i,)) for i in range(num_envs)]
+        start = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        run_time = time.time() - start
+
+    finally:
+        # Data master goes last, others are still connected to its data server:
+        for env in reversed(envs):
+            env.close()
+
+    reset_timing = np.asarray(reset_timing) * 1e3
+    return {
+        'reset': {'mean_ms': float(reset_timing.mean()), 'std_ms': float(reset_timing.std())},
+        'steps_per_sec': float(steps_done.sum() / run_time),
+        'steps_per_sec_per_env': float(steps_done.sum() / run_time / num_envs),
+        'episodes': int(episodes_done.sum()),
+    }
+
+
+def benchmark_data_server(filename, num_clients=1, num_requests=100, data_port=4999, timeout=60):
+    """
+    Measures data server `_get_data` request latency under concurrent clients load.
+
+    Args:
+        filename:       str, CSV data file
+        num_clients:    int, number of concurrent REQ clients, each from its own thread
+        num_requests:   int, number of timed requests per client
+        data_port:      int, data server port
+        timeout:        int, data server startup timeout in seconds
+
+    Returns:
+        dictionary of mean, std. and 90th percentile latencies in milliseconds and total requests rate
+    """
+    network_address = 'tcp://127.0.0.1:{}'.format(data_port)
+    clear_port(data_port)
+
+    data_server = BTgymDataFeedServer(dataset=BTgymDataset(filename=filename), network_address=network_address)
+    data_server.daemon = False
+    data_server.start()
+    wait_for_ready(data_server, timeout)
+
+    context = zmq.Context()
+    try:
+        socket = context.socket(zmq.REQ)
+        socket.connect(network_address)
+        socket.send_pyobj({'ctrl': '_reset_data', 'kwargs': {}})
+        socket.recv_pyobj()
+
+        timing = [[] for _ in range(num_clients)]
+
+        def request_loop(i):
+            client = context.socket(zmq.REQ)
+            client.connect(network_address)
+            for _ in range(num_requests):
+                start = time.time()
+                client.send_pyobj({'ctrl': '_get_data', 'kwargs': {'get_new': True, 'timestamp': None}})
+                client.recv_pyobj()
+                timing[i].append(time.time() - start)
+            client.close()
+
+        threads = [threading.Thread(target=request_loop, args=(i,)) for i in range(num_clients)]
+        start = time.time()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        run_time = time.time() - start
+
+        socket.send_pyobj({'ctrl': '_stop'})
+        socket.recv_pyobj()
+        socket.close()
+
+    finally:
+        context.destroy()
+        data_server.join(timeout)
+        if data_server.is_alive():
+            data_server.terminate()
+
+    timing = np.concatenate(timing) * 1e3
+    return {
+        'mean_ms': float(timing.mean()),
+        'std_ms': float(timing.std()),
+        'p90_ms': float(np.percentile(timing, 90)),
+        'requests_per_sec': float(timing.size / run_time),
+    }
+
+
+def run(
+        data_names=None,
+        strategy_names=None,
+        skip_frames=(1, 10),
+        time_dims=(None,),
+        num_envs=(1, 4),
+        num_clients=(1, 4, 16),
+        output_filename=None,
+        **kwargs
+):
+    """
+    Runs environment benchmark for every combination of given parameters and data server benchmark for every
+    given data file and number of clients.
+
+    Args:
+        data_names:         iterable of keys of `DATA_FILES`, all if None
+        strategy_names:     iterable of keys of `STRATEGY_CLASSES`, all if None
+        skip_frames:        iterable of skip frame values
+        time_dims:          iterable of time embedding dimensions, None stands for strategy default
+        num_envs:           iterable of number of concurrent environments
+        num_clients:        iterable of number of concurrent data server clients
+        output_filename:    str, if given - write results to json file
+        **kwargs:           passed to benchmark_env()
+
+    Returns:
+        dictionary of results
+    """
+    if data_names is None:
+        data_names = list(DATA_FILES.keys())
+
+    if strategy_names is None:
+        strategy_names = list(STRATEGY_CLASSES.keys())
+
+    synthetic_filename = None
+    results = {'env': [], 'data_server': []}
+    try:
+        for data_name in data_names:
+            filename = DATA_FILES[data_name]
+            if filename is None:
+                filename = synthetic_filename = make_synthetic_csv()
+
+            for clients in num_clients:
+                result = benchmark_data_server(filename, num_clients=clients)
+                results['data_server'].append(dict(data=data_name, num_clients=clients, **result))
+                print(
+                    '{:<10} clients: {:3d}  get_data: {:8.3f} ms, {:8.1f} req/sec'.format(
+                        data_name, clients, result['mean_ms'], result['requests_per_sec']
+                    )
+                )
+
+            for strategy_name in strategy_names:
+                for skip_frame in skip_frames:
+                    for time_dim in time_dims:
+                        for envs in num_envs:
+                            result = benchmark_env(
+                                STRATEGY_CLASSES[strategy_name],
+                                filename,
+                                skip_frame=skip_frame,
+                                time_dim=time_dim,
+                                num_envs=envs,
+                                **kwargs
+                            )
+                            results['env'].append(
+                                dict(
+                                    data=data_name,
+                                    strategy=strategy_name,
+                                    skip_frame=skip_frame,
+                                    time_dim=time_dim,
+                                    num_envs=envs,
+                                    **result
+                                )
+                            )
+                            print(
+                                '{:<10} {:<18} skip_frame: {:3d} time_dim: {:>4} envs: {:3d}  '
+                                'reset: {:8.3f} ms, {:8.1f} steps/sec'.format(
+                                    data_name,
+                                    strategy_name,
+                                    skip_frame,
+                                    str(time_dim),
+                                    envs,
+                                    result['reset']['mean_ms'],
+                                    result['steps_per_sec'],
+                                )
+                            )
+    finally:
+        if synthetic_filename is not None:
+            os.remove(synthetic_filename)
+
+    if output_filename is not None:
+        with open(output_filename, 'w') as f:
+            json.dump(results, f, indent=4)
+
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='BTgymEnv steps rate and data server latency benchmark.')
+    parser.add_argument('--data', nargs='+', default=None, choices=list(DATA_FILES.keys()))
+    parser.add_argument('--strategies', nargs='+', default=None, choices=list(STRATEGY_CLASSES.keys()))
+    parser.add_argument('--skip_frames', nargs='+', type=int, default=[1, 10])
+    parser.add_argument('--time_dims', nargs='+', type=int, default=None)
+    parser.add_argument('--envs', nargs='+', type=int, default=[1, 4])
+    parser.add_argument('--clients', nargs='+', type=int, default=[1, 4, 16])
+    parser.add_argument('--steps', type=int, default=1000)
+    parser.add_argument('--resets', type=int, default=5)
+    parser.add_argument('--delta_observations', action='store_true')
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    run(
+        data_names=args.data,
+        strategy_names=args.strategies,
+        skip_frames=args.skip_frames,
+        time_dims=(None,) if args.time_dims is None else args.time_dims,
+        num_envs=args.envs,
+        num_clients=args.clients,
+        output_filename=args.output,
+        num_steps=args.steps,
+        num_resets=args.resets,
+        delta_observations=args.delta_observations,
+    )
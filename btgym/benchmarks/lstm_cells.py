@@ -0,0 +1,179 @@
+###############################################################################
+#
+# Copyright (C) 2017 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import time
+import json
+import argparse
+
+import numpy as np
+import tensorflow as tf
+import tensorflow.contrib.rnn as rnn
+
+from btgym.algorithms.nn.networks import lstm_network
+from btgym.algorithms.utils import feed_dict_rnn_context
+
+
+LSTM_CLASSES = {
+    'BasicLSTMCell': rnn.BasicLSTMCell,
+    'LayerNormBasicLSTMCell': rnn.LayerNormBasicLSTMCell,
+    'LSTMBlockCell': rnn.LSTMBlockCell,
+    'LSTMBlockFusedCell': rnn.LSTMBlockFusedCell,
+}
+
+
+def benchmark_lstm_class(
+        lstm_class,
+        lstm_layers=(256, 256),
+        input_size=128,
+        batch_size=4,
+        time_length=20,
+        num_iterations=100,
+        num_warmup=10,
+        intra_op_threads=1,
+):
+    """
+    Measures train step and single step inference latency for `lstm_network` built with given LSTM class
+    under CPU-only single-thread session, as it is configured for workers.
+
+    Args:
+        lstm_class:         LSTM cell class reference
+        lstm_layers:        tuple of LSTM layers sizes
+        input_size:         int, input features depth
+        batch_size:         int, train batch size in number of trajectories
+        time_length:        int, train trajectory length
+        num_iterations:     int, number of timed runs
+        num_warmup:         int, number of runs to discard
+        intra_op_threads:   int, session intra op. parallelism
+
+    Returns:
+        dictionary of mean and std. latencies in milliseconds
+    """
+    graph = tf.Graph()
+    with graph.as_default():
+        x_pl = tf.placeholder(tf.float32, [None, None, input_size], name='x_in')
+        time_length_pl = tf.placeholder(tf.int32, name='sequence_size')
+
+        x_out, init_state, state_out, state_pl_flatten = lstm_network(
+            x=x_pl,
+            lstm_sequence_length=time_length_pl,
+            lstm_class=lstm_class,
+            lstm_layers=lstm_layers,
+        )
+        loss = tf.reduce_mean(tf.square(x_out))
+        train_op = tf.train.AdamOptimizer(1e-4).minimize(loss)
+
+        config = tf.ConfigProto(
+            device_count={'GPU': 0},
+            intra_op_parallelism_threads=intra_op_threads,
+            inter_op_parallelism_threads=1,
+        )
+        with tf.Session(config=config) as sess:
+            sess.run(tf.global_variables_initializer())
+            zero_state = sess.run(init_state)
+
+            # Train step feeds batch of trajectories along with batch of initial states:
+            train_state = tuple(
+                [
+                    rnn.LSTMStateTuple(*[np.repeat(value, batch_size, axis=0) for value in layer_state])
+                    for layer_state in zero_state
+                ]
+            )
+            train_feeder = feed_dict_rnn_context(state_pl_flatten, train_state)
+            train_feeder.update(
+                {
+                    x_pl: np.random.randn(batch_size, time_length, input_size),
+                    time_length_pl: np.ones(batch_size) * time_length,
+                }
+            )
+            # Act step feeds single observation and context:
+            act_feeder = feed_dict_rnn_context(state_pl_flatten, zero_state)
+            act_feeder.update(
+                {
+                    x_pl: np.random.randn(1, 1, input_size),
+                    time_length_pl: 1,
+                }
+            )
+            result = {}
+            for key, fetches, feeder in [
+                ('train_step', train_op, train_feeder),
+                ('act_step', [x_out, state_out], act_feeder),
+            ]:
+                timing = []
+                for i in range(num_warmup + num_iterations):
+                    start = time.time()
+                    sess.run(fetches, feeder)
+                    timing.append(time.time() - start)
+
+                timing = np.asarray(timing[num_warmup:]) * 1e3
+                result[key] = {'mean_ms': float(timing.mean()), 'std_ms': float(timing.std())}
+
+    return result
+
+
+def run(lstm_class_names=None, output_filename=None, **kwargs):
+    """
+    Runs benchmark for every given LSTM class.
+
+    Args:
+        lstm_class_names:   iterable of keys of `LSTM_CLASSES`, all if None
+        output_filename:    str, if given - write results to json file
+        **kwargs:           passed to benchmark_lstm_class()
+
+    Returns:
+        dictionary of results
+    """
+    if lstm_class_names is None:
+        lstm_class_names = list(LSTM_CLASSES.keys())
+
+    results = {}
+    for name in lstm_class_names:
+        results[name] = benchmark_lstm_class(LSTM_CLASSES[name], **kwargs)
+        print(
+            '{:<24} train step: {:8.3f} ms, act step: {:8.3f} ms'.format(
+                name,
+                results[name]['train_step']['mean_ms'],
+                results[name]['act_step']['mean_ms'],
+            )
+        )
+
+    if output_filename is not None:
+        with open(output_filename, 'w') as f:
+            json.dump(results, f, indent=4)
+
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='LSTM cell classes train/act latency benchmark.')
+    parser.add_argument('--cells', nargs='+', default=None, choices=list(LSTM_CLASSES.keys()))
+    parser.add_argument('--layers', nargs='+', type=int, default=[256, 256])
+    parser.add_argument('--batch_size', type=int, default=4)
+    parser.add_argument('--time_length', type=int, default=20)
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    run(
+        lstm_class_names=args.cells,
+        output_filename=args.output,
+        lstm_layers=tuple(args.layers),
+        batch_size=args.batch_size,
+        time_length=args.time_length,
+        num_iterations=args.iterations,
+    )
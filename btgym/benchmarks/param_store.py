@@ -0,0 +1,261 @@
+###############################################################################
+#
+# Copyright (C) 2017 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import time
+import json
+import argparse
+import multiprocessing
+
+import numpy as np
+import tensorflow as tf
+
+from btgym.algorithms.store import SharedParamStore
+
+
+PARAM_SHAPES = ((1024, 1024), (1024,), (1024, 256), (256,), (256, 32), (32,))
+
+
+def _timing_stats(timing):
+    timing = np.asarray(timing) * 1e3
+    return {'mean_ms': float(timing.mean()), 'std_ms': float(timing.std())}
+
+
+def _store_worker(store, shapes, num_iterations, num_warmup, queue):
+    store.attach(shapes)
+    pull_timing = []
+    push_timing = []
+    for i in range(num_warmup + num_iterations):
+        start = time.time()
+        values = store.pull()
+        pull_timing.append(time.time() - start)
+
+        values = [value + 1e-6 for value in values]
+
+        start = time.time()
+        store.push(*values)
+        push_timing.append(time.time() - start)
+
+    queue.put((pull_timing[num_warmup:], push_timing[num_warmup:]))
+
+
+def _ps_server(cluster_spec):
+    server = tf.train.Server(
+        tf.train.ClusterSpec(cluster_spec).as_cluster_def(),
+        job_name='ps',
+        task_index=0,
+        config=tf.ConfigProto(device_filters=["/job:ps"])
+    )
+    server.join()
+
+
+def _ps_worker(cluster_spec, task, shapes, num_iterations, num_warmup, queue):
+    server = tf.train.Server(
+        tf.train.ClusterSpec(cluster_spec).as_cluster_def(),
+        job_name='worker',
+        task_index=task,
+        config=tf.ConfigProto(intra_op_parallelism_threads=1, inter_op_parallelism_threads=2)
+    )
+    worker_device = "/job:worker/task:{}/cpu:0".format(task)
+    with tf.device(tf.train.replica_device_setter(1, worker_device=worker_device)):
+        global_vars = [
+            tf.get_variable('global_{}'.format(i), shape, tf.float32, tf.zeros_initializer())
+            for i, shape in enumerate(shapes)
+        ]
+    with tf.device(worker_device):
+        local_vars = [
+            tf.get_variable(
+                'local_{}'.format(i),
+                shape,
+                tf.float32,
+                tf.zeros_initializer(),
+                collections=[tf.GraphKeys.LOCAL_VARIABLES]
+            )
+            for i, shape in enumerate(shapes)
+        ]
+        # Same as trainer does: copy global weights to local, apply update to global:
+        pull_op = tf.group(*[v1.assign(v2) for v1, v2 in zip(local_vars, global_vars)])
+        push_op = tf.group(*[v.assign_add(tf.fill(v.get_shape(), 1e-6)) for v in global_vars])
+
+    config = tf.ConfigProto(device_filters=["/job:ps", worker_device])
+    with tf.Session(server.target, config=config) as sess:
+        sess.run(tf.local_variables_initializer())
+        if task == 0:
+            sess.run(tf.variables_initializer(global_vars))
+
+        while len(sess.run(tf.report_uninitialized_variables(global_vars))) > 0:
+            time.sleep(0.1)
+
+        pull_timing = []
+        push_timing = []
+        for i in range(num_warmup + num_iterations):
+            start = time.time()
+            sess.run(pull_op)
+            pull_timing.append(time.time() - start)
+
+            start = time.time()
+            sess.run(push_op)
+            push_timing.append(time.time() - start)
+
+    queue.put((pull_timing[num_warmup:], push_timing[num_warmup:]))
+
+
+def _collect(processes, queue, num_cycles, start):
+    results = [queue.get() for _ in processes]
+    elapsed = time.time() - start
+    for p in processes:
+        p.join()
+
+    return {
+        'pull': _timing_stats([t for pull_timing, _ in results for t in pull_timing]),
+        'push': _timing_stats([t for _, push_timing in results for t in push_timing]),
+        'updates_per_sec': len(processes) * num_cycles / elapsed,
+    }
+
+
+def benchmark_store(mode, shapes=PARAM_SHAPES, num_workers=4, num_iterations=200, num_warmup=10):
+    """
+    Measures weights pull and update push latency and overall update rate for
+    shared memory parameter store with given number of concurrent worker processes.
+
+    Args:
+        mode:               str, parameter store mode: `hogwild` or `seqlock`
+        shapes:             iterable of weights shapes
+        num_workers:        int, number of concurrent processes
+        num_iterations:     int, number of timed pull/push cycles per process
+        num_warmup:         int, number of cycles to discard
+
+    Returns:
+        dictionary of mean and std. latencies in milliseconds and updates per second
+    """
+    store = SharedParamStore(mode=mode)
+    store.create([np.zeros(shape, dtype=np.float32) for shape in shapes])
+    queue = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=_store_worker,
+            args=(store, shapes, num_iterations, num_warmup, queue)
+        )
+        for _ in range(num_workers)
+    ]
+    start = time.time()
+    for p in processes:
+        p.start()
+
+    try:
+        return _collect(processes, queue, num_iterations + num_warmup, start)
+
+    finally:
+        store.close()
+
+
+def benchmark_ps(shapes=PARAM_SHAPES, num_workers=4, num_iterations=200, num_warmup=10, host='127.0.0.1', port=12222):
+    """
+    Same as benchmark_store() for in-graph global weights placed on local tf parameter server.
+
+    Args:
+        shapes:             iterable of weights shapes
+        num_workers:        int, number of concurrent worker processes
+        num_iterations:     int, number of timed pull/push cycles per process
+        num_warmup:         int, number of cycles to discard
+        host:               str, cluster host
+        port:               int, parameter server port, workers take consecutive ones
+
+    Returns:
+        dictionary of mean and std. latencies in milliseconds and updates per second
+    """
+    cluster_spec = {
+        'ps': ['{}:{}'.format(host, port)],
+        'worker': ['{}:{}'.format(host, port + 1 + i) for i in range(num_workers)],
+    }
+    ps = multiprocessing.Process(target=_ps_server, args=(cluster_spec,))
+    ps.daemon = True
+    ps.start()
+
+    queue = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(
+            target=_ps_worker,
+            args=(cluster_spec, task, shapes, num_iterations, num_warmup, queue)
+        )
+        for task in range(num_workers)
+    ]
+    start = time.time()
+    for p in processes:
+        p.start()
+
+    try:
+        return _collect(processes, queue, num_iterations + num_warmup, start)
+
+    finally:
+        ps.terminate()
+
+
+def run(backends=None, output_filename=None, **kwargs):
+    """
+    Runs benchmark for every given parameters sync. backend.
+
+    Args:
+        backends:           iterable of `ps`, `hogwild`, `seqlock`; all if None
+        output_filename:    str, if given - write results to json file
+        **kwargs:           passed to benchmark_store() and benchmark_ps()
+
+    Returns:
+        dictionary of results
+    """
+    if backends is None:
+        backends = ['ps'] + list(SharedParamStore.modes)
+
+    results = {}
+    for name in backends:
+        if name == 'ps':
+            results[name] = benchmark_ps(**kwargs)
+
+        else:
+            results[name] = benchmark_store(name, **kwargs)
+
+        print(
+            '{:<8} pull: {:8.3f} ms, push: {:8.3f} ms, updates/sec: {:10.1f}'.format(
+                name,
+                results[name]['pull']['mean_ms'],
+                results[name]['push']['mean_ms'],
+                results[name]['updates_per_sec'],
+            )
+        )
+
+    if output_filename is not None:
+        with open(output_filename, 'w') as f:
+            json.dump(results, f, indent=4)
+
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Parameter server vs. shared memory store sync benchmark.')
+    parser.add_argument('--backends', nargs='+', default=None, choices=['ps'] + list(SharedParamStore.modes))
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    run(
+        backends=args.backends,
+        output_filename=args.output,
+        num_workers=args.workers,
+        num_iterations=args.iterations,
+    )
@@ -0,0 +1,468 @@
+###############################################################################
+#
+# Copyright (C) 2017 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import time
+import json
+import argparse
+
+import numpy as np
+import tensorflow as tf
+from gym import spaces
+from logbook import WARNING
+
+from btgym.spaces import DictSpace
+from btgym.algorithms import A3C, Unreal, PPO
+from btgym.algorithms.policy import StackedLstmPolicy
+from btgym.algorithms.rollout import Rollout
+from btgym.algorithms.memory import Memory
+from btgym.algorithms.utils import batch_stack
+
+
+TRAINER_CONFIGS = {
+    'A3C': (A3C, {}),
+    'Unreal': (
+        Unreal,
+        dict(
+            use_off_policy_aac=True,
+            use_reward_prediction=True,
+            use_pixel_control=True,
+            use_value_replay=False,
+        )
+    ),
+    'PPO': (PPO, {}),
+}
+
+# Train iteration stages being timed, in order of execution:
+TRAINER_STAGES = (
+    'rollout_add',
+    'memory_add',
+    'memory_sample_uniform',
+    'memory_sample_priority',
+    'rollout_process',
+    'batch_stack',
+    'main_feeder',
+    'train_op',
+)
+
+
+def make_state_shape(time_dim=30, avg_period=None):
+    """
+    Observation space resembling `DevStrat_4_6` one.
+
+    Args:
+        time_dim:       int, time embedding dimension of `external` state
+        avg_period:     int, time dimension of `internal` state, equals `time_dim` if None
+
+    Returns:
+        dictionary of gym spaces
+    """
+    if avg_period is None:
+        avg_period = time_dim
+
+    return {
+        'external': spaces.Box(low=-1, high=1, shape=(time_dim, 1, 3), dtype=np.float32),
+        'internal': spaces.Box(low=-2, high=2, shape=(avg_period, 1, 5), dtype=np.float32),
+        'metadata': DictSpace(
+            {
+                key: spaces.Box(shape=(), low=0, high=1, dtype=np.uint32)
+                for key in ['type', 'trial_num', 'trial_type', 'sample_num', 'first_row']
+            }
+        ),
+    }
+
+
+class FakeEnv(object):
+    """
+    Environment plug emitting random observations of given `DictSpace` shape and sparse random rewards,
+    stands for BTgymEnv when only learning pipeline costs are of interest.
+    """
+
+    def __init__(self, state_shape=None, num_actions=4, episode_length=1000, reward_prob=0.2, seed=None):
+        """
+
+        Args:
+            state_shape:        dictionary of gym spaces, see make_state_shape()
+            num_actions:        int, discrete action space size
+            episode_length:     int, number of steps to episode end
+            reward_prob:        float, probability of non-zero reward
+            seed:               int or None
+        """
+        if state_shape is None:
+            state_shape = make_state_shape()
+
+        self.observation_space = DictSpace(state_shape)
+        self.action_space = spaces.Discrete(num_actions)
+        self.render_modes = []
+        self.episode_length = episode_length
+        self.reward_prob = reward_prob
+        self.rng = np.random.RandomState(seed)
+        self.step_count = 0
+
+    def _sample(self, space):
+        if isinstance(space, spaces.Dict):
+            return {key: self._sample(subspace) for key, subspace in space.spaces.items()}
+
+        elif space.shape == ():
+            # Metadata: always train episode
+            return np.zeros((), dtype=space.dtype)
+
+        else:
+            return self.rng.uniform(space.low, space.high).astype(space.dtype)
+
+    def reset(self, **kwargs):
+        self.step_count = 0
+        return self._sample(self.observation_space)
+
+    def step(self, action):
+        self.step_count += 1
+        if self.rng.uniform() < self.reward_prob:
+            reward = self.rng.normal()
+
+        else:
+            reward = 0.0
+
+        return self._sample(self.observation_space), reward, self.step_count >= self.episode_length, [{}]
+
+    def get_stat(self):
+        return {}
+
+    def close(self):
+        pass
+
+
+class _ExperienceSource(object):
+    """
+    Collects experiences from environment by running policy, the same way BaseEnvRunnerFn does,
+    with no summaries or memory involved.
+    """
+
+    def __init__(self, env, policy):
+        self.env = env
+        self.policy = policy
+        self.episode = 0
+        self.step = 0
+        self.context = None
+        self._reset()
+
+    def _reset(self):
+        self.state = self.env.reset()
+        self.context = self.policy.get_initial_features(state=self.state, context=self.context)
+        action = np.zeros(self.env.action_space.n)
+        action[0] = 1
+        self.action_reward = np.concatenate([action, np.asarray([0.0])], axis=-1)
+        self.step = 0
+
+    def get_experiences(self, rollout_length):
+        """
+        Returns:
+            list of no more than `rollout_length` experiences, shorter one if episode ended.
+        """
+        experiences = []
+        states = []
+        terminal = False
+        for _ in range(rollout_length):
+            action, _, value_, context = self.policy.act(self.state, self.context, self.action_reward)
+            state, reward, terminal, info = self.env.step(action.argmax())
+            experience = {
+                'position': {'episode': self.episode, 'step': self.step},
+                'state': self.state,
+                'action': action,
+                'reward': reward,
+                'value': value_,
+                'terminal': terminal,
+                'context': self.context,
+                'last_action_reward': self.action_reward,
+            }
+            for key, callback in self.policy.callback.items():
+                experience[key] = callback(state=state, last_state=self.state)
+
+            # Bootstrap to complete previous experience:
+            if len(experiences) > 0:
+                experiences[-1]['r'] = value_
+
+            experiences.append(experience)
+            states.append(state)
+
+            self.step += 1
+            self.state = state
+            self.context = context
+            self.action_reward = np.concatenate([action, np.asarray([reward])], axis=-1)
+
+            if terminal:
+                break
+
+        if terminal:
+            experiences[-1]['r'] = np.asarray([0.0])
+            self.episode += 1
+            self._reset()
+
+        else:
+            experiences[-1]['r'] = np.asarray(
+                [self.policy.get_value(self.state, self.context, self.action_reward)]
+            )
+
+        if len(self.policy.batch_callback) > 0:
+            for key, callback in self.policy.batch_callback.items():
+                values = callback(states=[experience['state'] for experience in experiences], next_states=states)
+                for experience, callback_value in zip(experiences, values):
+                    experience[key] = callback_value
+
+        return experiences
+
+
+def benchmark_trainer(
+        trainer_class,
+        trainer_kwargs=None,
+        rollout_length=20,
+        batch_size=4,
+        time_dim=30,
+        lstm_layers=(256, 256),
+        replay_memory_size=500,
+        num_iterations=50,
+        num_warmup=5,
+        intra_op_threads=1,
+):
+    """
+    Measures every stage of single train iteration for `trainer_class` with `StackedLstmPolicy`, fed by
+    `FakeEnv` instances. Runs offline in CPU-only local session: no Launcher, runner threads or parameter servers;
+    device placement made for distributed setup is dropped.
+
+    Args:
+        trainer_class:      BaseAAC subclass
+        trainer_kwargs:     dict, additional trainer kwargs
+        rollout_length:     int, on-policy rollout length
+        batch_size:         int, number of environments, i.e. rollouts per train batch
+        time_dim:           int, observation time embedding dimension
+        lstm_layers:        tuple of LSTM layers sizes
+        replay_memory_size: int, replay memory size per environment
+        num_iterations:     int, number of timed train iterations
+        num_warmup:         int, number of iterations to discard
+        intra_op_threads:   int, session intra op. parallelism
+
+    Returns:
+        dictionary of mean and std. latencies in milliseconds per train iteration for every stage performed
+    """
+    if trainer_kwargs is None:
+        trainer_kwargs = {}
+
+    graph = tf.Graph()
+    with graph.as_default():
+        envs = [
+            FakeEnv(state_shape=make_state_shape(time_dim), episode_length=10 * rollout_length, seed=i)
+            for i in range(batch_size)
+        ]
+        trainer = trainer_class(
+            env=envs,
+            task=0,
+            policy_config=dict(
+                class_ref=StackedLstmPolicy,
+                kwargs=dict(lstm_layers=lstm_layers),
+            ),
+            log_level=WARNING,
+            rollout_length=rollout_length,
+            replay_memory_size=replay_memory_size,
+            worker_device='/cpu:0',
+            **trainer_kwargs
+        )
+
+        config = tf.ConfigProto(
+            device_count={'GPU': 0},
+            intra_op_parallelism_threads=intra_op_threads,
+            inter_op_parallelism_threads=1,
+        )
+        with tf.Session(config=config) as sess, sess.as_default():
+            sess.run(tf.global_variables_initializer())
+
+            pi = trainer.local_network
+            pi_prime = trainer.local_network_prime if trainer.use_target_policy else None
+
+            sources = [_ExperienceSource(env, pi) for env in envs]
+
+            if trainer.use_memory:
+                memories = [
+                    Memory(
+                        history_size=trainer.replay_memory_size,
+                        max_sample_size=trainer.replay_rollout_length,
+                        priority_sample_size=trainer.rp_sequence_size,
+                        reward_threshold=trainer.rp_reward_threshold,
+                        use_priority_sampling=trainer.use_reward_prediction,
+                        window_keys=trainer.replay_window_keys,
+                        context_interval=trainer.replay_context_interval,
+                        log_level=WARNING,
+                    ) for _ in envs
+                ]
+                # Sampling requires memory being full:
+                for source, memory in zip(sources, memories):
+                    while not memory.is_full():
+                        for experience in source.get_experiences(rollout_length):
+                            memory.add(experience)
+            else:
+                memories = [None for _ in envs]
+
+            timing = {key: [] for key in TRAINER_STAGES}
+            for i in range(num_warmup + num_iterations):
+                iteration_timing = {key: 0.0 for key in TRAINER_STAGES}
+
+                on_policy = []
+                off_policy = []
+                off_policy_rp = []
+                for source, memory in zip(sources, memories):
+                    experiences = source.get_experiences(rollout_length)
+
+                    start = time.time()
+                    rollout = Rollout()
+                    for experience in experiences:
+                        rollout.add(experience)
+                    iteration_timing['rollout_add'] += time.time() - start
+                    on_policy.append(rollout)
+
+                    if memory is not None:
+                        start = time.time()
+                        for experience in experiences:
+                            memory.add(experience)
+                        iteration_timing['memory_add'] += time.time() - start
+
+                        start = time.time()
+                        off_policy.append(memory.sample_uniform(sequence_size=rollout_length))
+                        iteration_timing['memory_sample_uniform'] += time.time() - start
+
+                        if trainer.use_reward_prediction:
+                            start = time.time()
+                            off_policy_rp.append(memory.sample_priority(exact_size=True))
+                            iteration_timing['memory_sample_priority'] += time.time() - start
+
+                start = time.time()
+                on_policy = [
+                    r.process(
+                        gamma=trainer.model_gamma,
+                        gae_lambda=trainer.model_gae_lambda,
+                        size=rollout_length,
+                        time_flat=trainer.time_flat,
+                    ) for r in on_policy
+                ]
+                off_policy = [
+                    r.process(
+                        gamma=trainer.model_gamma,
+                        gae_lambda=trainer.model_gae_lambda,
+                        size=rollout_length,
+                        time_flat=trainer.time_flat,
+                    ) for r in off_policy
+                ]
+                off_policy_rp = [rp.process_rp(trainer.rp_reward_threshold) for rp in off_policy_rp]
+                iteration_timing['rollout_process'] = time.time() - start
+
+                start = time.time()
+                on_policy_batch = batch_stack(on_policy)
+                off_policy_batch = batch_stack(off_policy) if len(off_policy) > 0 else None
+                rp_batch = batch_stack(off_policy_rp) if len(off_policy_rp) > 0 else None
+                iteration_timing['batch_stack'] = time.time() - start
+
+                start = time.time()
+                feed_dict = trainer._get_main_feeder(
+                    sess,
+                    on_policy_batch,
+                    off_policy_batch,
+                    rp_batch,
+                    is_train=True,
+                    pi=pi,
+                    pi_prime=pi_prime,
+                )
+                iteration_timing['main_feeder'] = time.time() - start
+
+                start = time.time()
+                sess.run(trainer.train_op, feed_dict)
+                iteration_timing['train_op'] = time.time() - start
+
+                if i >= num_warmup:
+                    for key, value in iteration_timing.items():
+                        timing[key].append(value)
+
+    result = {}
+    for key in TRAINER_STAGES:
+        stage_timing = np.asarray(timing[key]) * 1e3
+        if stage_timing.any():
+            result[key] = {'mean_ms': float(stage_timing.mean()), 'std_ms': float(stage_timing.std())}
+
+    return result
+
+
+def run(trainer_names=None, rollout_lengths=(20,), batch_sizes=(1, 4), output_filename=None, **kwargs):
+    """
+    Runs benchmark for every given trainer, rollout length and batch size.
+
+    Args:
+        trainer_names:      iterable of keys of `TRAINER_CONFIGS`, all if None
+        rollout_lengths:    iterable of rollout lengths
+        batch_sizes:        iterable of train batch sizes
+        output_filename:    str, if given - write results to json file
+        **kwargs:           passed to benchmark_trainer()
+
+    Returns:
+        list of results
+    """
+    if trainer_names is None:
+        trainer_names = list(TRAINER_CONFIGS.keys())
+
+    results = []
+    for name in trainer_names:
+        trainer_class, trainer_kwargs = TRAINER_CONFIGS[name]
+        for rollout_length in rollout_lengths:
+            for batch_size in batch_sizes:
+                result = benchmark_trainer(
+                    trainer_class,
+                    trainer_kwargs,
+                    rollout_length=rollout_length,
+                    batch_size=batch_size,
+                    **kwargs
+                )
+                results.append(
+                    dict(trainer=name, rollout_length=rollout_length, batch_size=batch_size, stages=result)
+                )
+                print(
+                    '{:<8} rollout: {:4d} batch: {:3d}  '.format(name, rollout_length, batch_size) +
+                    ', '.join(['{}: {:.3f} ms'.format(key, value['mean_ms']) for key, value in result.items()])
+                )
+
+    if output_filename is not None:
+        with open(output_filename, 'w') as f:
+            json.dump(results, f, indent=4)
+
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Trainer learning pipeline stages latency benchmark.')
+    parser.add_argument('--trainers', nargs='+', default=None, choices=list(TRAINER_CONFIGS.keys()))
+    parser.add_argument('--rollout_lengths', nargs='+', type=int, default=[20])
+    parser.add_argument('--batch_sizes', nargs='+', type=int, default=[1, 4])
+    parser.add_argument('--time_dim', type=int, default=30)
+    parser.add_argument('--layers', nargs='+', type=int, default=[256, 256])
+    parser.add_argument('--iterations', type=int, default=50)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args()
+
+    run(
+        trainer_names=args.trainers,
+        rollout_lengths=args.rollout_lengths,
+        batch_sizes=args.batch_sizes,
+        output_filename=args.output,
+        time_dim=args.time_dim,
+        lstm_layers=tuple(args.layers),
+        num_iterations=args.iterations,
+    )
@@ -26,6 +26,7 @@ import copy
 import os
 import sys
 
+import numpy as np
 import backtrader.feeds as btfeeds
 import pandas as pd
 
@@ -53,6 +54,31 @@ dict: Conventional reset configuration template to pass to environment `reset()`
 ```observation = env.reset(**EnvResetConfig)```
 """
 
+DAY_NS = 24 * 3600 * 10**9
+"""
+int: Day duration in nanoseconds.
+"""
+
+
+def timestamp_to_time(timestamp):
+    """
+    Converts POSIX timestamp to integer epoch nanoseconds time, as data `index` holds.
+
+    Args:
+        timestamp:  POSIX timestamp, seconds
+
+    Returns:
+        int, epoch nanoseconds
+    """
+    return int(round(timestamp * 1e9))
+
+
+def time_to_timestamp(time):
+    """
+    Converts integer epoch nanoseconds time to POSIX timestamp.
+    """
+    return time / 1e9
+
 
 class BTgymBaseData:
     """
@@ -194,9 +220,10 @@ class BTgymBaseData:
         self.data = None  # Will hold actual data as pandas dataframe
         self.is_ready = False
 
-        self.global_timestamp = 0
-        self.start_timestamp = 0
-        self.final_timestamp = 0
+        # Global time points as int epoch nanoseconds, see `global_timestamp`:
+        self.global_time = 0
+        self.start_time = 0
+        self.final_time = 0
 
         self.data_stat = None  # Dataset descriptive statistic as pandas dataframe
         self.data_range_delta = None  # Dataset total duration timedelta
@@ -260,6 +287,153 @@ class BTgymBaseData:
         self.params.update(self.parsing_params)
         self.params.update(self.sampling_params)
 
+    @property
+    def data(self):
+        """
+        Pandas dataframe holding actual data. Setting it also sets `index`: int64 array of data records
+        datetimes as epoch nanoseconds, all time-to-row lookups are done with. Sampled instances
+        data and index are views of the parent ones.
+        """
+        return self._data
+
+    @data.setter
+    def data(self, data):
+        self._data = data
+        if data is None:
+            self.index = None
+
+        else:
+            self.index = np.asarray(data.index.values, dtype='datetime64[ns]').view(np.int64)
+
+    def __getstate__(self):
+        # Index is not sent along with data, but rebuilt by receiver:
+        state = self.__dict__.copy()
+        state['index'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.data = self._data
+
+    def to_shared(self, filename):
+        """
+        Writes data to file to be memory-mapped by other processes, see `from_shared()`.
+        Data values are stored as single 2D array of common columns dtype, preceded by index.
+
+        Args:
+            filename:   file to write, preferably one on shared memory filesystem, e.g. in /dev/shm
+
+        Returns:
+            dict, handle: data-free copy of instance and data file layout
+        """
+        values = self.data.values
+        with open(filename, 'wb') as f:
+            self.index.tofile(f)
+            values.tofile(f)
+
+        instance = copy.copy(self)
+        instance.data = None
+        instance.sample_instance = None
+
+        return dict(
+            instance=instance,
+            filename=filename,
+            num_records=values.shape[0],
+            columns=list(self.data.columns),
+            index_name=self.data.index.name,
+            dtype=values.dtype.str,
+        )
+
+    @staticmethod
+    def from_shared(handle):
+        """
+        Restores instance from handle made by `to_shared()`. Data is read-only dataframe
+        mapped from shared file, no data is copied.
+
+        Args:
+            handle:     dict, data handle
+
+        Returns:
+            data instance
+        """
+        num_records = handle['num_records']
+        index = np.memmap(handle['filename'], dtype=np.int64, mode='r', shape=(num_records,))
+        values = np.memmap(
+            handle['filename'],
+            dtype=handle['dtype'],
+            mode='r',
+            offset=index.nbytes,
+            shape=(num_records, len(handle['columns']))
+        )
+        instance = handle['instance']
+        instance.data = pd.DataFrame(
+            values,
+            index=pd.DatetimeIndex(index.view('datetime64[ns]'), name=handle['index_name']),
+            columns=handle['columns'],
+            copy=False,
+        )
+        return instance
+
+    @property
+    def global_timestamp(self):
+        """
+        Current global time as POSIX timestamp; kept as int epoch nanoseconds `global_time`.
+        """
+        return time_to_timestamp(self.global_time)
+
+    @global_timestamp.setter
+    def global_timestamp(self, timestamp):
+        self.global_time = timestamp_to_time(timestamp)
+
+    @property
+    def start_timestamp(self):
+        return time_to_timestamp(self.start_time)
+
+    @start_timestamp.setter
+    def start_timestamp(self, timestamp):
+        self.start_time = timestamp_to_time(timestamp)
+
+    @property
+    def final_timestamp(self):
+        return time_to_timestamp(self.final_time)
+
+    @final_timestamp.setter
+    def final_timestamp(self, timestamp):
+        self.final_time = timestamp_to_time(timestamp)
+
+    def get_row(self, time):
+        """
+        Returns:
+            number of first data record at or after given epoch nanoseconds time;
+            number of records if there is no such one
+        """
+        return int(np.searchsorted(self.index, time, side='left'))
+
+    def get_nearest_row(self, time):
+        """
+        Args:
+            time:   epoch nanoseconds time or array of such
+
+        Returns:
+            number[s] of data record nearest to given time, later one if tied
+        """
+        time = np.asarray(time)
+        rows = np.clip(np.searchsorted(self.index, time, side='left'), 1, self.index.shape[0] - 1)
+        rows = rows - (time - self.index[rows - 1] < self.index[rows] - time)
+
+        return int(rows) if rows.ndim == 0 else rows
+
+    def get_day_start_row(self, row):
+        """
+        Args:
+            row:    data record number or array of such
+
+        Returns:
+            number[s] of data record nearest to the start (00:00) of the day given record belongs to
+        """
+        time = self.index[row]
+        return self.get_nearest_row(time - time % DAY_NS)
+
     def set_params(self, params_dict):
         """
         Batch attribute setter.
@@ -287,7 +461,7 @@ class BTgymBaseData:
 
     def set_global_timestamp(self, timestamp):
         if self.data is not None:
-            self.global_timestamp = self.data.index[0].timestamp()
+            self.global_time = int(self.index[0])
 
     def reset(self, data_filename=None, **kwargs):
         """
@@ -305,8 +479,8 @@ class BTgymBaseData:
         self.read_csv(data_filename)
 
         # Add global timepoints:
-        self.start_timestamp = self.data.index[0].timestamp()
-        self.final_timestamp = self.data.index[-1].timestamp()
+        self.start_time = int(self.index[0])
+        self.final_time = int(self.index[-1])
         self.set_global_timestamp(timestamp)
 
         self.log.debug(
@@ -619,13 +793,12 @@ class BTgymBaseData:
             # If 00 option set, get index of first record of that day:
             if self.start_00:
                 adj_timedate = sample_first_day.date()
+                first_row = self.get_day_start_row(first_row)
                 self.log.debug('Start time adjusted to <00:00>')
 
             else:
                 adj_timedate = sample_first_day
 
-            first_row = self.data.index.get_loc(adj_timedate, method='nearest')
-
             # Easy part:
             last_row = first_row + self.sample_num_records  # + 1
             sampled_data = self.data[first_row: last_row]
@@ -779,13 +952,11 @@ class BTgymBaseData:
             if self.start_00:
                 adj_timedate = sample_first_day.date()
                 self.log.debug('Start time adjusted to <00:00>')
-                first_row = self.data.index.get_loc(adj_timedate, method='nearest')
+                first_row = self.get_day_start_row(first_row)
 
             else:
                 adj_timedate = sample_first_day
 
-            # first_row = self.data.index.get_loc(adj_timedate, method='nearest')
-
             # Easy part:
             last_row = first_row + sample_num_records  # + 1
             sampled_data = self.data[first_row: last_row]
@@ -960,13 +1131,11 @@ class BTgymBaseData:
             if self.start_00:
                 adj_timedate = sample_first_day.date()
                 self.log.debug('Start time adjusted to <00:00>')
-                first_row = self.data.index.get_loc(adj_timedate, method='nearest')
+                first_row = self.get_day_start_row(first_row)
 
             else:
                 adj_timedate = sample_first_day
 
-            # first_row = self.data.index.get_loc(adj_timedate, method='nearest')
-
             # Easy part:
             last_row = first_row + sample_num_records  # + 1
             sampled_data = self.data[first_row: last_row]
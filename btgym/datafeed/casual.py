@@ -4,7 +4,7 @@ import math
 import datetime
 from logbook import WARNING
 
-from .base import BTgymBaseData
+from .base import BTgymBaseData, timestamp_to_time
 from .derivative import BTgymEpisode, BTgymDataTrial,  BTgymRandomDataDomain
 
 
@@ -44,25 +44,26 @@ class BTgymCasualTrial(BTgymDataTrial):
         if self.data is not None:
             if self.metadata['type']:
                 if timestamp is not None:
-                    assert timestamp < self.final_timestamp, \
+                    time = timestamp_to_time(timestamp)
+                    assert time < self.final_time, \
                         'global time passed <{}> is out of upper bound <{}> for provided data.'. \
                         format(
                             datetime.datetime.fromtimestamp(timestamp),
                             datetime.datetime.fromtimestamp(self.final_timestamp)
                         )
-                    if timestamp < self.start_timestamp:
-                        if self.global_timestamp == 0:
-                            self.global_timestamp = self.start_timestamp
+                    if time < self.start_time:
+                        if self.global_time == 0:
+                            self.global_time = self.start_time
 
                     else:
-                        if timestamp > self.global_timestamp:
-                            self.global_timestamp = timestamp
+                        if time > self.global_time:
+                            self.global_time = time
 
                 else:
-                    if self.global_timestamp == 0:
-                        self.global_timestamp = self.start_timestamp
+                    if self.global_time == 0:
+                        self.global_time = self.start_time
             else:
-                self.global_timestamp = self.start_timestamp
+                self.global_time = self.start_time
 
     def get_global_index(self):
         """
@@ -70,10 +71,7 @@ class BTgymCasualTrial(BTgymDataTrial):
             data row corresponded to current global_time
         """
         if self.is_ready:
-            return self.data.index.get_loc(
-                datetime.datetime.fromtimestamp(self.global_timestamp),
-                method='backfill'
-            )
+            return self.get_row(self.global_time)
 
         else:
             return 0
@@ -304,23 +302,24 @@ class BTgymCasualDataDomain(BTgymRandomDataDomain):
         """
         if self.data is not None:
             if timestamp is not None:
-                assert timestamp < self.final_timestamp, \
+                time = timestamp_to_time(timestamp)
+                assert time < self.final_time, \
                     'global time passed <{}> is out of upper bound <{}> for provided data.'. \
                     format(
                         datetime.datetime.fromtimestamp(timestamp),
                         datetime.datetime.fromtimestamp(self.final_timestamp)
                     )
-                if timestamp < self.start_timestamp:
-                    if self.global_timestamp == 0:
-                        self.global_timestamp = self.start_timestamp
+                if time < self.start_time:
+                    if self.global_time == 0:
+                        self.global_time = self.start_time
 
                 else:
-                    if timestamp > self.global_timestamp:
-                        self.global_timestamp = timestamp
+                    if time > self.global_time:
+                        self.global_time = time
 
             else:
-                if self.global_timestamp == 0:
-                    self.global_timestamp = self.start_timestamp
+                if self.global_time == 0:
+                    self.global_time = self.start_time
 
     def get_global_index(self):
         """
@@ -328,10 +327,7 @@ class BTgymCasualDataDomain(BTgymRandomDataDomain):
             data row corresponded to current global_time
         """
         if self.is_ready:
-            return self.data.index.get_loc(
-                datetime.datetime.fromtimestamp(self.global_timestamp),
-                method='backfill'
-            )
+            return self.get_row(self.global_time)
 
         else:
             return 0
@@ -412,8 +408,8 @@ class BTgymCasualDataDomain(BTgymRandomDataDomain):
         self.log.debug('test_num_records: {}'.format(self.test_num_records))
         self.log.debug('train_num_records: {}'.format(self.train_num_records))
 
-        self.start_timestamp = self.data.index[self.sample_num_records].timestamp()
-        self.final_timestamp = self.data.index[-self.test_num_records].timestamp()
+        self.start_time = int(self.index[self.sample_num_records])
+        self.final_time = int(self.index[-self.test_num_records])
 
         self.set_global_timestamp(timestamp)
         current_index = self.get_global_index()
@@ -21,6 +21,9 @@ import random
 import math
 import datetime
 
+import numpy as np
+
+from .base import DAY_NS
 from .derivative import BTgymRandomDataDomain
 
 
@@ -127,7 +130,8 @@ class BTgymSequentialDataDomain(BTgymRandomDataDomain):
             log_level:          int, logbook.level
 
         Note:
-            - Total number of `Trials` (cardinality) is inferred upon args given and overall dataset size.
+            - Total number of `Trials` (cardinality) is inferred upon args given and overall dataset size;
+            - entire sequence of `Trials` intervals is computed and validated on `reset()` and kept as `schedule`.
         """
         self.train_range_row = 0
         self.test_range_row = 0
@@ -139,6 +143,7 @@ class BTgymSequentialDataDomain(BTgymRandomDataDomain):
         self.total_samples = -1
         self.sample_num = -1
         self.sample_stride = -1
+        self.schedule = None
 
         super(BTgymSequentialDataDomain, self).__init__(name=name, **kwargs)
 
@@ -166,6 +171,8 @@ class BTgymSequentialDataDomain(BTgymRandomDataDomain):
         else:
             self.sample_instance.metadata['type'] = 0  # 0 - always train
             self.sample_instance.metadata['sample_num'] = self.sample_num
+            # Sampling moves domain to next trial, see btgym.server episode prefetch:
+            self.sample_instance.metadata['stateful'] = True
             self.log.debug(
                 'got new trial <{}> with metadata: {}'.
                 format(self.sample_instance.filename, self.sample_instance.metadata)
@@ -181,25 +188,56 @@ class BTgymSequentialDataDomain(BTgymRandomDataDomain):
         Returns:
             two lists: [first_row, last_row], [start_time, end_time]
         """
-        # First current trial interval:
-        first_row = sample_num * self.sample_stride
+        first_row, last_row = self.schedule[sample_num]
+        return [int(first_row), int(last_row)], [self.data.index[first_row], self.data.index[last_row - 1]]
+
+    def _get_schedule(self):
+        """
+        Computes intervals of entire `Trials` sequence in one pass:
+        sliding trial starts every `sample_stride` records [adjusted to day start] and spans `sample_num_records`;
+        expanding trial spans from first dataset record to where sliding one ends.
+        Trials not fitting in data are left out.
+
+        Returns:
+            int array of shape [num_trials, 2] holding trials [first_row, last_row] bounds
+        """
+        first_rows = np.arange(self.total_samples + 1) * self.sample_stride
+        first_rows = first_rows[first_rows < self.data.shape[0]]
 
         if self.start_00:
-            first_day = self.data[first_row:first_row + 1].index[0]
-            first_row = self.data.index.get_loc(first_day.date(), method='nearest')
-            self.log.debug('Trial train start time adjusted to <00:00>')
+            first_rows = self.get_day_start_row(first_rows)
 
-        last_row = first_row + self.sample_num_records
+        last_rows = first_rows + self.sample_num_records
 
         if self.expanding:
-            start_time = self.data.index[0]
-            first_row = 0
+            first_rows = np.zeros_like(first_rows)
 
-        else:
-            start_time = self.data.index[first_row]
+        schedule = np.stack([first_rows, last_rows], axis=-1)
+
+        return schedule[last_rows <= self.data.shape[0]]
+
+    def _check_schedule(self, schedule):
+        """
+        Checks trials start weekdays and data time gaps, the same way interval sampling does;
+        for expanding trials gaps are checked over latest `sample_num_records` records.
+
+        Returns:
+            bool array of trials validity
+        """
+        first_times = self.index[schedule[:, 1] - self.sample_num_records]
+        last_times = self.index[schedule[:, 1] - 1]
+
+        max_sample_len = int(self.max_sample_len_delta.total_seconds()) * 10**9
+        max_time_gap = int(self.max_time_gap.total_seconds()) * 10**9
 
-        end_time = self.data.index[last_row]
-        return [first_row, last_row], [start_time, end_time]
+        is_valid = last_times - first_times - max_sample_len < max_time_gap
+
+        if not self.expanding:
+            # 1970-01-01 is Thursday:
+            weekdays = (first_times // DAY_NS + 3) % 7
+            is_valid &= np.isin(weekdays, list(self.start_weekdays))
+
+        return is_valid
 
     def reset(self, global_step=0, total_steps=None, skip_frame=10, data_filename=None, **kwargs):
         """
@@ -272,6 +310,27 @@ class BTgymSequentialDataDomain(BTgymRandomDataDomain):
         # Current trial to start with:
         self.sample_num = int(self.total_samples * self.global_step / self.total_steps)
 
+        # Entire sequence of trials:
+        self.schedule = self._get_schedule()
+        is_valid = self._check_schedule(self.schedule)
+        is_valid[:self.sample_num] = True
+
+        try:
+            assert is_valid.all()
+
+        except AssertionError:
+            invalid = np.flatnonzero(~is_valid)
+            msg = (
+                '{} Trials do not pass start weekday or data time gap checks, #: {}, first at: {}.\n' +
+                'Hint: check sampling params / dataset consistency.'
+            ).format(
+                invalid.shape[0],
+                list(invalid[:10]),
+                self.data.index[self.schedule[invalid[0], 0]],
+            )
+            self.log.error(msg)
+            raise RuntimeError(msg)
+
         if self.expanding:
             t_type = 'EXPANDING'
 
@@ -293,6 +352,31 @@ class BTgymSequentialDataDomain(BTgymRandomDataDomain):
 
         self.is_ready = True
 
+    def get_sample(self, sample_num):
+        """
+        Makes Trial of given position in sequence, not changing iterator position.
+
+        Args:
+            sample_num: Trial position in iteration sequence
+
+        Returns:
+            Trial instance
+        """
+        first_row, last_row = self.schedule[sample_num]
+
+        trial = self.nested_class_ref(**self.nested_params)
+        start_time = self.data.index[sample_num * self.sample_stride]
+        trial.filename = 'sequential_trial_num_{}_at_{}'.format(
+            sample_num,
+            start_time.date() if self.start_00 else start_time
+        )
+        self.log.info('New sample id: <{}>.'.format(trial.filename))
+        trial.data = self.data[first_row: last_row]
+        trial.metadata['type'] = 'interval_sample'
+        trial.metadata['first_row'] = int(first_row)
+
+        return trial
+
     def _sample_sequential(self):
         """
         Iteratively samples Trials.
@@ -301,7 +385,7 @@ class BTgymSequentialDataDomain(BTgymRandomDataDomain):
                 (None, trials_cardinality),  it trials sequence exhausted
         """
 
-        if self.sample_num > self.total_samples:
+        if self.sample_num >= self.schedule.shape[0]:
             self.is_ready = False
             self.log.warning('Sampling sequence exhausted at {}-th Trial'.format(self.sample_num))
             return None
@@ -321,8 +405,6 @@ class BTgymSequentialDataDomain(BTgymRandomDataDomain):
                     interval[-1]
                 )
             )
-            trial = self._sample_interval(interval, name='sequential_trial_')
+            trial = self.get_sample(self.sample_num)
             self.sample_num += 1
             return trial
-
-
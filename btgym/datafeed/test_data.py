@@ -1,5 +1,8 @@
 
 import unittest
+import numpy as np
+import pandas as pd
+from .base import timestamp_to_time
 from .derivative import BTgymDataset, BTgymRandomDataDomain
 from .stateful import BTgymSequentialDataDomain
 
@@ -190,9 +193,99 @@ class DomainTest(unittest.TestCase):
                                 self.assertLess(last_trial_sup, e_test_inf_time)
 
 
-if __name__ == '__main__':
-    unittest.main()
+class IndexTest(unittest.TestCase):
+    """Testing data time index lookups"""
+
+    def setUp(self):
+        # Minute bars with overnight and weekend gaps:
+        index = pd.date_range('2016-01-04', '2016-01-20', freq='1min')
+        index = index[(index.hour >= 1) & (index.hour < 22) & (index.weekday < 5)]
+        self.dataset = BTgymDataset(filename=filename, log_level=log_level)
+        self.dataset.data = pd.DataFrame({'open': np.arange(index.shape[0])}, index=index)
+
+    def test_get_row(self):
+        """
+        Time to row lookup should match pandas backfill one.
+        """
+        data_index = self.dataset.data.index
+        timestamps = np.random.uniform(data_index[0].timestamp(), data_index[-1].timestamp(), size=1000)
+        timestamps = np.concatenate([timestamps, [time.timestamp() for time in data_index[::97]]])
+
+        expected = data_index.get_indexer(pd.to_datetime(timestamps, unit='s'), method='bfill')
+        rows = [self.dataset.get_row(timestamp_to_time(timestamp)) for timestamp in timestamps]
+
+        self.assertListEqual(rows, list(expected))
+
+    def test_get_day_start_row(self):
+        """
+        Day start lookup should match pandas nearest one.
+        """
+        data_index = self.dataset.data.index
+        for row in range(0, data_index.shape[0], 61):
+            expected = data_index.get_indexer([pd.Timestamp(data_index[row].date())], method='nearest')[0]
+            self.assertEqual(self.dataset.get_day_start_row(row), expected)
+
+    def test_global_timestamp(self):
+        """
+        Global time is kept as integer nanoseconds.
+        """
+        self.dataset.global_timestamp = 1452211260.0
+        self.assertEqual(self.dataset.global_time, 1452211260 * 10**9)
+        self.assertEqual(self.dataset.global_timestamp, 1452211260.0)
+
+
+
+class SequentialScheduleTest(unittest.TestCase):
+    """Testing sequential domain trials schedule"""
 
+    def make_domain(self, expanding):
+        domain = BTgymSequentialDataDomain(
+            filename=filename,
+            trial_params=dict(
+                start_weekdays={0, 1, 2, 3, 4, 5, 6},
+                sample_duration={'days': 4, 'hours': 0, 'minutes': 0},
+                start_00=False,
+                time_gap={'days': 1, 'hours': 0},
+                test_period={'days': 1, 'hours': 0, 'minutes': 0},
+                expanding=expanding,
+            ),
+            episode_params=episode_params,
+            log_level=log_level,
+        )
+        index = pd.date_range('2016-01-04', periods=31 * 24 * 60, freq='1min')
+        domain.data = pd.DataFrame({'open': np.arange(index.shape[0])}, index=index)
+        domain.reset()
+        return domain
+
+    def test_sliding_schedule(self):
+        """
+        Sliding trials are of same size and their test periods form a partition.
+        """
+        domain = self.make_domain(expanding=False)
+        schedule = domain.schedule
 
+        self.assertTrue((schedule[:, 1] - schedule[:, 0] == domain.sample_num_records).all())
+        self.assertTrue((np.diff(schedule[:, 1]) == domain.trial_test_range_row).all())
+        self.assertLessEqual(schedule[-1, 1], domain.data.shape[0])
 
+        for first_row, last_row in schedule:
+            trial = domain.sample()
+            self.assertEqual(trial.metadata['first_row'], first_row)
+            self.assertEqual(trial.data.index[0], domain.data.index[first_row])
+            self.assertEqual(trial.data.shape[0], last_row - first_row)
 
+        self.assertFalse(domain.sample())
+
+    def test_expanding_schedule(self):
+        """
+        Expanding trials start at first record and end where sliding ones do.
+        """
+        sliding_schedule = self.make_domain(expanding=False).schedule
+        schedule = self.make_domain(expanding=True).schedule
+
+        self.assertTrue((schedule[:, 0] == 0).all())
+        self.assertTrue((schedule[:, 1] == sliding_schedule[:, 1]).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -57,6 +57,9 @@ class BTgymDataFeedServer(multiprocessing.Process):
         self.debug_pre_sample_fails = 0
         self.debug_pre_sample_attempts = 0
 
+        # Set by server process when it is ready to serve, see btgym.utils.wait_for_ready():
+        self.ready = multiprocessing.Event()
+
         # self.global_timestamp = 0
 
     def get_data(self, sample_config=None):
@@ -129,6 +132,8 @@ class BTgymDataFeedServer(multiprocessing.Process):
         # Describe dataset:
         self.dataset_stat = self.dataset.describe()
 
+        self.ready.set()
+
         # Main loop:
         while True:
             # Stick here until receive any request:
@@ -0,0 +1,376 @@
+###############################################################################
+#
+# Copyright (C) 2017 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import copy
+
+import numpy as np
+
+
+class BTgymOrder():
+    """
+    Market order record, exposes the part of backtrader Order interface strategies use in `notify_order()`.
+    """
+    Created, Submitted, Accepted, Partial, Completed, Canceled, Expired, Margin, Rejected = range(9)
+
+    Status = [
+        'Created', 'Submitted', 'Accepted', 'Partial',
+        'Completed', 'Canceled', 'Expired', 'Margin', 'Rejected',
+    ]
+
+    class Execution():
+        price = 0.0
+        value = 0.0
+        comm = 0.0
+        size = 0
+        pnl = 0.0
+
+    def __init__(self, size, bar, price):
+        """
+
+        Args:
+            size:   int, signed order size, positive to buy
+            bar:    int, episode bar order is created at
+            price:  float, creation bar close price
+        """
+        self.size = size
+        self.created_bar = bar
+        self.created_price = price
+        self.status = self.Submitted
+        self.executed = self.Execution()
+
+    def isbuy(self):
+        return self.size > 0
+
+    def issell(self):
+        return self.size < 0
+
+    def alive(self):
+        return self.status in [self.Created, self.Submitted, self.Partial, self.Accepted]
+
+    def getstatusname(self, status=None):
+        return self.Status[self.status if status is None else status]
+
+
+class BTgymPosition():
+    """
+    Single instrument position, updated the same way backtrader Position does.
+    """
+    def __init__(self, size=0, price=0.0):
+        self.size = size
+        self.price = price
+
+    def __bool__(self):
+        return self.size != 0
+
+    def clone(self):
+        return BTgymPosition(self.size, self.price)
+
+    def update(self, size, price):
+        """
+        Updates position with operation of given size and price.
+
+        Returns:
+            tuple (new size, new price, opened, closed), `opened` and `closed` are parts of operation size
+            used to open/increase and to close/reduce position respectively.
+        """
+        old_size = self.size
+        self.size += size
+
+        if not self.size:
+            opened, closed = 0, size
+            self.price = 0.0
+
+        elif not old_size:
+            opened, closed = size, 0
+            self.price = price
+
+        elif old_size > 0:
+            if size > 0:
+                opened, closed = size, 0
+                self.price = (self.price * old_size + size * price) / self.size
+
+            elif self.size > 0:
+                opened, closed = 0, size
+
+            else:
+                opened, closed = self.size, -old_size
+                self.price = price
+
+        else:
+            if size < 0:
+                opened, closed = size, 0
+                self.price = (self.price * old_size + size * price) / self.size
+
+            elif self.size < 0:
+                opened, closed = 0, size
+
+            else:
+                opened, closed = self.size, -old_size
+                self.price = price
+
+        return self.size, self.price, opened, closed
+
+
+class BTgymArrayBroker():
+    """
+    Array-based broker for single instrument market orders.
+
+    Replicates backtrader BackBroker with default stock-like percentage commission scheme, i.e. what
+    `broker.setcash()`, `broker.setcommission(commission, leverage)` and `broker.set_shortcash()` configure:
+    orders submitted at some bar are checked against available cash at creation bar close price and executed
+    at next bar open price; orders exceeding cash get `Margin` status.
+
+    Per-bar cash, value, position and drawdown records are kept in preallocated episode-long arrays,
+    the same values backtrader Broker and DrawDown observers hold.
+    """
+
+    def __init__(self, cash=10.0, commission=0.0, leverage=1.0, shortcash=True):
+        """
+
+        Args:
+            cash:       float, starting cash
+            commission: float, commission as fraction of operation value
+            leverage:   float, leverage
+            shortcash:  bool, if False - short positions value is added to portfolio value, cash is
+                        taken on opening short position the same way as for long one
+        """
+        self.startingcash = cash
+        self.commission = commission
+        self.leverage = leverage
+        self.shortcash = shortcash
+
+        self.cash = cash
+        self.value = cash
+        self.position = BTgymPosition()
+        self.submitted = []
+        self.notifications = []
+
+        self.max_value = -np.inf
+        self.drawdown = 0.0
+        self.max_drawdown = 0.0
+        self.stat = None
+
+    # Cerebro broker configuration interface:
+
+    def setcash(self, cash):
+        self.startingcash = self.cash = self.value = cash
+
+    set_cash = setcash
+
+    def setcommission(self, commission=0.0, leverage=1.0, margin=None, mult=1.0, commtype=None, **kwargs):
+        if margin or commtype or mult != 1.0:
+            raise NotImplementedError('Only default stock-like percentage commission scheme is supported.')
+
+        self.commission = commission
+        self.leverage = leverage
+
+    def set_shortcash(self, shortcash):
+        self.shortcash = shortcash
+
+    def get_cash(self):
+        return self.cash
+
+    getcash = get_cash
+
+    def get_value(self):
+        return self.value
+
+    getvalue = get_value
+
+    def get_leverage(self):
+        return self.leverage
+
+    def getposition(self, data=None):
+        return self.position
+
+    # Episode runtime:
+
+    def start(self, size):
+        """
+        Resets broker state and preallocates records for episode of given number of bars.
+        """
+        self.cash = self.value = self.startingcash
+        self.position = BTgymPosition()
+        self.submitted = []
+        self.notifications = []
+        self.max_value = -np.inf
+        self.drawdown = 0.0
+        self.max_drawdown = 0.0
+        self.stat = {
+            key: np.zeros(size) for key in ['cash', 'value', 'position', 'drawdown', 'max_drawdown']
+        }
+
+    def submit(self, size, bar, price):
+        """
+        Submits market order, to be executed at next bar.
+
+        Args:
+            size:   int, signed order size, positive to buy
+            bar:    int, current bar
+            price:  float, current bar close price
+
+        Returns:
+            BTgymOrder instance
+        """
+        order = BTgymOrder(size, bar, price)
+        self.submitted.append(order)
+        return order
+
+    def _operation_cash(self, cash, opened, closed, price, entry_price, pnl):
+        """
+        Cash left after closing and opening parts of operation, as backtrader broker computes it.
+
+        Returns:
+            tuple (cash after closing, cash after opening, closed value, closed comm., opened value, opened comm.)
+        """
+        closed_value = closed_comm = 0.0
+        if closed:
+            if self.shortcash:
+                closed_value = -closed * entry_price
+
+            else:
+                closed_value = abs(closed) * entry_price
+
+            close_cash = closed_value / self.leverage if closed_value > 0 else closed_value
+            closed_comm = abs(closed) * self.commission * price
+            cash += close_cash + pnl - closed_comm
+
+        opened_cash = cash
+        opened_value = opened_comm = 0.0
+        if opened:
+            if self.shortcash:
+                opened_value = opened * price
+
+            else:
+                opened_value = abs(opened) * price
+
+            open_cash = opened_value / self.leverage if opened_value > 0 else opened_value
+            opened_comm = abs(opened) * self.commission * price
+            opened_cash = cash - open_cash - opened_comm
+
+        return cash, opened_cash, closed_value, closed_comm, opened_value, opened_comm
+
+    def _get_value(self, price):
+        """
+        Portfolio value at given price.
+        """
+        size = self.position.size
+        if not size:
+            return self.cash
+
+        if self.shortcash:
+            position_value = size * price
+
+        elif size > 0:
+            position_value = size * price
+
+        else:
+            position_value = abs(self.position.price * size + (self.position.price - price) * size)
+
+        unrealized = size * (price - self.position.price)
+        if position_value > 0:
+            position_value = (position_value - unrealized) / self.leverage + unrealized
+
+        return self.cash + position_value
+
+    def _execute(self, order, price):
+        size = order.size
+        entry_price = self.position.price
+        _, _, opened, closed = self.position.clone().update(size, price)
+        pnl = -closed * (price - entry_price)
+
+        cash, opened_cash, closed_value, closed_comm, opened_value, opened_comm = \
+            self._operation_cash(self.cash, opened, closed, price, entry_price, pnl)
+
+        self.cash = cash
+        margin = False
+        if opened:
+            if opened_cash < 0.0:
+                # Not enough cash, only closing part gets executed:
+                margin = True
+                opened = 0
+                opened_value = opened_comm = 0.0
+
+            else:
+                self.cash = opened_cash
+
+        executed_size = closed + opened
+        if executed_size:
+            self.position.update(executed_size, price)
+            order.executed.price = price
+            order.executed.size = executed_size
+            order.executed.value = closed_value + opened_value
+            order.executed.comm = closed_comm + opened_comm
+            order.executed.pnl = pnl
+            order.status = order.Completed if executed_size == size else order.Partial
+            self.notifications.append(copy.copy(order))
+
+        if margin:
+            order.status = order.Margin
+            self.notifications.append(order)
+
+    def next(self, bar, open_price, close_price):
+        """
+        Executes orders submitted at previous bars and updates records for current bar.
+
+        Args:
+            bar:            int, current bar
+            open_price:     float, current bar open price
+            close_price:    float, current bar close price
+
+        Returns:
+            list of orders changed their status, to notify strategy of
+        """
+        self.notifications = []
+        if self.submitted:
+            # Check submitted orders by pseudo-executing all at creation price:
+            cash = self.cash
+            position = self.position.clone()
+            accepted = []
+            for order in self.submitted:
+                _, _, opened, closed = position.update(order.size, order.created_price)
+                cash = self._operation_cash(
+                    cash, opened, closed, order.created_price, order.created_price, 0.0
+                )[1]
+                if cash >= 0.0:
+                    order.status = order.Accepted
+                    accepted.append(order)
+
+                else:
+                    order.status = order.Margin
+                    self.notifications.append(order)
+
+            self.submitted = []
+
+            for order in accepted:
+                self._execute(order, open_price)
+
+        self.value = self._get_value(close_price)
+
+        self.max_value = max(self.max_value, self.value)
+        self.drawdown = 100.0 * (self.max_value - self.value) / self.max_value
+        self.max_drawdown = max(self.max_drawdown, self.drawdown)
+
+        self.stat['cash'][bar] = self.cash
+        self.stat['value'][bar] = self.value
+        self.stat['position'][bar] = self.position.size
+        self.stat['drawdown'][bar] = self.drawdown
+        self.stat['max_drawdown'][bar] = self.max_drawdown
+
+        return self.notifications
@@ -0,0 +1,230 @@
+###############################################################################
+#
+# Copyright (C) 2017 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+from collections import OrderedDict
+
+import numpy as np
+
+from .broker import BTgymArrayBroker
+from .strategy import BTgymVectorStrategy
+
+
+class BTgymVectorData():
+    """
+    Episode data as numpy arrays.
+    """
+    def __init__(self, dataname, open=1, high=2, low=3, close=4, volume=5, **kwargs):
+        """
+
+        Args:
+            dataname:   pandas dataframe indexed by datetime
+            open, high, low, close, volume:  columns numbers, counting datetime index as zero one,
+                                             the way bt.feeds.PandasDirectData does
+        """
+        values = dataname.values.astype(np.float64)
+        self.dataname = dataname
+        self.open = values[:, open - 1]
+        self.high = values[:, high - 1]
+        self.low = values[:, low - 1]
+        self.close = values[:, close - 1]
+        self.volume = values[:, volume - 1] if volume is not None and volume > 0 else np.zeros(values.shape[0])
+        self.datetime = dataname.index.values.astype('datetime64[us]')
+        self.numrecords = values.shape[0]
+
+    @classmethod
+    def from_feed(cls, feed):
+        """
+        Makes arrays from backtrader PandasDirectData feed, as BTgymDataset.to_btfeed() returns.
+        """
+        return cls(
+            dataname=feed.p.dataname,
+            open=feed.p.open,
+            high=feed.p.high,
+            low=feed.p.low,
+            close=feed.p.close,
+            volume=feed.p.volume,
+        )
+
+    def trim(self, size):
+        """
+        Keeps first `size` bars only, e.g. once episode has been stopped.
+        """
+        for key in ['open', 'high', 'low', 'close', 'volume', 'datetime']:
+            setattr(self, key, getattr(self, key)[:size])
+
+
+class BTgymVectorAnalyzers(OrderedDict):
+    """
+    Analyzers container with backtrader strategy `analyzers` attribute interface.
+    """
+    def getnames(self):
+        return list(self.keys())
+
+    def getbyname(self, name):
+        return self[name]
+
+
+class BTgymVectorEngine():
+    """
+    Lightweight execution engine to use instead of backtrader Cerebro for single instrument fixed stake
+    market orders strategies, e.g. BTgymEnv(engine=BTgymVectorEngine()) or just BTgymEnv(engine='vector').
+
+    Runs BTgymVectorStrategy subclass over episode numpy arrays with array-based broker,
+    skipping backtrader event loop, lines, observers and analyzers machinery entirely. Exposes the part
+    of Cerebro interface environment and server rely on: strategy, broker, sizer and data setup,
+    `run()` and `runstop()`; server communication analyzer gets called every bar the same way.
+    """
+
+    def __init__(self):
+        self.broker = BTgymArrayBroker()
+        self.strats = []
+        self.datas = []
+        self.observers = []
+        self.analyzers = []
+        self.stake = 1
+        self.runstrats = None
+        self._event_stop = False
+
+    def addstrategy(self, strategy, *args, **kwargs):
+        """
+        Args:
+            strategy:   BTgymVectorStrategy subclass
+        """
+        if not issubclass(strategy, BTgymVectorStrategy):
+            raise TypeError(
+                'Expected BTgymVectorStrategy subclass, got: {}. Hint: use bt.Cerebro engine'.format(strategy)
+            )
+
+        self.strats.append([(strategy, args, kwargs)])
+        return len(self.strats) - 1
+
+    def addsizer(self, sizer=None, stake=1, **kwargs):
+        """
+        Only fixed size stake is supported, sizer class is ignored.
+        """
+        self.stake = stake
+
+    def adddata(self, data, name=None):
+        """
+        Args:
+            data:   BTgymVectorData, pandas dataframe or bt.feeds.PandasDirectData instance
+        """
+        if not isinstance(data, BTgymVectorData):
+            if hasattr(data, 'p'):
+                data = BTgymVectorData.from_feed(data)
+
+            else:
+                data = BTgymVectorData(dataname=data)
+
+        self.datas.append(data)
+        return data
+
+    def addobserver(self, obscls, *args, **kwargs):
+        """
+        Observers are not run, broker keeps drawdown and value records itself.
+        """
+        self.observers.append((False, obscls, args, kwargs))
+
+    def addanalyzer(self, ancls, *args, **kwargs):
+        """
+        Only plain (not backtrader) analyzer classes, instantiated with strategy as first arg
+        and providing `next()`, are supported, e.g. server environment communication one.
+        """
+        self.analyzers.append((ancls, args, kwargs))
+
+    def runstop(self):
+        self._event_stop = True
+
+    def run(self, **kwargs):
+        """
+        Runs episode.
+
+        Returns:
+            list holding strategy instance
+        """
+        data = self.datas[0]
+        self.broker.start(data.numrecords)
+        self._event_stop = False
+
+        strategy_class, args, strategy_kwargs = self.strats[0][0]
+        strategy = strategy_class(self, data, self.broker, self.stake, **strategy_kwargs)
+
+        strategy.analyzers = BTgymVectorAnalyzers()
+        for ancls, anargs, ankwargs in self.analyzers:
+            ankwargs = dict(ankwargs)
+            name = ankwargs.pop('_name', ancls.__name__.lower())
+            strategy.analyzers[name] = ancls(strategy, *anargs, **ankwargs)
+
+        analyzers = list(strategy.analyzers.values())
+        self.runstrats = [[strategy]]
+
+        bar = 0
+        for bar in range(data.numrecords):
+            strategy.bar = bar
+            for order in self.broker.next(bar, data.open[bar], data.close[bar]):
+                strategy.notify_order(order)
+
+            if bar + 1 < strategy.minperiod:
+                strategy.prenext()
+                continue
+
+            elif bar + 1 == strategy.minperiod:
+                strategy.nextstart()
+
+            else:
+                strategy.next()
+
+            for analyzer in analyzers:
+                analyzer.next()
+
+            if self._event_stop:
+                break
+
+        strategy.stop()
+        data.trim(bar + 1)
+
+        return [strategy]
+
+    def get_episode_data(self):
+        """
+        Compact episode plotting data, see BTgymRendering.get_episode_data().
+        """
+        strategy = self.runstrats[0][0]
+        size = strategy.data.close.shape[0]
+        stat = {key: value[:size] for key, value in self.broker.stat.items()}
+
+        position = stat['position']
+        change = np.diff(np.concatenate([[0], position]))
+        buy = np.where(change > 0, strategy.data.open, np.nan)
+        sell = np.where(change < 0, strategy.data.open, np.nan)
+
+        return dict(
+            price=OrderedDict([('close', strategy.data.close)]),
+            markers=OrderedDict([('buy', buy), ('sell', sell)]),
+            panels=OrderedDict(
+                [
+                    ('Broker', OrderedDict([('cash', stat['cash']), ('value', stat['value'])])),
+                    (
+                        'DrawDown',
+                        OrderedDict([('drawdown', stat['drawdown']), ('maxdrawdown', stat['max_drawdown'])])
+                    ),
+                    ('Position', OrderedDict([('exposure', position)])),
+                ]
+            ),
+        )
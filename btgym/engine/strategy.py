@@ -0,0 +1,232 @@
+###############################################################################
+#
+# Copyright (C) 2017 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import copy
+import datetime
+
+import numpy as np
+
+from btgym.strategy import BTgymBaseStrategy
+from btgym.strategy.base import BTgymTradingMixin
+
+
+class VectorParams():
+    """
+    Strategy parameters holder, mimics backtrader params: attribute access and `_gettuple()`.
+    """
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+    def _gettuple(self):
+        return tuple(self.__dict__.items())
+
+    def _getkeys(self):
+        return list(self.__dict__.keys())
+
+
+class MetaVectorStrategy(type):
+    """
+    Merges `params` dictionary of strategy class with ones of its bases, the way backtrader does for strategies.
+    """
+    def __new__(mcs, name, bases, namespace):
+        params = {}
+        for base in reversed(bases):
+            base_params = getattr(base, 'params', None)
+            if isinstance(base_params, VectorParams):
+                params.update(base_params._gettuple())
+
+        params.update(namespace.get('params', {}))
+        namespace['params'] = VectorParams(**params)
+
+        return super(MetaVectorStrategy, mcs).__new__(mcs, name, bases, namespace)
+
+
+class BTgymVectorStrategy(BTgymTradingMixin, metaclass=MetaVectorStrategy):
+    """
+    Lightweight counterpart of BTgymBaseStrategy to run by BTgymVectorEngine. Provides the same environment hooks:
+    get_state(), get_reward(), get_info(), get_done() and _get_done(), computed over episode numpy arrays
+    instead of backtrader lines; single instrument fixed stake market orders and episode termination logic
+    is one of BTgymTradingMixin, with broker statistics and order submission accessors implemented here.
+
+    Episode data is available as `self.data` arrays: `open`, `high`, `low`, `close`, `volume`, `datetime`,
+    with `self.bar` pointing to current bar; `self.ohlc` holds [episode_length, 4] price matrix.
+    Broker and drawdown statistics, as backtrader observers would record them, are kept in `self.broker.stat`.
+
+    Note:
+        Backtrader updates observers after analyzers, so `self.stats` values the base strategy sends to environment
+        are ones of previous bar; `get_stat()` reads broker records the same way to keep episodes identical.
+    """
+    time_dim = BTgymBaseStrategy.time_dim
+    skip_frame = BTgymBaseStrategy.skip_frame
+    avg_period = BTgymBaseStrategy.avg_period
+    portfolio_actions = BTgymBaseStrategy.portfolio_actions
+
+    params = dict(BTgymBaseStrategy.params._gettuple())
+
+    def __init__(self, env, data, broker, stake=1, **kwargs):
+        """
+
+        Args:
+            env:        BTgymVectorEngine instance
+            data:       BTgymVectorData instance
+            broker:     BTgymArrayBroker instance
+            stake:      int, fixed order size
+            **kwargs:   strategy parameters, see BTgymBaseStrategy
+        """
+        params = dict(self.params._gettuple())
+        params.update(kwargs)
+        self.p = self.params = VectorParams(**copy.deepcopy(params))
+
+        self.env = env
+        self.data = data
+        self.broker = broker
+        self.stake = stake
+        self.bar = 0
+
+        try:
+            self.time_dim = self.p.state_shape['raw_state'].shape[0]
+        except KeyError:
+            pass
+
+        try:
+            self.skip_frame = self.p.skip_frame
+        except KeyError:
+            pass
+
+        # First bar strategy gets `next()` at, as simple moving average of `time_dim` in base strategy defines:
+        self.minperiod = self.time_dim
+
+        self.iteration = 0
+        self.env_iteration = 0
+        self.inner_embedding = 1
+        self.is_done = False
+        self.is_done_enabled = False
+        self.steps_till_is_done = 2  # extra steps to make when episode terminal conditions are met
+        self.action = 'hold'
+        self.last_action = 'hold'
+        self.reward = 0
+        self.order = None
+        self.order_failed = 0
+        self.broker_message = ()  # tuple of (code, args) broker events, see btgym.strategy.utils.BROKER_MESSAGES
+        self.final_message = '_'
+        self.raw_state = None
+        self.time_stamp = 0
+
+        self.log = self.env._log
+
+        self.target_value = self.broker.startingcash * (1 + self.p.target_call / 100)
+
+        self.metadata = {
+            'type': np.asarray(self.p.metadata['type']),
+            'trial_num': np.asarray(self.p.metadata['parent_sample_num']),
+            'trial_type': np.asarray(self.p.metadata['parent_sample_type']),
+            'sample_num': np.asarray(self.p.metadata['sample_num']),
+            'first_row': np.asarray(self.p.metadata['first_row']),
+            'timestamp': np.asarray(self.time_stamp, dtype=np.float64)
+        }
+        self.state = {
+            'raw_state': None,
+            'metadata': None
+        }
+        self.can_increment_global_time = self.metadata['type'] and self.metadata['trial_type']
+
+        # Time-embedded price windows are just views of this one:
+        self.ohlc = np.stack([self.data.open, self.data.high, self.data.low, self.data.close], axis=-1)
+
+    @property
+    def position(self):
+        return self.broker.getposition()
+
+    def __len__(self):
+        # Number of bars processed, as backtrader strategy len():
+        return self.bar + 1
+
+    def get_stat(self, key):
+        """
+        Returns broker statistic as seen by environment at current bar, one of:
+        `cash`, `value`, `position`, `drawdown`, `max_drawdown`.
+        """
+        return self.broker.stat[key][max(self.bar - 1, 0)]
+
+    def _get_max_drawdown(self):
+        return self.get_stat('max_drawdown')
+
+    def buy(self):
+        return self.broker.submit(self.stake, self.bar, self.data.close[self.bar])
+
+    def sell(self):
+        return self.broker.submit(-self.stake, self.bar, self.data.close[self.bar])
+
+    def close(self):
+        if not self.position.size:
+            return None
+
+        return self.broker.submit(-self.position.size, self.bar, self.data.close[self.bar])
+
+    def prenext(self):
+        pass
+
+    def nextstart(self):
+        self.inner_embedding = self.bar + 1
+        self.log.debug('Inner time embedding: {}'.format(self.inner_embedding))
+
+    def stop(self):
+        pass
+
+    def _get_raw_state(self):
+        """
+        Default state observation composer, see BTgymBaseStrategy.
+        """
+        self.raw_state = self.ohlc[self.bar - self.time_dim + 1: self.bar + 1]
+
+        return self.raw_state
+
+    def get_metadata_state(self):
+        self.metadata['timestamp'] = np.asarray(self._get_timestamp())
+
+        return self.metadata
+
+    def _get_time(self):
+        return self.data.datetime[self.bar].astype(object)
+
+    def _get_timestamp(self):
+        self.time_stamp = self._get_time().replace(tzinfo=datetime.timezone.utc).timestamp()
+
+        return self.time_stamp
+
+    def get_state(self):
+        self.state['raw_state'] = self.raw_state
+        self.state['metadata'] = self.get_metadata_state()
+        return self.state
+
+    def get_reward(self):
+        self.reward = float(np.log(self.get_stat('value') / self.broker.startingcash))
+        return self.reward
+
+    def get_info(self):
+        return dict(
+            step=self.iteration,
+            time=self._get_time(),
+            action=self.action,
+            broker_message=self.broker_message,
+            broker_cash=self.get_stat('cash'),
+            broker_value=self.get_stat('value'),
+            drawdown=self.get_stat('drawdown'),
+            max_drawdown=self.get_stat('max_drawdown'),
+        )
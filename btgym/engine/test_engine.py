@@ -0,0 +1,191 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+import backtrader as bt
+from logbook import Logger, WARNING
+
+from btgym.strategy import BTgymBaseStrategy
+from btgym.strategy.utils import broker_message_to_str
+from .engine import BTgymVectorEngine, BTgymVectorData
+from .strategy import BTgymVectorStrategy
+
+
+metadata = dict(type=0, parent_sample_num=0, parent_sample_type=0, sample_num=0, first_row=0)
+
+
+def random_episode(size, rng):
+    """
+    Random walk one minute OHLCV bars dataframe.
+    """
+    close = 1.1 + np.cumsum(rng.standard_normal(size) * 5e-4)
+    open = np.concatenate([[1.1], close[:-1]])
+    spread = np.abs(rng.standard_normal(size)) * 2e-4
+    return pd.DataFrame(
+        {
+            'open': open,
+            'high': np.maximum(open, close) + spread,
+            'low': np.minimum(open, close) - spread,
+            'close': close,
+            'volume': np.zeros(size),
+        },
+        index=pd.date_range('2017-03-01', periods=size, freq='1min'),
+    )
+
+
+class Recorder(object):
+    """
+    Stripped down server episode communication logic: agent acts with scripted actions,
+    environment responses are recorded.
+    """
+    actions = ()
+
+    def __init__(self, strategy=None):
+        if strategy is not None:
+            self.strategy = strategy
+
+        self.records = []
+
+    def prenext(self):
+        pass
+
+    def next(self):
+        strategy = self.strategy
+        is_done = strategy._get_done()
+        strategy.action = 'hold'
+
+        if strategy.iteration % strategy.p.skip_frame == 0 or is_done:
+            info = strategy.get_info()
+            info['broker_message'] = broker_message_to_str(info['broker_message'])
+            raw_state = strategy._get_raw_state().copy()
+            self.records.append((info, strategy.get_reward(), is_done, raw_state))
+
+            strategy.action = strategy.last_action = self.actions[strategy.env_iteration % len(self.actions)]
+            strategy.env_iteration += 1
+            strategy.broker_message = ()
+
+        if is_done:
+            strategy.close()
+            strategy.env.runstop()
+
+        strategy.iteration += 1
+
+
+class BTRecorder(Recorder, bt.Analyzer):
+    pass
+
+
+class VectorEngineTest(unittest.TestCase):
+    """Testing vector engine episodes against backtrader ones"""
+
+    def run_episode(self, engine, strategy_class, recorder_class, data, config):
+        engine._log = Logger('VectorEngineTest', level=WARNING)
+        engine.addstrategy(
+            strategy_class,
+            metadata=metadata,
+            skip_frame=config['skip_frame'],
+            drawdown_call=config['drawdown_call'],
+            target_call=config['target_call'],
+        )
+        engine.broker.setcash(config['cash'])
+        engine.broker.setcommission(commission=config['commission'], leverage=config['leverage'])
+        engine.broker.set_shortcash(False)
+        engine.addsizer(bt.sizers.SizerFix, stake=config['stake'])
+        engine.addobserver(bt.observers.DrawDown)
+        engine.addanalyzer(recorder_class, _name='recorder')
+        engine.adddata(data)
+
+        episode = engine.run(stdstats=True, preload=False, oldbuysell=True)[0]
+
+        return episode.analyzers.getbyname('recorder').records, engine.broker.get_value()
+
+    def assert_same_episodes(self, config, seed):
+        rng = np.random.RandomState(seed)
+        df = random_episode(config['size'], rng)
+        Recorder.actions = tuple(rng.choice(BTgymBaseStrategy.portfolio_actions, size=200))
+
+        feed = bt.feeds.PandasDirectData(
+            dataname=df,
+            timeframe=bt.TimeFrame.Minutes,
+            datetime=0,
+            open=1,
+            high=2,
+            low=3,
+            close=4,
+            volume=5,
+            openinterest=-1,
+        )
+        feed.numrecords = df.shape[0]
+
+        reference, reference_value = self.run_episode(bt.Cerebro(), BTgymBaseStrategy, BTRecorder, feed, config)
+        records, value = self.run_episode(
+            BTgymVectorEngine(),
+            BTgymVectorStrategy,
+            Recorder,
+            BTgymVectorData.from_feed(feed),
+            config
+        )
+
+        msg = 'config: {}, seed: {}'.format(config, seed)
+        self.assertEqual(len(records), len(reference), msg=msg)
+        self.assertAlmostEqual(value, reference_value, msg=msg)
+
+        for (info, reward, is_done, raw_state), (ref_info, ref_reward, ref_is_done, ref_raw_state) in \
+                zip(records, reference):
+            step_msg = msg + ', step: {}'.format(ref_info['step'])
+            self.assertEqual(info.keys(), ref_info.keys(), msg=step_msg)
+            for key in ['step', 'time', 'action', 'broker_message']:
+                self.assertEqual(info[key], ref_info[key], msg=step_msg + ', key: ' + key)
+
+            for key in ['broker_cash', 'broker_value', 'drawdown', 'max_drawdown']:
+                self.assertAlmostEqual(info[key], ref_info[key], msg=step_msg + ', key: ' + key)
+
+            self.assertAlmostEqual(reward, ref_reward, msg=step_msg)
+            self.assertEqual(is_done, ref_is_done, msg=step_msg)
+            self.assertTrue(np.allclose(raw_state, ref_raw_state), msg=step_msg)
+
+    def test_default_config(self):
+        config = dict(
+            size=300,
+            skip_frame=1,
+            cash=100.0,
+            commission=0.001,
+            leverage=1.0,
+            stake=10,
+            drawdown_call=10,
+            target_call=10,
+        )
+        for seed in range(3):
+            self.assert_same_episodes(config, seed)
+
+    def test_leverage_and_skip_frame(self):
+        config = dict(
+            size=1000,
+            skip_frame=10,
+            cash=100.0,
+            commission=0.0001,
+            leverage=10.0,
+            stake=500,
+            drawdown_call=5,
+            target_call=5,
+        )
+        for seed in range(3):
+            self.assert_same_episodes(config, seed)
+
+    def test_margin_calls(self):
+        config = dict(
+            size=500,
+            skip_frame=3,
+            cash=20.0,
+            commission=0.001,
+            leverage=1.0,
+            stake=10,
+            drawdown_call=50,
+            target_call=50,
+        )
+        for seed in range(3):
+            self.assert_same_episodes(config, seed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -36,6 +36,8 @@ import backtrader as bt
 from btgym import BTgymServer, BTgymBaseStrategy, BTgymDataset, BTgymRendering, BTgymDataFeedServer, DictSpace
 
 from btgym.rendering import BTgymNullRendering
+from btgym.engine import BTgymVectorEngine, BTgymVectorStrategy
+from btgym.utils import clear_port, wait_for_ready, LatencyStat
 
 ############################## OpenAI Gym Environment  ##############################
 
@@ -59,7 +61,7 @@ class BTgymEnv(gym.Env):
     dataset_stat = None
 
     # Backtrader engine:
-    engine = None  # bt.Cerbro subclass for server to execute.
+    engine = None  # bt.Cerbro subclass for server to execute, or 'vector' for lightweight one.
 
     # Strategy:
     strategy = None  # strategy to use if no <engine> class been passed.
@@ -77,6 +79,20 @@ class BTgymEnv(gym.Env):
     connect_timeout = 60  # server connection timeout in seconds.
     #connect_timeout_step = 0.01  # time between retries in seconds.
 
+    # Observation delta encoding:
+    delta_observations = False  # receive only newest rows of time-embedded observation arrays.
+    last_observation = None  # client-side copy of last observation to rebuild windows from.
+
+    # Step latency instrumentation:
+    latency_stat = False  # record step phases timing on both server and env sides.
+    latency = None
+
+    # Step info collection:
+    info_history = False  # receive info of every skipped frame instead of latest one.
+
+    # Episode preparation:
+    prefetch_episode = True  # let server prepare next episode while current one runs.
+
     # Rendering:
     render_enabled = True
     render_modes = ['human', 'episode',]
@@ -107,14 +123,26 @@ class BTgymEnv(gym.Env):
                                                             overrides `filename` or any other datafeed-related args.
             strategy=None (btgym.startegy):                 strategy to be used by `engine`, any subclass of
                                                             btgym.strategy.base.BTgymBaseStrateg
-            engine=None (bt.Cerebro):                       environment simulation engine, any bt.Cerebro subclass,
-                                                            overrides `strategy` arg.
+            engine=None (bt.Cerebro, str):                  environment simulation engine, any bt.Cerebro subclass
+                                                            or BTgymVectorEngine instance, overrides `strategy` arg;
+                                                            if set to `vector` - default BTgymVectorEngine is
+                                                            configured the same way default bt.Cerebro is, with
+                                                            `strategy` expected to be BTgymVectorStrategy subclass.
             network_address=`tcp://127.0.0.1:` (str):       BTGym_server address.
             port=5500 (int):                                network port to use for server - API_shell communication.
             data_master=True (bool):                        let this environment control over data_server;
             data_network_address=`tcp://127.0.0.1:` (str):  data_server address.
             data_port=4999 (int):                           network port to use for server -- data_server communication.
             connect_timeout=60 (int):                       server connection timeout in seconds.
+            delta_observations=False (bool):                let server send only newest `skip_frame` rows of
+                                                            time-embedded observation arrays and rebuild
+                                                            full windows at client side;
+            latency_stat=False (bool):                      record step phases timing histograms, returned under
+                                                            `latency` key of get_stat() result;
+            info_history=False (bool):                      let server collect strategy info at every step and
+                                                            send info of all skipped frames with response;
+            prefetch_episode=True (bool):                   let server prepare next episode in background,
+                                                            expecting it to be requested with same reset kwargs;
             render_enabled=True (bool):                     enable rendering for this environment;
             render_modes=['human', 'episode'] (list):       `episode` - plotted episode results;
                                                             `human` - raw_state observation.
@@ -202,8 +230,8 @@ class BTgymEnv(gym.Env):
                 # Number of environment steps to skip before returning next response,
                 # e.g. if set to 10 -- agent will interact with environment every 10th episode step;
                 # Every other step agent's action is assumed to be 'hold'.
-                # Note: INFO part of environment response is a list of all skipped frame's info's,
-                #       i.e. [info[-9], info[-8], ..., info[0].
+                # Note: INFO part of environment response is a list of latest info or, if `info_history` is set,
+                #       of all skipped frame's info's, i.e. [info[-9], info[-8], ..., info[0].
         )
         # Update self attributes, remove used kwargs:
         for key in dir(self):
@@ -212,6 +240,9 @@ class BTgymEnv(gym.Env):
 
         self.metadata = {'render.modes': self.render_modes}
 
+        if self.latency_stat:
+            self.latency = LatencyStat()
+
         # Logging and verbosity control:
         if self.log is None:
             StreamHandler(sys.stdout).push_application()
@@ -287,7 +318,7 @@ class BTgymEnv(gym.Env):
             if key in kwargs.keys():
                 self.params['engine'][key] = kwargs.pop(key)
 
-        if self.engine is not None:
+        if self.engine is not None and self.engine != 'vector':
             # If full-blown bt.Cerebro() subclass has been passed:
             # Update info:
             msg = 'Custom Cerebro class used.'
@@ -302,8 +333,16 @@ class BTgymEnv(gym.Env):
             # Default configuration for Backtrader computational engine (Cerebro),
             # if no bt.Cerebro() custom subclass has been passed,
             # get base class Cerebro(), using kwargs on top of defaults:
-            self.engine = bt.Cerebro()
-            msg = 'Base Cerebro class used.'
+            if self.engine == 'vector':
+                # ...or lightweight one, if asked:
+                self.engine = BTgymVectorEngine()
+                base_strategy = BTgymVectorStrategy
+                msg = 'Vector engine used.'
+
+            else:
+                self.engine = bt.Cerebro()
+                base_strategy = BTgymBaseStrategy
+                msg = 'Base Cerebro class used.'
 
             # First, set STRATEGY configuration:
             if self.strategy is not None:
@@ -312,7 +351,7 @@ class BTgymEnv(gym.Env):
 
             else:
                 # Base class strategy :
-                self.strategy = BTgymBaseStrategy
+                self.strategy = base_strategy
                 msg2 = 'Base Strategy class used.'
 
             # Add, using kwargs on top of defaults:
@@ -458,8 +497,7 @@ class BTgymEnv(gym.Env):
             self.socket = None
 
         # 2. Kill any process using server port:
-        cmd = "kill $( lsof -i:{} -t ) > /dev/null 2>&1".format(self.port)
-        os.system(cmd)
+        clear_port(self.port, self.log)
 
         # Set up client channel:
         self.context = zmq.Context()
@@ -477,11 +515,20 @@ class BTgymEnv(gym.Env):
             connect_timeout=self.connect_timeout,
             log_level=self.log_level,
             task=self.task,
+            delta_observations=self.delta_observations,
+            latency_stat=self.latency_stat,
+            info_history=self.info_history,
+            prefetch_episode=self.prefetch_episode,
         )
         self.server.daemon = False
         self.server.start()
         # Wait for server to startup:
-        time.sleep(1)
+        try:
+            wait_for_ready(self.server, self.connect_timeout)
+
+        except (ChildProcessError, TimeoutError) as e:
+            self.log.error('Server failed to start: {}'.format(e))
+            raise ConnectionError(e)
 
         # Check connection:
         self.log.info('Server started, pinging {} ...'.format(self.network_address))
@@ -663,6 +710,9 @@ class BTgymEnv(gym.Env):
                 socket=self.socket,
                 message={'ctrl': '_reset', 'kwargs': kwargs}
             )
+            # Episode first observation is never delta-encoded:
+            self.last_observation = None
+
             # Get initial environment response:
             self.env_response = self.step(0)
 
@@ -752,10 +802,46 @@ class BTgymEnv(gym.Env):
             self.log.error(msg)
             raise ConnectionError(msg)
 
-        self.env_response = env_response ['message']
+        if self.latency is not None:
+            self.latency.add('env_round_trip', env_response['time'])
+            decode_start = time.time()
+            self.env_response = self._decode_response(env_response['message'])
+            self.latency.add('env_decode', time.time() - decode_start)
+
+        else:
+            self.env_response = self._decode_response(env_response['message'])
 
         return self.env_response
 
+    def _decode_response(self, response):
+        """
+        Rebuilds delta-encoded observation state arrays, if any, by shifting
+        windows of last observation received. See server._BTgymAnalyzer._encode_state().
+
+        Args:
+            response:   environment response as received from server
+
+        Returns:
+            environment response with full observation state
+        """
+        if type(response) != tuple or len(response) != 4 or not isinstance(response[0], dict):
+            return response
+
+        state = response[0]
+        if '_delta' in state:
+            for key, num_rows in state.pop('_delta').items():
+                try:
+                    state[key] = np.concatenate([self.last_observation[key][num_rows:], state[key]], axis=0)
+
+                except (TypeError, KeyError) as e:
+                    msg = 'Got observation delta for key `{}` without previous observation.'.format(key)
+                    self.log.exception(msg)
+                    raise RuntimeError(msg) from e
+
+        self.last_observation = state
+
+        return response
+
     def close(self):
         """
         Implementation of OpenAI Gym env.close method.
@@ -775,7 +861,15 @@ class BTgymEnv(gym.Env):
         """
         if self._force_control_mode():
             self.socket.send_pyobj({'ctrl': '_getstat'})
-            return self.socket.recv_pyobj()
+            episode_stat = self.socket.recv_pyobj()
+
+            if self.latency is not None and isinstance(episode_stat, dict):
+                # Add env-side step phases timing to server ones:
+                episode_stat['latency'] = episode_stat.get('latency', {})
+                episode_stat['latency'].update(self.latency.summary())
+                self.latency.reset()
+
+            return episode_stat
 
         else:
             return self.server_response
@@ -856,8 +950,7 @@ class BTgymEnv(gym.Env):
         # Only data_master launches/stops data_server process:
         if self.data_master:
             # 2. Kill any process using server port:
-            cmd = "kill $( lsof -i:{} -t ) > /dev/null 2>&1".format(self.data_port)
-            os.system(cmd)
+            clear_port(self.data_port, self.log)
 
             # Configure and start server:
             self.data_server = BTgymDataFeedServer(
@@ -868,8 +961,13 @@ class BTgymEnv(gym.Env):
             )
             self.data_server.daemon = False
             self.data_server.start()
-            # Wait for server to startup
-            time.sleep(1)
+            # Wait for server to startup:
+            try:
+                wait_for_ready(self.data_server, self.connect_timeout)
+
+            except (ChildProcessError, TimeoutError) as e:
+                self.log.error('Data_server failed to start: {}'.format(e))
+                raise ConnectionError(e)
 
         # Set up client channel:
         self.data_context = zmq.Context()
@@ -20,3 +20,4 @@
 from .tensorboard import BTgymMonitor  # 'cause we dont want excessive warnings about Tensorflow requrement
 
 from .tensorboard2 import BTgymMonitor2
+from .writer import BTgymSummaryWriter
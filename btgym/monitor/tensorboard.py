@@ -33,6 +33,8 @@ except:
 
     quit(1)
 
+from .writer import BTgymSummaryWriter
+
 
 class BTgymMonitor():
     """Light tensorflow 'summaries' wrapper for convenient tensorboard logging.
@@ -59,65 +61,54 @@ class BTgymMonitor():
         self.tensorboard = Tensorboard(logdir=logdir, **kwargs)
         self.logdir = logdir+subdir
         self.purge_previous = purge_previous
-        self.feed_holder = dict()
-        self.summary = None
 
         # Remove previous log files if opted:
         if self.purge_previous:
             files = glob.glob(self.logdir + '/*')
             p = psutil.Popen(['rm', '-R', ] + files, stdout=PIPE, stderr=PIPE)
 
-        # Prepare writer:
+        # Prepare writer; summaries are serialized and flushed in background, no session needed:
         self.tf.reset_default_graph()
-        self.sess = self.tf.Session()
-        self.writer = self.tf.summary.FileWriter(self.logdir, graph=self.tf.get_default_graph())
-
-
-        # Create summary:
-        summaries = []
-
-        for entry in scalars:
-            assert type(entry) == str
-            self.feed_holder[entry] = self.tf.placeholder(self.tf.float32)
-            summaries += [self.tf.summary.scalar(entry, self.feed_holder[entry],)]
+        self.writer = BTgymSummaryWriter(self.tf.summary.FileWriter(self.logdir, graph=self.tf.get_default_graph()))
 
-        for entry in images:
-            assert type(entry) == str
-            self.feed_holder[entry] = self.tf.placeholder(self.tf.uint8, [None, None, None, 3])
-            summaries += [self.tf.summary.image(entry, self.feed_holder[entry], )]
+        self.names = dict(scalars=[], images=[], histograms=[], text=[])
 
-        for entry in histograms:
-            assert type(entry) == str
-            self.feed_holder[entry] = self.tf.placeholder(self.tf.float32,[None, None],)
-            summaries += [self.tf.summary.histogram(entry, self.feed_holder[entry], )]
-
-        for entry in text:
-            assert type(entry) == str
-            self.feed_holder[entry] = self.tf.placeholder(self.tf.string)
-            summaries += [self.tf.summary.histogram(entry, self.feed_holder[entry], )]
-
-        self.summary = self.tf.summary.merge(summaries)
+        for category, entries in zip(['scalars', 'images', 'histograms', 'text'], [scalars, images, histograms, text]):
+            for entry in entries:
+                assert type(entry) == str
+                self.names[category].append(entry)
 
     def write(self, feed_dict, global_step):
         """
         Updates monitor with provided data.
         """
-        feeder = dict()
-
         # Assert feed_dict is ok:
         try:
-            for key in self.feed_holder.keys():
-                assert key in feed_dict
-                feeder.update({self.feed_holder[key]: feed_dict[key]})
-
+            for names in self.names.values():
+                for key in names:
+                    assert key in feed_dict
 
         except:
             raise AssertionError('Inconsistent monitor feed:\nGot: {}\nExpected: {}\n'.
-                                 format(feed_dict.keys(),self.feed_holder.keys())
+                                 format(feed_dict.keys(), [key for names in self.names.values() for key in names])
                                 )
-        # Write down:
-        evaluated = self.sess.run(self.summary, feed_dict=feeder)
-        self.writer.add_summary(summary=evaluated, global_step=global_step)
+        # Queue for writing:
+        if len(self.names['scalars']) > 0:
+            self.writer.add_scalars({key: feed_dict[key] for key in self.names['scalars']}, global_step)
+
+        if len(self.names['images']) > 0:
+            self.writer.add_images({key: feed_dict[key] for key in self.names['images']}, global_step)
+
+        if len(self.names['histograms']) > 0:
+            self.writer.add_histograms({key: feed_dict[key] for key in self.names['histograms']}, global_step)
+
+        if len(self.names['text']) > 0:
+            self.writer.add_text({key: feed_dict[key] for key in self.names['text']}, global_step)
+
+    def flush(self):
+        """
+        Blocks until all pending data is written.
+        """
         self.writer.flush()
 
     def close(self):
@@ -0,0 +1,291 @@
+###############################################################################
+#
+# Copyright (C) 2017 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import sys
+import time
+import zlib
+import struct
+import queue
+import threading
+
+import numpy as np
+import tensorflow as tf
+from logbook import Logger, StreamHandler, WARNING
+
+
+def encode_png(image):
+    """
+    Encodes image as PNG, in numpy.
+
+    Args:
+        image:  uint8 array of shape [height, width, channels], channels is one of 1 (grayscale), 3 (RGB), 4 (RGBA)
+
+    Returns:
+        PNG bytes
+    """
+    height, width, channels = image.shape
+    color_type = {1: 0, 3: 2, 4: 6}[channels]
+
+    # Every scanline is prefixed with zero (`None`) filter type byte:
+    raw = np.concatenate(
+        [np.zeros([height, 1], dtype=np.uint8), image.reshape([height, width * channels])],
+        axis=1
+    )
+
+    def chunk(chunk_type, data):
+        return struct.pack('>I', len(data)) + chunk_type + data + \
+            struct.pack('>I', zlib.crc32(chunk_type + data) & 0xffffffff)
+
+    return b'\x89PNG\r\n\x1a\n' + \
+        chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, color_type, 0, 0, 0)) + \
+        chunk(b'IDAT', zlib.compress(raw.tobytes(), 6)) + \
+        chunk(b'IEND', b'')
+
+
+def scalar_summary(values):
+    """
+    Args:
+        values:     dictionary of {tag: scalar value}
+
+    Returns:
+        tf.Summary proto
+    """
+    return tf.Summary(value=[tf.Summary.Value(tag=tag, simple_value=float(value)) for tag, value in values.items()])
+
+
+def image_summary(images, max_outputs=3):
+    """
+    Makes image summary, tagged the same way as `tf.summary.image` does.
+
+    Args:
+        images:         dictionary of {tag: images batch of shape [batch, height, width, channels]}
+        max_outputs:    int, maximum number of images from every batch to write
+
+    Returns:
+        tf.Summary proto
+    """
+    summary_values = []
+    for tag, batch in images.items():
+        batch = np.asarray(batch)
+        if batch.ndim == 3:
+            batch = batch[None, ...]
+
+        for i, image in enumerate(batch[:max_outputs]):
+            if max_outputs > 1:
+                image_tag = '{}/image/{}'.format(tag, i)
+
+            else:
+                image_tag = '{}/image'.format(tag)
+
+            image = np.clip(image, 0, 255).astype(np.uint8)
+            summary_values.append(
+                tf.Summary.Value(
+                    tag=image_tag,
+                    image=tf.Summary.Image(
+                        height=image.shape[0],
+                        width=image.shape[1],
+                        colorspace=image.shape[2],
+                        encoded_image_string=encode_png(image),
+                    )
+                )
+            )
+    return tf.Summary(value=summary_values)
+
+
+def histogram_summary(values, bins=30):
+    """
+    Args:
+        values:     dictionary of {tag: array}
+        bins:       int, number of histogram buckets
+
+    Returns:
+        tf.Summary proto
+    """
+    summary_values = []
+    for tag, value in values.items():
+        value = np.asarray(value, dtype=np.float64).ravel()
+        counts, edges = np.histogram(value, bins=bins)
+        summary_values.append(
+            tf.Summary.Value(
+                tag=tag,
+                histo=tf.HistogramProto(
+                    min=float(value.min()),
+                    max=float(value.max()),
+                    num=value.size,
+                    sum=float(value.sum()),
+                    sum_squares=float(np.square(value).sum()),
+                    bucket_limit=edges[1:].tolist(),
+                    bucket=counts.tolist(),
+                )
+            )
+        )
+    return tf.Summary(value=summary_values)
+
+
+def text_summary(values):
+    """
+    Args:
+        values:     dictionary of {tag: string}
+
+    Returns:
+        tf.Summary proto readable by tensorboard `text` plugin
+    """
+    return tf.Summary(
+        value=[
+            tf.Summary.Value(
+                tag=tag,
+                metadata=tf.SummaryMetadata(plugin_data=tf.SummaryMetadata.PluginData(plugin_name='text')),
+                tensor=tf.make_tensor_proto(str(value), dtype=tf.string),
+            ) for tag, value in values.items()
+        ]
+    )
+
+
+class BTgymSummaryWriter(object):
+    """
+    Asynchronous batched wrapper around `tf.summary.FileWriter`.
+
+    Summaries are put on a queue and written by background thread: raw scalar, image, histogram and text values
+    are serialized to Summary protos there, in numpy, with no session run needed; images PNG encoding
+    is done off the caller thread as well. Underlying writer gets flushed on timer or on explicit request.
+
+    Exposes `add_summary()` and `flush()` the same way `tf.summary.FileWriter` does, so it can be passed wherever
+    one is expected; other writer attributes are delegated.
+    """
+    _FLUSH = 'flush'
+    _STOP = 'stop'
+
+    def __init__(self, writer, flush_secs=10, max_queue=1000, max_images=3, log_level=WARNING):
+        """
+
+        Args:
+            writer:         tf.summary.FileWriter instance
+            flush_secs:     int, writer flush period in seconds
+            max_queue:      int, maximum number of pending summaries, `add_*` methods block when exceeded
+            max_images:     int, maximum number of images to write from every image batch
+            log_level:      int, logbook.level
+        """
+        self.writer = writer
+        self.flush_secs = flush_secs
+        self.max_images = max_images
+        StreamHandler(sys.stdout).push_application()
+        self.log = Logger('BTgymSummaryWriter', level=log_level)
+
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.closed = False
+        self.thread = threading.Thread(target=self._run, name='BTgymSummaryWriter', daemon=True)
+        self.thread.start()
+
+    def __getattr__(self, item):
+        if item == 'writer':
+            raise AttributeError(item)
+        return getattr(self.writer, item)
+
+    def add_summary(self, summary, global_step=None):
+        """
+        Queues Summary proto or its serialized string, e.g. fetched summary op value.
+        """
+        self.queue.put(('summary', summary, global_step))
+
+    def add_scalars(self, values, global_step=None):
+        """
+        Queues dictionary of {tag: scalar value}.
+        """
+        self.queue.put(('scalars', values, global_step))
+
+    def add_images(self, images, global_step=None):
+        """
+        Queues dictionary of {tag: uint8 images batch of shape [batch, height, width, channels]}.
+        """
+        self.queue.put(('images', images, global_step))
+
+    def add_histograms(self, values, global_step=None):
+        """
+        Queues dictionary of {tag: array of values}.
+        """
+        self.queue.put(('histograms', values, global_step))
+
+    def add_text(self, values, global_step=None):
+        """
+        Queues dictionary of {tag: string}.
+        """
+        self.queue.put(('text', values, global_step))
+
+    def flush(self):
+        """
+        Blocks until all summaries queued so far get written and flushed to disk.
+        """
+        if not self.closed:
+            self.queue.put((self._FLUSH, None, None))
+            self.queue.join()
+
+    def close(self):
+        """
+        Writes all pending summaries, stops background thread and closes underlying writer.
+        """
+        if not self.closed:
+            self.queue.put((self._STOP, None, None))
+            self.thread.join()
+            self.closed = True
+            self.writer.close()
+
+    def _serialize(self, kind, value):
+        if kind == 'scalars':
+            return scalar_summary(value)
+
+        elif kind == 'images':
+            return image_summary(value, self.max_images)
+
+        elif kind == 'histograms':
+            return histogram_summary(value)
+
+        elif kind == 'text':
+            return text_summary(value)
+
+        else:
+            return value
+
+    def _run(self):
+        last_flush = time.time()
+        while True:
+            try:
+                kind, value, step = self.queue.get(timeout=max(self.flush_secs - (time.time() - last_flush), 0))
+
+            except queue.Empty:
+                # Nothing came in for a flush period:
+                self.writer.flush()
+                last_flush = time.time()
+                continue
+
+            try:
+                if kind not in [self._FLUSH, self._STOP]:
+                    self.writer.add_summary(self._serialize(kind, value), step)
+
+                if kind in [self._FLUSH, self._STOP] or time.time() - last_flush >= self.flush_secs:
+                    self.writer.flush()
+                    last_flush = time.time()
+
+            except Exception as e:
+                self.log.exception('Failed to write <{}> summary: {}'.format(kind, e))
+
+            finally:
+                self.queue.task_done()
+
+            if kind == self._STOP:
+                return
@@ -20,4 +20,6 @@
 from .plotter import DrawCerebro
 
 from .renderer import BTgymRendering, BTgymNullRendering
+from .worker import BTgymRenderCanvas, BTgymRenderWorker
+from .raster import BTgymRasterCanvas
 
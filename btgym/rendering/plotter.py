@@ -20,29 +20,15 @@ import bisect
 import datetime
 import multiprocessing
 import numpy as np
-from backtrader.plot import Plot_OldSync
 
 
-class BTgymPlotter(Plot_OldSync):
-    """Hacky way to get cerebro.plot() renderings.
-    Overrides default backtrader plotter behaviour.
-    """
-
-    def __init__(self, **kwargs):
-        """
-        pass
-        """
-        super(BTgymPlotter, self).__init__(**kwargs)
+def __getattr__(name):
+    # Keeps BTgymPlotter importable from here without loading matplotlib at module import:
+    if name == 'BTgymPlotter':
+        from .bt_plotter import BTgymPlotter
+        return BTgymPlotter
 
-    def savefig(self, fig, filename, width=16, height=9, dpi=300, tight=True,):
-        """
-        We neither need picture to appear in <stdout> nor file to be written to disk (slow).
-        Just set params and return `fig` to be converted to rgb array.
-        """
-        fig.set_size_inches(width, height)
-        fig.set_dpi(dpi)
-        fig.set_tight_layout(tight)
-        fig.canvas.draw()
+    raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
 
 
 class DrawCerebro(multiprocessing.Process):
@@ -52,6 +38,8 @@ class DrawCerebro(multiprocessing.Process):
         super(DrawCerebro, self).__init__()
         self.result_pipe = result_pipe
         self.cerebro = cerebro
+        # Deferred, as backtrader.plot pulls matplotlib in:
+        from .bt_plotter import BTgymPlotter
         self.plotter = BTgymPlotter()
         self.width = width
         self.height = height
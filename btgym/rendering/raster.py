@@ -0,0 +1,259 @@
+###############################################################################
+#
+# Copyright (C) 2017 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import numpy as np
+
+
+# Line colors cycle, RGB:
+COLORS = np.asarray(
+    [
+        [31, 119, 180],
+        [255, 127, 14],
+        [44, 160, 44],
+        [214, 39, 40],
+        [148, 103, 189],
+        [140, 86, 75],
+        [227, 119, 194],
+        [127, 127, 127],
+    ],
+    dtype=np.uint8
+)
+
+# Diverging purple-white-green colormap anchors, close to `PRGn`:
+CMAP_ANCHORS = np.asarray(
+    [
+        [64, 0, 75],
+        [153, 112, 171],
+        [247, 247, 247],
+        [90, 174, 97],
+        [0, 68, 27],
+    ],
+    dtype=np.float64
+)
+
+
+def make_cmap(anchors=CMAP_ANCHORS, size=256):
+    """
+    Returns colormap lookup table of shape [size, 3] linearly interpolated between anchor colors.
+    """
+    positions = np.linspace(0, 1, len(anchors))
+    grid = np.linspace(0, 1, size)
+    return np.stack([np.interp(grid, positions, anchors[:, c]) for c in range(3)], axis=-1).astype(np.uint8)
+
+
+def draw_polyline(canvas, x, y, color):
+    """
+    Draws polyline given float pixel coordinates in place; segments with non-finite ends are skipped.
+
+    Args:
+        canvas:     uint8 array of shape [height, width, 3]
+        x:          array of column coordinates
+        y:          array of row coordinates
+        color:      RGB triplet
+    """
+    if len(x) == 1:
+        x = np.concatenate([x, x])
+        y = np.concatenate([y, y])
+
+    valid = np.isfinite(y[:-1]) & np.isfinite(y[1:]) & np.isfinite(x[:-1]) & np.isfinite(x[1:])
+    x0, y0 = x[:-1][valid], y[:-1][valid]
+    dx, dy = x[1:][valid] - x0, y[1:][valid] - y0
+    if len(x0) == 0:
+        return
+
+    # Sample every segment with one point per pixel along major axis:
+    num_points = np.ceil(np.maximum(np.abs(dx), np.abs(dy))).astype(int) + 1
+    segment = np.repeat(np.arange(len(x0)), num_points)
+    offset = np.arange(num_points.sum()) - np.repeat(np.cumsum(num_points) - num_points, num_points)
+    t = offset / np.maximum(np.repeat(num_points, num_points) - 1, 1)
+
+    cols = np.clip(np.rint(x0[segment] + t * dx[segment]).astype(int), 0, canvas.shape[1] - 1)
+    rows = np.clip(np.rint(y0[segment] + t * dy[segment]).astype(int), 0, canvas.shape[0] - 1)
+    canvas[rows, cols] = color
+
+
+def draw_markers(canvas, x, y, color, size=2):
+    """
+    Draws square markers of (2 * size + 1) pixels side at finite points.
+    """
+    valid = np.isfinite(x) & np.isfinite(y)
+    cols = np.rint(x[valid]).astype(int)
+    rows = np.rint(y[valid]).astype(int)
+    for d_row in range(-size, size + 1):
+        for d_col in range(-size, size + 1):
+            canvas[
+                np.clip(rows + d_row, 0, canvas.shape[0] - 1),
+                np.clip(cols + d_col, 0, canvas.shape[1] - 1)
+            ] = color
+
+
+class BTgymRasterCanvas():
+    """
+    Lightweight NumPy rasterizer with same drawing interface as BTgymRenderCanvas.
+    Draws line plots, heatmaps and episode panels directly into uint8 arrays of figure size,
+    no text (titles, labels and info box) is rendered.
+    """
+    def __init__(self, dpi=75, background=255, frame_color=(160, 160, 160), margin=8, **kwargs):
+        """
+        Args:
+            dpi:            figure size to pixels scaling
+            background:     background gray level
+            frame_color:    plot area frame and zero line color
+            margin:         pixels around plot area
+        """
+        self.dpi = dpi
+        self.background = background
+        self.frame_color = np.asarray(frame_color, dtype=np.uint8)
+        self.margin = margin
+        self.cmap = make_cmap()
+
+    def _new_canvas(self, figsize):
+        width, height = int(figsize[0] * self.dpi), int(figsize[1] * self.dpi)
+        return np.full([height, width, 3], self.background, dtype=np.uint8)
+
+    def _frame(self, canvas, top, bottom, left, right):
+        canvas[[top, bottom - 1], left:right] = self.frame_color
+        canvas[top:bottom, [left, right - 1]] = self.frame_color
+
+    def _draw_lines(self, canvas, series, top, bottom, left, right, num_steps=None, markers=None):
+        """
+        Draws list of 1d series scaled to common range within given plot area, series are aligned right.
+        Markers, if any, are list of (values, color) pairs drawn on same scale.
+        """
+        markers = markers if markers is not None else []
+        values = [np.asarray(s, dtype=np.float64) for s in series] + [np.asarray(m[0], dtype=np.float64) for m in markers]
+        finite = [v[np.isfinite(v)] for v in values]
+        finite = np.concatenate(finite) if len(finite) > 0 else np.zeros(0)
+        if num_steps is None:
+            num_steps = max([len(v) for v in values] + [2])
+
+        low, high = (finite.min(), finite.max()) if finite.size > 0 else (0.0, 1.0)
+        if high - low < 1e-12:
+            low, high = low - 0.5, high + 0.5
+
+        x_scale = (right - left - 3) / max(num_steps - 1, 1)
+        y_scale = (bottom - top - 3) / (high - low)
+
+        def to_pixels(v):
+            x = left + 1 + (np.arange(len(v)) + num_steps - len(v)) * x_scale
+            y = bottom - 2 - (v - low) * y_scale
+            return x, y
+
+        self._frame(canvas, top, bottom, left, right)
+        if low < 0 < high:
+            zero_row = int(round(bottom - 2 - (0 - low) * y_scale))
+            canvas[zero_row, left:right:4] = self.frame_color
+
+        for i, v in enumerate(values[:len(series)]):
+            draw_polyline(canvas, *to_pixels(v), COLORS[i % len(COLORS)])
+
+        for v, (_, color) in zip(values[len(series):], markers):
+            draw_markers(canvas, *to_pixels(v), color)
+
+    def draw_plot(self, key, data, figsize=(10, 6), **kwargs):
+        """
+        Draws every column of data of shape [num_values, num_lines] as line.
+
+        Returns:
+                rgb image as np.array of size [height, width, 3]
+        """
+        data = np.asarray(data, dtype=np.float64)
+        if len(data.shape) == 1:
+            data = data[:, None]
+
+        canvas = self._new_canvas(figsize)
+        m = self.margin
+        self._draw_lines(canvas, list(data.T), m, canvas.shape[0] - m, m, canvas.shape[1] - m)
+        return canvas
+
+    def draw_image(self, key, data, figsize=(12, 6), **kwargs):
+        """
+        Draws data of shape [width, height] as heatmap, nearest neighbour scaled to plot area.
+
+        Returns:
+                rgb image as np.array of size [height, width, 3]
+        """
+        data = np.asarray(data, dtype=np.float64)
+        canvas = self._new_canvas(figsize)
+        m = self.margin
+        height, width = canvas.shape[0] - 2 * m, canvas.shape[1] - 2 * m
+
+        finite = data[np.isfinite(data)]
+        low, high = (finite.min(), finite.max()) if finite.size > 0 else (0.0, 1.0)
+        levels = (data - low) / max(high - low, 1e-12) * (len(self.cmap) - 1)
+        levels = np.nan_to_num(levels).astype(int)
+
+        # Image rows are data columns, same as imshow(data.T):
+        rows = (np.arange(height) * data.shape[1] // height)
+        cols = (np.arange(width) * data.shape[0] // width)
+        canvas[m:m + height, m:m + width] = self.cmap[levels.T[rows[:, None], cols[None, :]]]
+        self._frame(canvas, m - 1, m + height + 1, m - 1, m + width + 1)
+        return canvas
+
+    def draw_episode(self, key, episode_data, figsize=(12, 8), **kwargs):
+        """
+        Draws price panel with buy/sell markers, followed by one panel per strategy observer.
+
+        Args:
+            key:            rendering key
+            episode_data:   dictionary of price, markers and panels data, as made by
+                            BTgymRendering.get_episode_data()
+            figsize:        figure size (in.)
+
+        Returns:
+                rgb image as np.array of size [height, width, 3]
+        """
+        canvas = self._new_canvas(figsize)
+        m = self.margin
+        panels = list(episode_data['panels'].values())
+        num_steps = max(
+            [len(v) for v in episode_data['price'].values()] +
+            [len(v) for v in episode_data['markers'].values()] +
+            [len(v) for lines in panels for v in lines.values()] + [2]
+        )
+        # Price panel is three times as high as others:
+        units = 3 + len(panels)
+        unit_height = (canvas.shape[0] - m) / units
+        bounds = [m] + [int(m + unit_height * (3 + i)) for i in range(len(panels) + 1)]
+        bounds[-1] = canvas.shape[0]
+
+        markers = [
+            (values, COLORS[2] if 'buy' in name else COLORS[3]) for name, values in episode_data['markers'].items()
+        ]
+        self._draw_lines(
+            canvas,
+            list(episode_data['price'].values()),
+            bounds[0],
+            bounds[1] - m,
+            m,
+            canvas.shape[1] - m,
+            num_steps=num_steps,
+            markers=markers,
+        )
+        for i, lines in enumerate(panels):
+            self._draw_lines(
+                canvas,
+                list(lines.values()),
+                bounds[i + 1],
+                bounds[i + 2] - m,
+                m,
+                canvas.shape[1] - m,
+                num_steps=num_steps,
+            )
+        return canvas
@@ -18,10 +18,16 @@
 ###############################################################################
 from logbook import Logger, StreamHandler, WARNING
 import sys
+import os
+import time
+import queue
+import multiprocessing
 import numpy as np
+from collections import OrderedDict
 
-#from .plotter import BTgymPlotter
-from .plotter import DrawCerebro
+from .worker import BTgymRenderCanvas, BTgymRenderWorker
+from .raster import BTgymRasterCanvas
+from ..strategy.utils import broker_message_to_str
 
 class BTgymRendering():
     """
@@ -29,6 +35,13 @@ class BTgymRendering():
 
     Note:
         Call `initialize_pyplot()` method before first render() call!
+
+        Drawing is done by separate long-lived BTgymRenderWorker process, keeping figures for every
+        rendering mode and updating those in place; episode rendering at the end of the episode is asynchronous
+        and received when requested. Set `render_worker=False` to draw within calling process.
+
+        With `render_backend='numpy'` images are drawn in-process by BTgymRasterCanvas: line plots and heatmaps only,
+        no text, at a fraction of matplotlib cost.
     """
     # Here we'll keep last rendered image for each rendering mode:
     rgb_dict = dict()
@@ -52,9 +65,14 @@ class BTgymRendering():
                             bbox={'facecolor': 'k', 'alpha': 0.3, 'pad': 3},
                             ),
         plt_backend='Agg',  # Not used.
+        render_backend='matplotlib',
+        render_worker=True,
+        render_timeout=60,
     )
     enabled = True
     ready = False
+    owner_pid = None
+    worker = None
 
     def __init__(self, render_modes, **kwargs):
         """
@@ -76,7 +94,10 @@ class BTgymRendering():
                                 fontweight='bold',
                                 color='w',
                                 bbox={'facecolor': 'k', 'alpha': 0.3, 'pad': 3},
-                                )
+                                ),
+            render_backend='matplotlib',
+            render_worker=True,
+            render_timeout=60,
         """
         # Update parameters with relevant kwargs:
         for key, value in kwargs.items():
@@ -97,7 +118,7 @@ class BTgymRendering():
         #from matplotlib.backends.backend_agg import FigureCanvasAgg as FigureCanvas
         #self.FigureCanvas = FigureCanvas
 
-        self.plt = None  # Will set it inside server process when calling initialize_pyplot().
+        self.plt = None  # Not used, drawing is done by BTgymRenderCanvas.
 
         #self.plotter = BTgymPlotter() # Modified bt.Cerebro() plotter, to get episode renderings.
 
@@ -110,18 +131,130 @@ class BTgymRendering():
         """
         Call me before use!
         [Supposed to be done inside already running server process]
+
+        Starts render worker owned by calling process, if not started yet;
+        falls back to in-process drawing if worker can not be started from here (e.g. daemonic process).
+        """
+        if self.ready and self.owner_pid == os.getpid():
+            return
+
+        self.worker = None
+        self.canvas = None
+        self.pending = dict()
+        self.results = dict()
+        self.request_count = 0
+        canvas_kwargs = dict(
+            dpi=self.render_dpi,
+            plotstyle=self.render_plotstyle,
+            cmap=self.render_cmap,
+            boxtext=self.render_boxtext,
+        )
+        if self.render_backend == 'numpy':
+            self.canvas = BTgymRasterCanvas(dpi=self.render_dpi)
+
+        elif self.render_worker:
+            try:
+                self.request_queue = multiprocessing.Queue()
+                self.result_queue = multiprocessing.Queue()
+                self.worker = BTgymRenderWorker(
+                    self.request_queue,
+                    self.result_queue,
+                    canvas_kwargs,
+                    log_level=self.log_level
+                )
+                self.worker.daemon = True
+                self.worker.start()
+
+            except AssertionError:
+                self.log.debug('Can not start render worker, rendering in-process.')
+                self.worker = None
+
+        if self.canvas is None and self.worker is None:
+            self.canvas = BTgymRenderCanvas(**canvas_kwargs)
+
+        self.owner_pid = os.getpid()
+        self.ready = True
+
+    def close(self, timeout=5):
+        """
+        Stops render worker owned by calling process, if any.
+
+        Args:
+            timeout:    seconds to wait for worker to exit before terminating it
+        """
+        if self.worker is not None and self.owner_pid == os.getpid():
+            self.request_queue.put(None)
+            self.worker.join(timeout)
+            if self.worker.is_alive():
+                self.worker.terminate()
+                self.worker.join()
+
+        self.worker = None
+        self.ready = False
+
+    def __getstate__(self):
+        # Worker and its queues belong to owner process only:
+        state = self.__dict__.copy()
+        for key in ['worker', 'canvas', 'request_queue', 'result_queue', 'pending', 'results']:
+            state.pop(key, None)
+        state['ready'] = False
+        return state
+
+    def _draw(self, key, method, wait=True, **kwargs):
+        """
+        Requests drawing of given key.
+
+        Args:
+            key:        rendering key
+            method:     name of BTgymRenderCanvas drawing method
+            wait:       if True - wait for and return image, return None immediately otherwise
+            **kwargs:   drawing method kwargs
+
+        Returns:
+            rgb array or None
+        """
+        if not self.ready or self.owner_pid != os.getpid():
+            self.initialize_pyplot()
+
+        if self.worker is None:
+            self.results[key] = getattr(self.canvas, method)(key=key, **kwargs)
+
+        else:
+            self.request_count += 1
+            self.pending[key] = self.request_count
+            self.request_queue.put((key, self.request_count, method, kwargs))
+
+        if wait:
+            return self._collect([key])[key]
+
+    def _collect(self, keys):
+        """
+        Receives worker results for latest requests of given keys, if any pending.
+
+        Returns:
+            dictionary of rgb arrays
         """
-        if not self.ready:
-            from multiprocessing import Pipe
-            self.out_pipe, self.in_pipe = Pipe()
+        deadline = time.time() + self.render_timeout
+        while self.worker is not None and any([key in self.pending for key in keys]):
+            try:
+                key, request_id, rgb_array = self.result_queue.get(timeout=0.1)
+
+            except queue.Empty:
+                if not self.worker.is_alive() or time.time() > deadline:
+                    self.log.warning('Render worker failed to respond in time, using empty images.')
+                    for key in keys:
+                        self.pending.pop(key, None)
+                    break
+
+                continue
+
+            if rgb_array is not None:
+                self.results[key] = rgb_array
 
-            if self.plt is None:
-                import matplotlib
-                matplotlib.use(self.plt_backend, force=True)
-                import matplotlib.pyplot as plt
+            if self.pending.get(key, 0) <= request_id:
+                self.pending.pop(key, None)
 
-            self.plt = plt
-            self.ready = True
+        return {key: self.results.get(key, self.rgb_empty()) for key in keys}
 
     def to_string(self, dictionary, excluded=[]):
         """
@@ -180,9 +313,14 @@ class BTgymRendering():
                 except:
                     info_dict = {}
 
-        # Add records:
+        # Add records, keeping received info intact:
+        info_dict = dict(info_dict)
         info_dict.update(reward=reward, is_done=done,)
 
+        # Structured broker message gets formatted only here:
+        if 'broker_message' in info_dict:
+            info_dict['broker_message'] = broker_message_to_str(info_dict['broker_message'])
+
         # Try to get step information:
         try:
             current_step = info_dict['step']
@@ -228,7 +366,14 @@ class BTgymRendering():
             mode_list = [mode_list]
 
         if cerebro is not None:
-            self.rgb_dict['episode'] = self.draw_episode(cerebro)
+            # Do not wait for episode image, pick it up when requested:
+            self._draw(
+                'episode',
+                'draw_episode',
+                wait=False,
+                episode_data=self.get_episode_data(cerebro),
+                figsize=self.render_size_episode,
+            )
             # Try to render given episode:
             #try:
                 # Get picture of entire episode:
@@ -258,45 +403,55 @@ class BTgymRendering():
 
             # Unpack:
             raw_state, state, reward, done, info = step_to_render
+            requested = []
 
             for mode in mode_list:
                 if mode in self.render_modes and mode not in ['episode', 'human']:
                     # Render user-defined (former agent) mode state:
                     agent_state, title, box_text = self.parse_response(state, mode, reward, info, done)
-                    if self.render_state_as_image:
-                        self.rgb_dict[mode] = self.draw_image(agent_state,
-                                                                 figsize=self.render_size_state,
-                                                                 title=title,
-                                                                 box_text=box_text,
-                                                                 ylabel=self.render_ylabel,
-                                                                 xlabel=self.render_xlabel,
-                                                                 )
-                    else:
-                        self.rgb_dict[mode] = self.draw_plot(agent_state,
-                                                                figsize=self.render_size_state,
-                                                                title=title,
-                                                                box_text=box_text,
-                                                                ylabel=self.render_ylabel,
-                                                                xlabel=self.render_xlabel,
-                                                                )
+                    self._draw(
+                        mode,
+                        'draw_image' if self.render_state_as_image else 'draw_plot',
+                        wait=False,
+                        data=agent_state,
+                        figsize=self.render_size_state,
+                        title=title,
+                        box_text=box_text,
+                        ylabel=self.render_ylabel,
+                        xlabel=self.render_xlabel,
+                    )
+                    requested.append(mode)
 
                 if 'human' in mode:
                     # Render `human` state:
                     human_state, title, box_text = self.parse_response(raw_state, mode, reward, info, done)
-                    self.rgb_dict['human'] = self.draw_plot(human_state,
-                                                            figsize=self.render_size_human,
-                                                            title=title,
-                                                            box_text=box_text,
-                                                            ylabel='Price',
-                                                            xlabel=self.render_xlabel,
-                                                            line_labels=['Open', 'High', 'Low', 'Close'],
-                                                            )
+                    self._draw(
+                        'human',
+                        'draw_plot',
+                        wait=False,
+                        data=human_state,
+                        figsize=self.render_size_human,
+                        title=title,
+                        box_text=box_text,
+                        ylabel='Price',
+                        xlabel=self.render_xlabel,
+                        line_labels=['Open', 'High', 'Low', 'Close'],
+                    )
+                    requested.append('human')
+
             if send_img:
+                self.rgb_dict.update(self._collect(requested))
                 return self.rgb_dict
 
         else:
             # this case is for internal use only;
             # now `mode` supposed to contain several modes, let's return dictionary of arrays:
+            if self.ready and self.owner_pid == os.getpid():
+                self._collect(mode_list)
+                for entry in mode_list:
+                    if entry in self.results.keys():
+                        self.rgb_dict[entry] = self.results[entry]
+
             return_dict = dict()
             for entry in mode_list:
                 if entry in self.rgb_dict.keys():
@@ -325,113 +480,77 @@ class BTgymRendering():
         Returns:
                 rgb image as np.array of size [with, height, 3]
         """
-        if line_labels is None:
-            # If got no labels - make it numbers:
-            if len(data.shape) > 1:
-                line_labels = ['line_{}'.format(i) for i in data.shape[-1]]
-            else:
-                line_labels = ['line_0']
-                data = data[:, None]
-        else:
-            assert len(line_labels) == data.shape[-1], \
-                'Expected `line_labels` kwarg consist of {} names, fot: {}'. format(data.shape[-1], line_labels)
-
-        fig = self.plt.figure(figsize=figsize, dpi=self.render_dpi, )
-        #ax = fig.add_subplot(111)
-
-        self.plt.style.use(self.render_plotstyle)
-        self.plt.title(title)
-
-        # Plot x axis as reversed time-step embedding:
-        xticks = np.linspace(data.shape[0] - 1, 0, int(data.shape[0]), dtype=int)
-        self.plt.xticks(xticks.tolist(), (- xticks[::-1]).tolist(), visible=False)
-
-        # Set every 5th tick label visible:
-        for tick in self.plt.xticks()[1][::5]:
-            tick.set_visible(True)
-
-        self.plt.xlabel(xlabel)
-        self.plt.ylabel(ylabel)
-        self.plt.grid(True)
-
-        # Switch off antialiasing:
-        #self.plt.setp([ax.get_xticklines() + ax.get_yticklines() + ax.get_xgridlines() + ax.get_ygridlines()],antialiased=False)
-        #self.plt.rcParams['text.antialiased']=False
-
-        # Add Info box:
-        self.plt.text(0, data.min(), box_text, **self.render_boxtext)
-
-        for line, label in enumerate(line_labels):
-            self.plt.plot(data[:, line], label=label)
-        self.plt.legend()
-        self.plt.tight_layout()
-
-        fig.canvas.draw()
-
-        # Save it to a numpy array:
-        rgb_array = np.fromstring(fig.canvas.tostring_rgb(), dtype=np.uint8, sep='')
-
-        # Clean up:
-        self.plt.close(fig)
-        #self.plt.gcf().clear()
-
-        return rgb_array.reshape(fig.canvas.get_width_height()[::-1] + (3,))
+        return self._draw(
+            ('plot', tuple(figsize), ylabel, None if line_labels is None else tuple(line_labels)),
+            'draw_plot',
+            data=np.asarray(data),
+            figsize=figsize,
+            title=title,
+            box_text=box_text,
+            xlabel=xlabel,
+            ylabel=ylabel,
+            line_labels=line_labels,
+        )
 
     def draw_image(self, data, figsize=(12,6), title='', box_text='', xlabel='X', ylabel='Y', line_labels=None):
         """
         Visualises environment state as image.
         Returns rgb_array.
         """
-        fig = self.plt.figure(figsize=figsize, dpi=self.render_dpi, )
-        #ax = fig.add_subplot(111)
-
-        self.plt.style.use(self.render_plotstyle)
-        self.plt.title(title)
-
-        # Plot x axis as reversed time-step embedding:
-        xticks = np.linspace(data.shape[0] - 1, 0, int(data.shape[0]), dtype=int)
-        self.plt.xticks(xticks.tolist(), (- xticks[::-1]).tolist(), visible=False)
-
-        # Set every 5th tick label visible:
-        for tick in self.plt.xticks()[1][::5]:
-            tick.set_visible(True)
-
-        #self.plt.yticks(visible=False)
-
-        self.plt.xlabel(xlabel)
-        self.plt.ylabel(ylabel)
-        self.plt.grid(False)
-
-        # Switch off antialiasing:
-        # self.plt.setp([ax.get_xticklines() + ax.get_yticklines() + ax.get_xgridlines() + ax.get_ygridlines()],antialiased=False)
-        # self.plt.rcParams['text.antialiased']=False
-        #self.log.warning('render_data_shape:{}'.format(data.shape))
-
-        # Add Info box:
-        self.plt.text(0, data.shape[1] - 1, box_text, **self.render_boxtext)
-
-        im = self.plt.imshow(data.T, aspect='auto', cmap=self.render_cmap)
-        self.plt.colorbar(im, use_gridspec=True)
-
-        self.plt.tight_layout()
+        return self._draw(
+            ('image', tuple(figsize), ylabel),
+            'draw_image',
+            data=np.asarray(data),
+            figsize=figsize,
+            title=title,
+            box_text=box_text,
+            xlabel=xlabel,
+            ylabel=ylabel,
+        )
+
+    @staticmethod
+    def get_episode_data(cerebro):
+        """
+        Extracts compact episode plotting data from strategy instance of completed cerebro run:
+        datafeed close prices, buy/sell markers and every other observer lines.
 
-        fig.canvas.draw()
+        Args:
+            cerebro instance
 
-        # Save it to a numpy array:
-        rgb_array = np.fromstring(fig.canvas.tostring_rgb(), dtype=np.uint8, sep='')
+        Returns:
+            dictionary of arrays
+        """
+        if hasattr(cerebro, 'get_episode_data'):
+            # Lightweight engines make it by themselves:
+            return cerebro.get_episode_data()
+
+        strategy = cerebro.runstrats[0][0]
+        episode_data = dict(
+            price=OrderedDict([('close', np.asarray(strategy.datas[0].lines.close.array))]),
+            markers=OrderedDict(),
+            panels=OrderedDict(),
+        )
+        for observer in strategy.observers:
+            name = type(observer).__name__
+            lines = OrderedDict(
+                [
+                    (alias, np.asarray(observer.lines[i].array))
+                    for i, alias in enumerate(observer.lines.getlinealiases())
+                ]
+            )
+            if name == 'BuySell':
+                episode_data['markers'].update(lines)
 
-        # Clean up:
-        self.plt.close(fig)
-        #self.plt.gcf().clear()
+            else:
+                while name in episode_data['panels']:
+                    name += '_'
+                episode_data['panels'][name] = lines
 
-        #ax.cla()
-        return rgb_array.reshape(fig.canvas.get_width_height()[::-1] + (3,))
+        return episode_data
 
     def draw_episode(self, cerebro):
         """
-        Hacky way to render episode.
-        Due to backtrader/matplotlib memory leaks have to encapsulate it in separate process.
-        Strange but reliable. PID's are driving crazy.
+        Renders episode given completed cerebro run.
 
         Args:
             cerebro instance
@@ -439,25 +558,12 @@ class BTgymRendering():
         Returns:
             rgb array.
         """
-        draw_process = DrawCerebro(cerebro=cerebro,
-                                   width=self.render_size_episode[0],
-                                   height=self.render_size_episode[1],
-                                   dpi=self.render_dpi,
-                                   result_pipe=self.in_pipe,
-                                   )
-
-        draw_process.start()
-        #print('Plotter PID: {}'.format(draw_process.pid))
-        try:
-            rgb_array = self.out_pipe.recv()
-
-            draw_process.terminate()
-            draw_process.join()
-
-            return rgb_array
-
-        except:
-            return self.rgb_empty()
+        return self._draw(
+            'episode',
+            'draw_episode',
+            episode_data=self.get_episode_data(cerebro),
+            figsize=self.render_size_episode,
+        )
 
 
 class BTgymNullRendering():
@@ -476,6 +582,9 @@ class BTgymNullRendering():
     def initialize_pyplot(self):
         pass
 
+    def close(self, *args, **kwargs):
+        pass
+
     def render(self, mode_list, **kwargs):
         # self.log.debug('render() call to environment with disabled rendering. Returning dict of null-images.')
         if type(mode_list) == str:
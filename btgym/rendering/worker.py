@@ -0,0 +1,338 @@
+###############################################################################
+#
+# Copyright (C) 2017 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+import sys
+import queue
+import multiprocessing
+import contextlib
+import numpy as np
+from collections import OrderedDict
+
+
+class BTgymRenderCanvas():
+    """
+    Keeps matplotlib figure and artists once created for every rendering key and updates those in place.
+    Draws on Agg canvases directly, bypassing pyplot figures management.
+    """
+    def __init__(self, dpi=75, plotstyle='seaborn', cmap='PRGn', boxtext=None):
+        """
+        Args:
+            dpi:        figures dpi
+            plotstyle:  matplotlib style name
+            cmap:       colormap name for images
+            boxtext:    dict of info box text properties
+        """
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        import matplotlib.style
+
+        self.Figure = Figure
+        self.FigureCanvas = FigureCanvasAgg
+        self.mpl_style = matplotlib.style
+        self.dpi = dpi
+        self.plotstyle = self._find_style(plotstyle)
+        self.cmap = cmap
+        self.boxtext = boxtext if boxtext is not None else {}
+        self.figures = dict()
+
+    def _find_style(self, plotstyle):
+        """
+        Returns matplotlib style name available with installed version, None if not found.
+        Seaborn styles are named `seaborn-v0_8*` since matplotlib 3.6.
+        """
+        for name in [plotstyle, plotstyle.replace('seaborn', 'seaborn-v0_8', 1)]:
+            if name in self.mpl_style.available:
+                return name
+
+        return None
+
+    def _style(self):
+        """
+        Artists take style properties at creation time, so all building is done under style context.
+        """
+        if self.plotstyle is None:
+            return contextlib.ExitStack()
+
+        return self.mpl_style.context(self.plotstyle)
+
+    def _new_figure(self, figsize):
+        fig = self.Figure(figsize=figsize, dpi=self.dpi)
+        self.FigureCanvas(fig)
+        return fig
+
+    @staticmethod
+    def _to_rgb(fig):
+        fig.canvas.draw()
+        width, height = fig.canvas.get_width_height()
+        rgba = np.frombuffer(fig.canvas.buffer_rgba(), dtype=np.uint8).reshape(height, width, 4)
+        return rgba[..., :3].copy()
+
+    @staticmethod
+    def _set_time_ticks(ax, length):
+        # Plot x axis as reversed time-step embedding, every 5th tick label visible:
+        xticks = np.linspace(length - 1, 0, int(length), dtype=int)
+        ax.set_xticks(xticks.tolist())
+        ax.set_xticklabels((- xticks[::-1]).tolist())
+        for i, tick in enumerate(ax.get_xticklabels()):
+            tick.set_visible(i % 5 == 0)
+
+    def draw_plot(self, key, data, figsize=(10, 6), title='', box_text='', xlabel='X', ylabel='Y', line_labels=None):
+        """
+        Visualises data as 2d line plot.
+
+        Args:
+            key:            rendering key, figure is reused for same key and layout
+            data:           np.array of shape [num_values, num_lines]
+            figsize:        figure size (in.)
+            title:
+            box_text:
+            xlabel:
+            ylabel:
+            line_labels:    iterable holding line legends as str
+
+        Returns:
+                rgb image as np.array of size [height, width, 3]
+        """
+        data = np.asarray(data)
+        if len(data.shape) == 1:
+            data = data[:, None]
+
+        if line_labels is None:
+            # If got no labels - make it numbers:
+            line_labels = ['line_{}'.format(i) for i in range(data.shape[-1])]
+
+        else:
+            assert len(line_labels) == data.shape[-1], \
+                'Expected `line_labels` kwarg consist of {} names, got: {}'.format(data.shape[-1], line_labels)
+
+        layout = ('plot', tuple(figsize), data.shape[0], tuple(line_labels), xlabel, ylabel)
+        entry = self.figures.get(key)
+
+        if entry is None or entry['layout'] != layout:
+            with self._style():
+                fig = self._new_figure(figsize)
+                ax = fig.add_subplot(111)
+                title_artist = ax.set_title(title)
+                self._set_time_ticks(ax, data.shape[0])
+                ax.set_xlabel(xlabel)
+                ax.set_ylabel(ylabel)
+                ax.grid(True)
+                lines = [ax.plot(data[:, i], label=label)[0] for i, label in enumerate(line_labels)]
+                ax.legend()
+                # Add Info box:
+                text = ax.text(0, data.min(), box_text, **self.boxtext)
+                fig.tight_layout()
+
+            entry = dict(layout=layout, fig=fig, ax=ax, lines=lines, title=title_artist, text=text)
+            self.figures[key] = entry
+
+        else:
+            for i, line in enumerate(entry['lines']):
+                line.set_ydata(data[:, i])
+            entry['ax'].relim()
+            entry['ax'].autoscale_view()
+            entry['title'].set_text(title)
+            entry['text'].set_text(box_text)
+            entry['text'].set_position((0, data.min()))
+
+        return self._to_rgb(entry['fig'])
+
+    def draw_image(self, key, data, figsize=(12, 6), title='', box_text='', xlabel='X', ylabel='Y', **kwargs):
+        """
+        Visualises data of shape [width, height] as image.
+
+        Returns:
+                rgb image as np.array of size [height, width, 3]
+        """
+        data = np.asarray(data)
+        layout = ('image', tuple(figsize), data.shape, xlabel, ylabel)
+        entry = self.figures.get(key)
+
+        if entry is None or entry['layout'] != layout:
+            with self._style():
+                fig = self._new_figure(figsize)
+                ax = fig.add_subplot(111)
+                title_artist = ax.set_title(title)
+                self._set_time_ticks(ax, data.shape[0])
+                ax.set_xlabel(xlabel)
+                ax.set_ylabel(ylabel)
+                ax.grid(False)
+                # Add Info box:
+                text = ax.text(0, data.shape[1] - 1, box_text, **self.boxtext)
+                image = ax.imshow(data.T, aspect='auto', cmap=self.cmap)
+                colorbar = fig.colorbar(image, ax=ax, use_gridspec=True)
+                fig.tight_layout()
+
+            entry = dict(layout=layout, fig=fig, image=image, colorbar=colorbar, title=title_artist, text=text)
+            self.figures[key] = entry
+
+        else:
+            entry['image'].set_data(data.T)
+            entry['image'].set_clim(data.min(), data.max())
+            entry['colorbar'].update_normal(entry['image'])
+            entry['title'].set_text(title)
+            entry['text'].set_text(box_text)
+
+        return self._to_rgb(entry['fig'])
+
+    def draw_episode(self, key, episode_data, figsize=(12, 8), title=''):
+        """
+        Visualises episode as price panel with trades markers, followed by one panel per strategy observer.
+
+        Args:
+            key:            rendering key
+            episode_data:   dictionary of price, markers and panels data, as made by
+                            BTgymRendering.get_episode_data()
+            figsize:        figure size (in.)
+            title:
+
+        Returns:
+                rgb image as np.array of size [height, width, 3]
+        """
+        # Flat map of all series to draw:
+        series = OrderedDict()
+        for group in ['price', 'markers']:
+            for name, values in episode_data[group].items():
+                series[(group, name)] = np.asarray(values, dtype=np.float64)
+
+        for panel, lines in episode_data['panels'].items():
+            for name, values in lines.items():
+                series[(panel, name)] = np.asarray(values, dtype=np.float64)
+
+        num_steps = max([len(values) for values in series.values()] + [1])
+
+        def xy(values):
+            # Align right to episode end:
+            return np.arange(num_steps - len(values), num_steps), values
+
+        layout = ('episode', tuple(figsize), tuple(series.keys()))
+        entry = self.figures.get(key)
+
+        if entry is None or entry['layout'] != layout:
+            panels = list(episode_data['panels'].keys())
+            with self._style():
+                fig = self._new_figure(figsize)
+                axes = fig.subplots(
+                    len(panels) + 1,
+                    1,
+                    sharex=True,
+                    squeeze=False,
+                    gridspec_kw={'height_ratios': [3] + [1] * len(panels)},
+                )[:, 0]
+                axes_map = {'price': axes[0], 'markers': axes[0]}
+                axes_map.update({panel: ax for panel, ax in zip(panels, axes[1:])})
+
+                artists = OrderedDict()
+                for (group, name), values in series.items():
+                    if group == 'markers':
+                        is_buy = 'buy' in name
+                        artists[(group, name)] = axes_map[group].plot(
+                            *xy(values),
+                            linestyle='',
+                            marker='^' if is_buy else 'v',
+                            color='g' if is_buy else 'r',
+                            label=name,
+                        )[0]
+
+                    else:
+                        artists[(group, name)] = axes_map[group].plot(*xy(values), label=name)[0]
+
+                axes[0].set_ylabel('Price')
+                for panel, ax in zip(panels, axes[1:]):
+                    ax.set_ylabel(panel)
+
+                for ax in axes:
+                    ax.grid(True)
+                    ax.legend(loc='upper left')
+
+                axes[-1].set_xlabel('Episode steps')
+                title_artist = axes[0].set_title(title)
+                fig.tight_layout()
+
+            entry = dict(layout=layout, fig=fig, axes=axes, artists=artists, title=title_artist)
+            self.figures[key] = entry
+
+        else:
+            for series_key, artist in entry['artists'].items():
+                artist.set_data(*xy(series[series_key]))
+
+            for ax in entry['axes']:
+                ax.relim()
+                ax.autoscale_view()
+
+            entry['title'].set_text(title)
+
+        return self._to_rgb(entry['fig'])
+
+
+class BTgymRenderWorker(multiprocessing.Process):
+    """
+    Long-lived rendering process. Receives drawing requests as (key, request_id, method_name, kwargs) tuples
+    and sends back (key, request_id, rgb_array) results. When falling behind, only latest request
+    for every key is drawn, stale ones are dropped.
+    """
+    def __init__(self, request_queue, result_queue, canvas_kwargs=None, log_level=None):
+        """
+        Args:
+            request_queue:  multiprocessing.Queue instance, `None` item stops worker
+            result_queue:   multiprocessing.Queue instance
+            canvas_kwargs:  dict of BTgymRenderCanvas kwargs
+            log_level:      int, logbook.level
+        """
+        super(BTgymRenderWorker, self).__init__()
+        self.request_queue = request_queue
+        self.result_queue = result_queue
+        self.canvas_kwargs = canvas_kwargs if canvas_kwargs is not None else {}
+        self.log_level = log_level
+
+    def run(self):
+        from logbook import Logger, StreamHandler, WARNING
+        StreamHandler(sys.stdout).push_application()
+        if self.log_level is None:
+            self.log_level = WARNING
+        self.log = Logger('BTgymRenderWorker', level=self.log_level)
+
+        canvas = BTgymRenderCanvas(**self.canvas_kwargs)
+
+        while True:
+            # Block till got any, than take everything queued so far:
+            requests = OrderedDict()
+            request = self.request_queue.get()
+            while True:
+                if request is None:
+                    return None
+
+                requests.pop(request[0], None)
+                requests[request[0]] = request
+                try:
+                    request = self.request_queue.get_nowait()
+
+                except queue.Empty:
+                    break
+
+            for key, request_id, method, kwargs in requests.values():
+                try:
+                    rgb_array = getattr(canvas, method)(key=key, **kwargs)
+
+                except Exception:
+                    # Let client fall back to empty image:
+                    self.log.exception('Failed to draw <{}> with {}():'.format(key, method))
+                    rgb_array = None
+
+                self.result_queue.put((key, request_id, rgb_array))
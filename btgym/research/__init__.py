@@ -3,7 +3,37 @@
 # Can be unstable, buggy, poor performing and generally is subject to change.
 #
 
+import importlib
+
 from .gps import *
-from .policy_rl2 import AacRL2Policy
-from .strategy_gen_4 import *
-from .noisynet import NoisyNetUnreal
+
+# Classes are imported on first access, so strategies can be used without tensorflow installed:
+_LAZY_IMPORTS = {
+    'AacRL2Policy': '.policy_rl2',
+    'NoisyNetUnreal': '.noisynet',
+    'DevStrat_4_6': '.strategy_gen_4',
+    'DevStrat_4_7': '.strategy_gen_4',
+    'DevStrat_4_8': '.strategy_gen_4',
+    'DevStrat_4_9': '.strategy_gen_4',
+    'DevStrat_4_10': '.strategy_gen_4',
+    'DevStrat_4_11': '.strategy_gen_4',
+    'DevStrat_4_12': '.strategy_gen_4',
+}
+
+__all__ = list(_LAZY_IMPORTS.keys())
+
+
+def __getattr__(name):
+    try:
+        module_name = _LAZY_IMPORTS[name]
+
+    except KeyError:
+        raise AttributeError('module {!r} has no attribute {!r}'.format(__name__, name))
+
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals().keys()) + __all__)
@@ -92,7 +92,10 @@ class bVAENPolicy(AacStackedRL2Policy):
         self.lstm_class = lstm_class_ref
         self.lstm_layers = lstm_layers
         self.aux_estimate = aux_estimate
+        self.pc_estimator_stride = kwargs['pc_estimator_stride']
         self.callback = {}
+        self.batch_callback = {}
+        self.inference_callables = None
         self.encode_internal_state = encode_internal_state
         self.debug = {}
 
@@ -437,7 +440,7 @@ class bVAENPolicy(AacStackedRL2Policy):
 
         # Callbacks:
         if self.aux_estimate:
-            self.callback['pixel_change'] = self.get_pc_target
+            self.batch_callback['pixel_change'] = self.get_pc_target_batch
 
     def get_initial_features(self, state, context=None):
         """
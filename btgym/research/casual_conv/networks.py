@@ -16,6 +16,7 @@ def conv_1d_casual_encoder(
         conv_1d_filter_size=2,
         conv_1d_activation=tf.nn.elu,
         conv_1d_overlap=1,
+        conv_1d_norm_axis=1,
         name='casual_encoder',
         reuse=False,
         collections=None,
@@ -26,6 +27,11 @@ def conv_1d_casual_encoder(
 
     Stage1 casual convolutions network: from 1D input to estimated features.
 
+    Note:
+        `conv_1d_norm_axis` is layer normalisation `begin_norm_axis`: default value normalizes every layer output
+        over both time and channels dimensions; set to -1 to normalize channels at every time position
+        independently, as required by `conv_1d_casual_encoder_step()`.
+
     Returns:
         tensor holding state features;
     """
@@ -73,7 +79,7 @@ def conv_1d_casual_encoder(
             # b2t:
             y = tf.reshape(y, [-1, num_time_batches, conv_1d_num_filters], name='layer_{}_output'.format(i))
 
-            y = norm_layer(y)
+            y = norm_layer(y, begin_norm_axis=conv_1d_norm_axis)
             if conv_1d_activation is not None:
                 y = conv_1d_activation(y)
 
@@ -106,6 +112,125 @@ def conv_1d_casual_encoder(
     return encoded
 
 
+def casual_encoder_queue_sizes(time_dim, conv_1d_filter_size=2, conv_1d_overlap=1, **kwargs):
+    """
+    Computes lengths of per-layer activation queues streaming casual encoder should keep.
+
+    Layer `i` queue holds layer outputs for most recent time steps; it should be long enough to feed next
+    layer dilated convolution and to provide encoder output slice of `conv_1d_overlap`-defined depth.
+
+    Args:
+        time_dim:               int, encoder input time dimension, should be power of `conv_1d_filter_size`
+        conv_1d_filter_size:    int
+        conv_1d_overlap:        int
+
+    Returns:
+        list of ints
+    """
+    num_layers = int(math.log(time_dim, conv_1d_filter_size))
+    assert conv_1d_filter_size ** num_layers == time_dim, \
+        'Streaming encoder expects time dimension to be power of filter size, got: {}, {}'.\
+        format(time_dim, conv_1d_filter_size)
+
+    sizes = []
+    for i in range(num_layers):
+        stride = conv_1d_filter_size ** (i + 1)
+        depth = max(conv_1d_overlap // conv_1d_filter_size ** i, 1)
+        size = (depth - 1) * stride + 1
+        if i < num_layers - 1:
+            size = max(size, (conv_1d_filter_size - 1) * stride)
+        sizes.append(size)
+
+    return sizes
+
+
+def conv_1d_casual_encoder_step(
+        x,
+        queues=None,
+        num_steps=1,
+        conv_1d_num_filters=32,
+        conv_1d_filter_size=2,
+        conv_1d_activation=tf.nn.elu,
+        conv_1d_overlap=1,
+        name='casual_encoder',
+        reuse=True,
+        collections=None,
+        **kwargs
+    ):
+    """
+    Streaming inference counterpart of tree-shaped `conv_1d_casual_encoder`, fast-WaveNet style.
+
+    Tree-shaped encoder output for any time step equals same stack of convolutions computed as
+    stride-1 dilated casual convolutions and sampled with layer-specific stride; given per-layer queues of
+    recent outputs, only `num_steps` newest outputs of every layer should be computed,
+    so encoding cost does not depend on time dimension length (apart from number of layers).
+
+    Output is exactly equal to one of `conv_1d_casual_encoder` with same variables, provided:
+    input time dimension is power of `conv_1d_filter_size` and encoder uses position-wise normalisation
+    (`conv_1d_norm_axis=-1`).
+
+    Args:
+        x:              input tensor of shape [batch, time_dim, [1,] channels]
+        queues:         tuple of per-layer activation queues of shapes [batch, queue_size, conv_1d_num_filters],
+                        sizes as given by casual_encoder_queue_sizes(); if None - fills queues from entire input;
+        num_steps:      int, number of newest input time steps not yet seen by `queues`
+        name:           encoder variable scope, should match one of `conv_1d_casual_encoder`
+        reuse:          bool
+
+    Returns:
+        tensor holding state features;
+        tuple of updated queues.
+    """
+    with tf.variable_scope(name_or_scope=name, reuse=reuse):
+        shape = x.get_shape().as_list()
+        if len(shape) > 3:  # remove pseudo 2d dimension
+            x = x[:, :, 0, :]
+        queue_sizes = casual_encoder_queue_sizes(shape[1], conv_1d_filter_size, conv_1d_overlap)
+
+        if queues is None:
+            y = x
+        else:
+            y = x[:, -(num_steps + conv_1d_filter_size - 1):, :]
+
+        encoded = []
+        queues_out = []
+
+        for i, size in enumerate(queue_sizes):
+            # Same variables as of `conv1d_layer_i`, used with dilation instead of t2b/b2t reshapes:
+            with tf.variable_scope('conv1d_layer_{}'.format(i)):
+                w = tf.get_variable(
+                    'W',
+                    [conv_1d_filter_size, int(y.get_shape()[-1]), conv_1d_num_filters],
+                    collections=collections
+                )
+                b = tf.get_variable('b', [1, 1, conv_1d_num_filters], collections=collections)
+
+            y = tf.nn.convolution(y, w, padding='VALID', dilation_rate=[conv_1d_filter_size ** i]) + b
+
+            y = norm_layer(y, begin_norm_axis=-1)
+            if conv_1d_activation is not None:
+                y = conv_1d_activation(y)
+
+            if queues is not None:
+                y = tf.concat([queues[i], y], axis=1)
+
+            queue = y[:, -size:, :]
+            queues_out.append(queue)
+
+            # Tree-encoder layer outputs are `stride` time steps apart:
+            stride = conv_1d_filter_size ** (i + 1)
+            depth = max(conv_1d_overlap // conv_1d_filter_size ** i, 1)
+            encoded.append(queue[:, size - 1 - (depth - 1) * stride::stride, :])
+
+            if queues is not None:
+                # Only need that much to get `num_steps` outputs of next layer:
+                y = y[:, -((conv_1d_filter_size - 1) * stride + num_steps):, :]
+
+        encoded = tf.concat(encoded, axis=1, name='encoded_state')
+
+    return encoded, tuple(queues_out)
+
+
 def attention_layer(inputs, attention_ref=tf.contrib.seq2seq.LuongAttention, name='attention_layer', **kwargs):
     """
     Temporal attention layer.
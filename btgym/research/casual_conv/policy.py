@@ -1,12 +1,21 @@
 import tensorflow as tf
+import numpy as np
 
 from btgym.research.gps.policy import GuidedPolicy_0_0
-from btgym.research.casual_conv.networks import conv_1d_casual_encoder
+from btgym.research.casual_conv.networks import conv_1d_casual_encoder, conv_1d_casual_encoder_step,\
+    casual_encoder_queue_sizes
 
 
 class CasualConvPolicy_0_0(GuidedPolicy_0_0):
     """
     Casual.0.
+
+    With `conv_1d_streaming=True` on-policy external state encoder keeps per-layer activation queues as
+    part of policy context and at every act/value step computes only outputs for `conv_1d_streaming_steps` newest
+    observation time steps instead of re-encoding entire window; should be set equal to environment `skip_frame`.
+    Encoder is switched to position-wise normalisation in this case and expects
+    observation time dimension to be power of `conv_1d_filter_size`.
+    Train passes are unaffected: encoder context is not fed and full window is encoded.
     """
     def __init__(
         self,
@@ -16,10 +25,22 @@ class CasualConvPolicy_0_0(GuidedPolicy_0_0):
         conv_1d_slice_size=1,  # future use, do not modify yet
         conv_1d_activation=tf.nn.elu,
         conv_1d_use_bias=False,
+        conv_1d_streaming=False,
+        conv_1d_streaming_steps=1,
         **kwargs
     ):
         assert conv_1d_slice_size == 1
 
+        self.conv_1d_streaming = conv_1d_streaming
+        self.conv_1d_streaming_steps = conv_1d_streaming_steps
+        self.base_state_encoder_class_ref = state_encoder_class_ref
+        self.on_encoder_context_pl_flatten = []
+        self.encoder_init_context = ()
+
+        if self.conv_1d_streaming:
+            kwargs['conv_1d_norm_axis'] = -1
+            state_encoder_class_ref = self._streaming_state_encoder
+
         super().__init__(
             state_encoder_class_ref=state_encoder_class_ref,
             conv_1d_num_filters=conv_1d_num_filters,
@@ -29,4 +50,95 @@ class CasualConvPolicy_0_0(GuidedPolicy_0_0):
             conv_1d_use_bias=conv_1d_use_bias,
             **kwargs
         )
+        if self.conv_1d_streaming:
+            # Encoder context goes last, so train-time RNN context feeders just skip it:
+            self.on_lstm_state_out = tuple(self.on_lstm_state_out) + (self.on_encoder_context_out,)
+
+    def _streaming_state_encoder(self, x, ob_space, ac_space, name, reuse=False, **kwargs):
+        """
+        Wraps base encoder. For on-policy external state encoder builds three-mode graph,
+        selected by encoder context `mode` value:
+            0 - encode full window (default, train passes);
+            1 - encode full window and fill activation queues (episode start);
+            2 - streaming step given queues.
+        """
+        if reuse or name != 'conv1d_external':
+            return self.base_state_encoder_class_ref(
+                x=x,
+                ob_space=ob_space,
+                ac_space=ac_space,
+                name=name,
+                reuse=reuse,
+                **kwargs
+            )
+        # Create variables:
+        self.base_state_encoder_class_ref(x=x, ob_space=ob_space, ac_space=ac_space, name=name, reuse=False, **kwargs)
+
+        num_filters = kwargs['conv_1d_num_filters']
+        queue_sizes = casual_encoder_queue_sizes(x.get_shape().as_list()[1], **kwargs)
+
+        mode_pl = tf.placeholder_with_default(0, shape=(), name='{}_mode_pl'.format(name))
+        queues_pl = tuple(
+            [
+                tf.placeholder_with_default(
+                    tf.zeros([1, size, num_filters]),
+                    shape=[None, size, num_filters],
+                    name='{}_queue_{}_pl'.format(name, i)
+                ) for i, size in enumerate(queue_sizes)
+            ]
+        )
+
+        def full_fn():
+            encoded = self.base_state_encoder_class_ref(
+                x=x,
+                ob_space=ob_space,
+                ac_space=ac_space,
+                name=name,
+                reuse=True,
+                **kwargs
+            )
+            return encoded, queues_pl
+
+        def fill_fn():
+            encoded, _ = full_fn()
+            _, queues = conv_1d_casual_encoder_step(x, None, name=name, reuse=True, **kwargs)
+            return encoded, queues
+
+        def step_fn():
+            return conv_1d_casual_encoder_step(
+                x,
+                queues_pl,
+                num_steps=self.conv_1d_streaming_steps,
+                name=name,
+                reuse=True,
+                **kwargs
+            )
+
+        encoded, queues = tf.cond(
+            tf.equal(mode_pl, 2),
+            step_fn,
+            lambda: tf.cond(tf.equal(mode_pl, 1), fill_fn, full_fn)
+        )
+        self.on_encoder_context_pl_flatten = [mode_pl] + list(queues_pl)
+        self.on_encoder_context_out = (tf.constant(2),) + tuple(queues)
+        self.encoder_init_context = (np.int32(1),) + tuple(
+            [np.zeros([1, size, num_filters], dtype=np.float32) for size in queue_sizes]
+        )
+        return encoded
+
+    @property
+    def inference_feed_list(self):
+        feed_list = super().inference_feed_list
+        num_rnn_pl = len(self.on_lstm_state_pl_flatten)
+        return feed_list[:num_rnn_pl] + self.on_encoder_context_pl_flatten + feed_list[num_rnn_pl:]
+
+    def get_initial_features(self, state, context=None):
+        """
+        Returns RNN initial context, followed by initial encoder context if streaming is enabled.
+        """
+        if not self.conv_1d_streaming:
+            return super().get_initial_features(state=state, context=context)
 
+        if context is not None:
+            context = context[:-1]
+        return tuple(super().get_initial_features(state=state, context=context)) + (self.encoder_init_context,)
@@ -0,0 +1,72 @@
+import unittest
+import numpy as np
+import tensorflow as tf
+
+from .networks import conv_1d_casual_encoder, conv_1d_casual_encoder_step, casual_encoder_queue_sizes
+
+
+class CasualEncoderStepTest(unittest.TestCase):
+    """Testing streaming casual encoder against full window one"""
+
+    def encode(self, time_dim=32, channels=3, num_steps=1, num_shifts=8, **kwargs):
+        """
+        Encodes successive windows of same series, shifted by `num_steps`, with both encoders.
+
+        Returns:
+            list of full window encoder outputs, list of streaming encoder outputs
+        """
+        rng = np.random.RandomState(0)
+        series = rng.standard_normal((1, time_dim + num_steps * num_shifts, 1, channels)).astype(np.float32)
+        windows = [series[:, i * num_steps: i * num_steps + time_dim, ...] for i in range(num_shifts + 1)]
+
+        graph = tf.Graph()
+        with graph.as_default():
+            tf.set_random_seed(0)
+            x_pl = tf.placeholder(tf.float32, [None, time_dim, 1, channels])
+            encoded = conv_1d_casual_encoder(x_pl, None, None, conv_1d_norm_axis=-1, **kwargs)
+            fill_encoded, fill_queues = conv_1d_casual_encoder_step(x_pl, None, **kwargs)
+            queues_pl = tuple([tf.placeholder(tf.float32, q.get_shape().as_list()) for q in fill_queues])
+            step_encoded, step_queues = conv_1d_casual_encoder_step(x_pl, queues_pl, num_steps=num_steps, **kwargs)
+
+            with tf.Session() as sess:
+                sess.run(tf.global_variables_initializer())
+                full = [sess.run(encoded, {x_pl: window}) for window in windows]
+
+                streaming_encoded, queues = sess.run([fill_encoded, fill_queues], {x_pl: windows[0]})
+                streaming = [streaming_encoded]
+                for window in windows[1:]:
+                    feed_dict = {pl: value for pl, value in zip(queues_pl, queues)}
+                    feed_dict[x_pl] = window
+                    streaming_encoded, queues = sess.run([step_encoded, step_queues], feed_dict)
+                    streaming.append(streaming_encoded)
+
+        return full, streaming
+
+    def assert_equal_outputs(self, full, streaming):
+        for i, (expected, result) in enumerate(zip(full, streaming)):
+            self.assertEqual(expected.shape, result.shape)
+            self.assertTrue(np.allclose(expected, result, atol=1e-5), msg='window: {}'.format(i))
+
+    def test_single_step(self):
+        self.assert_equal_outputs(*self.encode(num_steps=1))
+
+    def test_skip_frame_steps(self):
+        self.assert_equal_outputs(*self.encode(num_steps=4))
+
+    def test_overlap(self):
+        self.assert_equal_outputs(*self.encode(num_steps=2, conv_1d_overlap=4))
+
+    def test_filter_size(self):
+        self.assert_equal_outputs(*self.encode(time_dim=27, num_steps=3, conv_1d_filter_size=3))
+
+    def test_time_dim_not_power_of_filter_size(self):
+        with self.assertRaises(AssertionError):
+            casual_encoder_queue_sizes(30, conv_1d_filter_size=2)
+
+        with tf.Graph().as_default():
+            with self.assertRaises(AssertionError):
+                conv_1d_casual_encoder_step(tf.placeholder(tf.float32, [None, 30, 1, 3]), None, reuse=False)
+
+
+if __name__ == '__main__':
+    unittest.main()
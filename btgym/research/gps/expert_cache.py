@@ -0,0 +1,161 @@
+import os
+import json
+import hashlib
+
+import numpy as np
+
+from btgym.research.gps.oracle import Oracle
+
+
+class ExpertActionsCache():
+    """
+    Expert actions distributions precomputed by Oracle once over entire dataset series,
+    so every episode expert sequence is just a slice of it.
+
+    Environment bars are formed by resampling episode data by `skip_frame` starting from episode first
+    (post-embedding) record, so bars boundaries depend on episode start position modulo `skip_frame`.
+    To keep episode slices aligned to the same boundaries `Oracle.resample_data` would give,
+    actions are estimated for every one of `skip_frame` possible boundary phases.
+
+    Note: peaks are estimated over entire series rather than per episode, so advised actions close
+    to episode ends can differ from ones estimated by `Oracle.fit` over episode data only.
+    """
+    # Processes hold loaded caches here, keyed by cache filename:
+    _loaded = {}
+
+    def __init__(self, index, actions):
+        """
+
+        Args:
+            index:      int64 array of dataset records timestamps, epoch ns
+            actions:    list of `skip_frame` arrays of expert actions distributions,
+                        i-th one holds distribution estimated for bars starting at i-th record
+        """
+        self.index = np.asarray(index, dtype=np.int64)
+        self.actions = actions
+        self.skip_frame = len(actions)
+
+    @classmethod
+    def make(cls, data, skip_frame, action_space, expert_config):
+        """
+        Estimates expert actions over entire data for every resampling phase.
+
+        Args:
+            data:               pandas dataframe of OHL[CV] values indexed by datetime
+            skip_frame:         int, resampling factor
+            action_space:       actions to advice
+            expert_config:      dict of Oracle kwargs
+
+        Returns:
+            ExpertActionsCache instance
+        """
+        expert = Oracle(action_space=action_space, **expert_config)
+        values = data.values
+        actions = [expert.fit(episode_data=values[phase:], resampling_factor=skip_frame) for phase in range(skip_frame)]
+
+        return cls(index=data.index.values.astype('datetime64[ns]').astype(np.int64), actions=actions)
+
+    @staticmethod
+    def cache_filename(data_filename, skip_frame, action_space, expert_config):
+        """
+        Returns expert actions cache filename, placed alongside dataset file
+        and keyed by Oracle parameters, `skip_frame` and dataset files size and modification time.
+        """
+        if type(data_filename) not in [list, tuple]:
+            data_filename = [data_filename]
+
+        data_files = [[os.path.getsize(name), os.path.getmtime(name)] for name in data_filename]
+        key = json.dumps(
+            dict(
+                skip_frame=int(skip_frame),
+                action_space=[int(a) for a in action_space],
+                data_files=data_files,
+                **expert_config
+            ),
+            sort_keys=True
+        )
+        return '{}.expert_{}.npz'.format(
+            os.path.splitext(data_filename[0])[0],
+            hashlib.md5(key.encode()).hexdigest()[:12]
+        )
+
+    def save(self, filename):
+        """
+        Writes cache to temporary file first and moves it in place,
+        so processes making same cache concurrently never load partially written one.
+        """
+        temp_filename = '{}.{}.tmp'.format(filename, os.getpid())
+        with open(temp_filename, 'wb') as f:
+            np.savez(
+                f,
+                index=self.index,
+                **{'actions_{}'.format(phase): actions for phase, actions in enumerate(self.actions)}
+            )
+        os.replace(temp_filename, filename)
+
+    @classmethod
+    def load(cls, filename):
+        with np.load(filename) as cache:
+            skip_frame = len([key for key in cache.files if key.startswith('actions_')])
+            return cls(
+                index=cache['index'],
+                actions=[cache['actions_{}'.format(phase)] for phase in range(skip_frame)],
+            )
+
+    @classmethod
+    def get_or_make(cls, dataset_config, skip_frame, action_space, expert_config):
+        """
+        Loads cache for given dataset and parameters; if no such cache file found - makes and saves one.
+        Once loaded, cache is kept by process.
+
+        Args:
+            dataset_config:     dict of BTgymDataset kwargs, dataset gets read only if cache is to be made
+            skip_frame:         int, resampling factor
+            action_space:       actions to advice
+            expert_config:      dict of Oracle kwargs
+
+        Returns:
+            ExpertActionsCache instance
+        """
+        filename = cls.cache_filename(dataset_config['filename'], skip_frame, action_space, expert_config)
+
+        if filename not in cls._loaded:
+            if os.path.isfile(filename):
+                cls._loaded[filename] = cls.load(filename)
+
+            else:
+                from btgym.datafeed import BTgymDataset
+
+                dataset = BTgymDataset(**dataset_config)
+                dataset.read_csv()
+                cache = cls.make(dataset.data, skip_frame, action_space, expert_config)
+                cache.save(filename)
+                cls._loaded[filename] = cache
+
+        return cls._loaded[filename]
+
+    def get(self, first_timestamp, num_records):
+        """
+        Returns expert actions for episode slice, resampled the same way `Oracle.fit` does.
+
+        Args:
+            first_timestamp:    epoch ns timestamp of episode first record
+            num_records:        int, episode length in number of dataset records
+
+        Returns:
+            np.array of size [resampled_episode_size, actions_space_size] or None if
+            episode is not found in dataset or does not fit in it
+        """
+        row = np.searchsorted(self.index, first_timestamp)
+        if row >= self.index.shape[0] or self.index[row] != first_timestamp:
+            return None
+
+        phase = row % self.skip_frame
+        first_bar = row // self.skip_frame
+        num_bars = -(-num_records // self.skip_frame)
+
+        actions = self.actions[phase]
+        if first_bar + num_bars > actions.shape[0]:
+            return None
+
+        return actions[first_bar: first_bar + num_bars]
@@ -35,6 +35,33 @@ class Oracle():
         self.kernel = signal.gaussian(kernel_size, std=kernel_stddev)
         self.data = None
 
+    @staticmethod
+    def filter_peaks(values, threshold):
+        """
+        Filters out peaks by their value difference within tolerance given, in single linear scan.
+        Going from first to last, every next peak is dropped if its value difference with last kept one
+        is less than given threshold.
+
+        Args:
+            values:     1D array of peaks values
+            threshold:  value filtering threshold
+
+        Returns:
+            1D array of kept peaks positions in `values`
+        """
+        kept = np.zeros(len(values), dtype=bool)
+        if len(values) == 0:
+            return np.nonzero(kept)[0]
+
+        kept[0] = True
+        last_value = values[0]
+        for i in range(1, len(values)):
+            if not abs(values[i] - last_value) < threshold:
+                kept[i] = True
+                last_value = values[i]
+
+        return np.nonzero(kept)[0]
+
     def filter_by_margine(self, lst, threshold):
         """
         Filters out peaks by their 'value' difference withing tolerance given.
@@ -48,18 +75,7 @@ class Oracle():
         Returns:
             filtered out list of tuples
         """
-        if len(lst) == 1:
-            return lst
-        repeated = abs(lst[1][0] - lst[0][0]) < threshold
-        if repeated:
-            if len(lst) > 2:
-                filtered_tail = self.filter_by_margine([lst[0]] + lst[2:], threshold)
-            else:
-                filtered_tail = [lst[0]]
-        else:
-            filtered_tail = [lst[0]] + self.filter_by_margine(lst[1:], threshold)
-
-        return filtered_tail
+        return [lst[i] for i in self.filter_peaks(np.asarray([value for value, index in lst]), threshold)]
 
     def estimate_actions(self, episode_data):
         """
@@ -79,26 +95,16 @@ class Oracle():
         indices = np.append(indices, [0, episode_data.shape[0] - 1])
         indices = np.sort(indices)
 
-        indices_and_values = []
-
-        for i in indices:
-            indices_and_values.append([episode_data[i], i])
-
         # Filter by value:
-        indices_and_values = self.filter_by_margine(indices_and_values, self.value_threshold)
-
-        #print('filtered_indices_and_values:', indices_and_values)
+        indices = indices[self.filter_peaks(episode_data[indices], self.value_threshold)]
+        values = episode_data[indices]
 
         # Estimate advised actions (no 'close' btw):
         # Assume all 'hold':
         advice = np.ones(episode_data.shape[0], dtype=np.uint32) * self.action_space[0]
 
-        for num, (v, i) in enumerate(indices_and_values[:-1]):
-            if v < indices_and_values[num + 1][0]:
-                advice[i] = self.action_space[1]
-
-            else:
-                advice[i] = self.action_space[2]
+        # Buy before rise, sell before fall:
+        advice[indices[:-1]] = np.where(values[:-1] < values[1:], self.action_space[1], self.action_space[2])
 
         return advice
 
@@ -107,15 +113,22 @@ class Oracle():
         Add simple heuristics (based on examining learnt policy actions distribution):
         - repeat same buy or sell signal `kernel_size - 1` times.
         """
-        i = 0
-        while i < signal.shape[0]:
-            j = 1
-            if signal[i] != 0:
-                # if got buy, sell or close  - repeat several times
-                while i + j < signal.shape[0] and j < self.kernel_size - 1:
-                    signal[i + j] = signal[i]
-                    j += 1
-            i = i + j
+        span = max(self.kernel_size - 1, 1)
+
+        # Signals falling within repeat span of preceding active one get overwritten, others start their own span:
+        starts = []
+        last_start = -span
+        for i in np.nonzero(signal)[0]:
+            if i >= last_start + span:
+                starts.append(i)
+                last_start = i
+
+        # For every position get closest active signal at or before it and spread it over span:
+        start_marker = np.full(signal.shape[0], -1)
+        start_marker[starts] = starts
+        last_start = np.maximum.accumulate(start_marker)
+        spread = (last_start >= 0) & (np.arange(signal.shape[0]) - last_start < span)
+        signal[spread] = signal[last_start[spread]]
 
         return signal
 
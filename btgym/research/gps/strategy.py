@@ -3,6 +3,7 @@ import numpy as np
 import backtrader as bt
 from btgym.research.strategy_gen_4 import DevStrat_4_12
 from btgym.research.gps.oracle import Oracle
+from btgym.research.gps.expert_cache import ExpertActionsCache
 
 from gym import spaces
 from btgym import DictSpace
@@ -100,6 +101,9 @@ class GuidedStrategy_0_0(DevStrat_4_12):
             'kernel_size': 5,     # gaussian_over_action tails size in number of env. steps
             'kernel_stddev': 1,   # gaussian_over_action standard deviation
         },
+        # If set - expert actions are estimated once over entire dataset and cached alongside dataset file,
+        # expected to be BTgymDataset kwargs dict, e.g.: {'filename': <episodes source csv file[s]>}:
+        expert_cache=None,
     )
 
     def __init__(self, **kwargs):
@@ -119,14 +123,41 @@ class GuidedStrategy_0_0(DevStrat_4_12):
 
         # Now when we know exact maximum possible episode length -
         #  can extract relevant episode data and make expert predictions:
-        data = self.datas[0].p.dataname.as_matrix()[self.inner_embedding:, :]
-
-        # Note: need to form sort of environment 'custom candels' by taking min and max price values over every
-        # skip_frame period; this is done inside Oracle class;
-        # TODO: shift actions forward to eliminate one-point prediction lag?
-        # expert_actions is a matrix representing discrete distribution over actions probabilities
-        # of size [max_env_steps, action_space_size]:
-        self.expert_actions = self.expert.fit(episode_data=data, resampling_factor=self.p.skip_frame)
+        if self.p.expert_cache is not None:
+            self.expert_actions = self.get_cached_expert_actions()
+
+        if self.expert_actions is None:
+            data = self.datas[0].p.dataname.as_matrix()[self.inner_embedding:, :]
+
+            # Note: need to form sort of environment 'custom candels' by taking min and max price values over every
+            # skip_frame period; this is done inside Oracle class;
+            # TODO: shift actions forward to eliminate one-point prediction lag?
+            # expert_actions is a matrix representing discrete distribution over actions probabilities
+            # of size [max_env_steps, action_space_size]:
+            self.expert_actions = self.expert.fit(episode_data=data, resampling_factor=self.p.skip_frame)
+
+    def get_cached_expert_actions(self):
+        """
+        Slices episode expert actions from ones precomputed over entire dataset.
+
+        Returns:
+            np.array of size [max_env_steps, action_space_size] or None if episode is not found in cached data
+        """
+        cache = ExpertActionsCache.get_or_make(
+            dataset_config=self.p.expert_cache,
+            skip_frame=self.p.skip_frame,
+            action_space=self.expert.action_space,
+            expert_config=self.p.expert_config,
+        )
+        episode_index = self.datas[0].p.dataname.index.values.astype('datetime64[ns]').astype(np.int64)
+        expert_actions = cache.get(
+            first_timestamp=episode_index[self.inner_embedding],
+            num_records=len(episode_index) - self.inner_embedding,
+        )
+        if expert_actions is None:
+            self.log.warning('Episode not found in expert actions cache, estimating over episode data.')
+
+        return expert_actions
 
     def get_expert_state(self):
         self.current_expert_action = self.expert_actions[self.env_iteration]
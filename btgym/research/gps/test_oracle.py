@@ -0,0 +1,210 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from scipy import signal
+
+from .oracle import Oracle
+from .expert_cache import ExpertActionsCache
+
+
+class ReferenceOracle(Oracle):
+    """
+    Original recursive / per-sample loop Oracle implementation, kept as a reference to test against.
+    """
+    def filter_by_margine(self, lst, threshold):
+        if len(lst) == 1:
+            return lst
+        repeated = abs(lst[1][0] - lst[0][0]) < threshold
+        if repeated:
+            if len(lst) > 2:
+                filtered_tail = self.filter_by_margine([lst[0]] + lst[2:], threshold)
+            else:
+                filtered_tail = [lst[0]]
+        else:
+            filtered_tail = [lst[0]] + self.filter_by_margine(lst[1:], threshold)
+
+        return filtered_tail
+
+    def estimate_actions(self, episode_data):
+        max_ind = signal.argrelmax(episode_data, order=self.time_threshold)
+        min_ind = signal.argrelmin(episode_data, order=self.time_threshold)
+        indices = np.append(max_ind, min_ind)
+        indices = np.append(indices, [0, episode_data.shape[0] - 1])
+        indices = np.sort(indices)
+
+        indices_and_values = []
+
+        for i in indices:
+            indices_and_values.append([episode_data[i], i])
+
+        indices_and_values = self.filter_by_margine(indices_and_values, self.value_threshold)
+
+        advice = np.ones(episode_data.shape[0], dtype=np.uint32) * self.action_space[0]
+
+        for num, (v, i) in enumerate(indices_and_values[:-1]):
+            if v < indices_and_values[num + 1][0]:
+                advice[i] = self.action_space[1]
+
+            else:
+                advice[i] = self.action_space[2]
+
+        return advice
+
+    def adjust_signals(self, signal):
+        i = 0
+        while i < signal.shape[0]:
+            j = 1
+            if signal[i] != 0:
+                while i + j < signal.shape[0] and j < self.kernel_size - 1:
+                    signal[i + j] = signal[i]
+                    j += 1
+            i = i + j
+
+        return signal
+
+
+def random_ohlc(size, rng):
+    """
+    Random walk OHLC-like price data of shape [size, 4].
+    """
+    close = 1.1 + np.cumsum(rng.standard_normal(size) * 3e-4)
+    spread = np.abs(rng.standard_normal(size)) * 2e-4
+    return np.stack([close, close + spread, close - spread, close], axis=-1)
+
+
+class OracleTest(unittest.TestCase):
+    """Testing vectorized Oracle against reference implementation"""
+
+    def test_filter_by_margine(self):
+        rng = np.random.RandomState(0)
+        oracle = Oracle()
+        reference = ReferenceOracle()
+        for i in range(200):
+            values = np.round(rng.standard_normal(rng.randint(1, 50)), 1)
+            lst = [[value, index] for index, value in enumerate(values)]
+            threshold = rng.uniform(0, 2)
+            self.assertEqual(
+                oracle.filter_by_margine(lst, threshold),
+                reference.filter_by_margine(lst, threshold)
+            )
+
+    def test_adjust_signals(self):
+        rng = np.random.RandomState(1)
+        for i in range(200):
+            kernel_size = rng.randint(1, 8)
+            oracle = Oracle(kernel_size=kernel_size)
+            reference = ReferenceOracle(kernel_size=kernel_size)
+            signals = rng.choice([0, 0, 0, 1, 2], size=rng.randint(1, 100)).astype(np.uint32)
+            self.assertTrue(
+                np.array_equal(oracle.adjust_signals(signals.copy()), reference.adjust_signals(signals.copy()))
+            )
+
+    def test_fit(self):
+        rng = np.random.RandomState(2)
+        for i in range(100):
+            config = dict(
+                time_threshold=rng.randint(1, 10),
+                pips_threshold=rng.randint(0, 20),
+                kernel_size=rng.randint(2, 8),
+            )
+            oracle = Oracle(**config)
+            reference = ReferenceOracle(**config)
+            data = random_ohlc(rng.randint(20, 1000), rng)
+            resampling_factor = rng.randint(1, 12)
+
+            self.assertTrue(
+                np.array_equal(
+                    oracle.fit(data, resampling_factor=resampling_factor),
+                    reference.fit(data, resampling_factor=resampling_factor)
+                ),
+                msg='Oracle config: {}, resampling_factor: {}'.format(config, resampling_factor)
+            )
+
+    def test_fit_long_episode(self):
+        """
+        Several days of 1 minute bars with zero filtering threshold exceed reference implementation
+        recursion depth; vectorized one should not care.
+        """
+        data = random_ohlc(60 * 24 * 5, np.random.RandomState(3))
+        distribution = Oracle(time_threshold=1, pips_threshold=0).fit(data, resampling_factor=1)
+        self.assertEqual(distribution.shape, (data.shape[0], 4))
+        self.assertTrue(np.allclose(distribution.sum(axis=-1), 1))
+
+
+class ExpertActionsCacheTest(unittest.TestCase):
+    """Testing episode slices alignment of precomputed expert actions"""
+
+    def setUp(self):
+        self.skip_frame = 7
+        self.values = random_ohlc(500, np.random.RandomState(4))
+        self.index = np.arange(self.values.shape[0], dtype=np.int64) * 60 * 10 ** 9
+        self.expert = Oracle(time_threshold=2, pips_threshold=1)
+        self.cache = ExpertActionsCache(
+            index=self.index,
+            actions=[
+                self.expert.fit(self.values[phase:], resampling_factor=self.skip_frame)
+                for phase in range(self.skip_frame)
+            ]
+        )
+
+    def test_get_series_tail(self):
+        """Every resampling phase, with no data outside episode should be the same as episode fit."""
+        for first_row in range(self.skip_frame):
+            num_records = self.values.shape[0] - first_row
+            self.assertTrue(
+                np.array_equal(
+                    self.cache.get(self.index[first_row], num_records),
+                    self.expert.fit(self.values[first_row:], resampling_factor=self.skip_frame)
+                ),
+                msg='first_row: {}'.format(first_row)
+            )
+
+    def test_get_episode_shape(self):
+        rng = np.random.RandomState(5)
+        for i in range(100):
+            first_row = rng.randint(0, 400)
+            num_records = rng.randint(5 * self.skip_frame, self.values.shape[0] - first_row)
+            self.assertEqual(
+                self.cache.get(self.index[first_row], num_records).shape,
+                self.expert.fit(
+                    self.values[first_row: first_row + num_records],
+                    resampling_factor=self.skip_frame
+                ).shape
+            )
+
+    def test_get_not_found(self):
+        self.assertIsNone(self.cache.get(self.index[10] + 1, 10))
+        self.assertIsNone(self.cache.get(self.index[-1] + 1, 10))
+        self.assertIsNone(self.cache.get(self.index[-20], 30))
+
+    def test_save_load(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            filename = os.path.join(tmp_dir, 'cache.npz')
+            self.cache.save(filename)
+            self.assertEqual(os.listdir(tmp_dir), ['cache.npz'])
+
+            cache = ExpertActionsCache.load(filename)
+            self.assertTrue(np.array_equal(cache.index, self.cache.index))
+            for actions, expected in zip(cache.actions, self.cache.actions):
+                self.assertTrue(np.array_equal(actions, expected))
+
+    def test_cache_filename_keyed_by_data_file(self):
+        """Replaced dataset file should not reuse stale cache."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data_filename = os.path.join(tmp_dir, 'data.csv')
+            with open(data_filename, 'w') as f:
+                f.write('20170301 000100;1.0;1.0;1.0;1.0;0\n')
+            args = (self.skip_frame, [0, 1, 2, 3], dict(time_threshold=2, pips_threshold=1))
+
+            filename = ExpertActionsCache.cache_filename(data_filename, *args)
+            self.assertEqual(os.path.dirname(filename), tmp_dir)
+            self.assertEqual(filename, ExpertActionsCache.cache_filename(data_filename, *args))
+
+            with open(data_filename, 'a') as f:
+                f.write('20170301 000200;1.0;1.0;1.0;1.0;0\n')
+            self.assertNotEqual(filename, ExpertActionsCache.cache_filename(data_filename, *args))
+
+
+if __name__ == '__main__':
+    unittest.main()
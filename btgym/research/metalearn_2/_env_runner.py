@@ -87,6 +87,7 @@ def MetaEnvRunnerFn(
     while True:
         terminal_end = False
         rollout = Rollout()
+        experiences = []
 
         action, logits, value, context = policy.act(last_state, last_context, last_action_reward)
 
@@ -153,10 +154,9 @@ def MetaEnvRunnerFn(
                 for key, callback in policy.callback.items():
                     experience[key] = callback(**locals())
 
-                # Bootstrap to complete and push previous experience:
+                # Bootstrap to complete previous experience:
                 last_experience['r'] = value
-                rollout.add(last_experience)
-                memory.add(last_experience)
+                experiences.append(last_experience)
 
                 # Housekeeping:
                 length += 1
@@ -300,6 +300,22 @@ def MetaEnvRunnerFn(
         else:
             last_experience['r'] = np.asarray([0.0])
 
+        experiences.append(last_experience)
+
+        # Execute user-defined batch callbacks to policy, if any;
+        # `state` holds observation following last experience of the rollout, even if episode has been reset:
+        if len(policy.batch_callback) > 0:
+            next_states = [experience['state'] for experience in experiences[1:]] + [state]
+            for key, callback in policy.batch_callback.items():
+                values = callback(states=[experience['state'] for experience in experiences], next_states=next_states)
+                for experience, callback_value in zip(experiences, values):
+                    experience[key] = callback_value
+
+        # Push all but last experience:
+        for experience in experiences[:-1]:
+            rollout.add(experience)
+            memory.add(experience)
+
         rollout.add(last_experience)
 
         # Only training rollouts are added to replay memory:
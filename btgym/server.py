@@ -18,7 +18,11 @@
 ###############################################################################
 
 import multiprocessing
+import threading
 import gc
+import os
+import signal
+import tempfile
 
 import itertools
 import zmq
@@ -28,24 +32,30 @@ import time, datetime
 import random
 from datetime import timedelta
 
+import numpy as np
 import backtrader as bt
-from .datafeed import DataSampleConfig, EnvResetConfig
+from .datafeed import BTgymBaseData, DataSampleConfig, EnvResetConfig
 from .strategy.observers import NormPnL, Position, Reward
+from .strategy.utils import broker_message_to_str
+from .utils import LatencyStat
 
 ###################### BT Server in-episode communocation method ##############
 
 
-class _BTgymAnalyzer(bt.Analyzer):
+class _BTgymEpisodeComm(object):
     """
-    This [kind of] misused analyzer handles strategy/environment communication logic
-    while in episode mode.
+    Strategy/environment communication logic while in episode mode, called every episode step.
+    Engine-agnostic: backtrader runs it as analyzer, see _BTgymAnalyzer, lightweight engines
+    call it directly, given strategy instance.
     As part of core server operational logic, it should not be explicitly called/edited.
-    Yes, it actually analyzes nothing.
     """
     log = None
     socket = None
 
-    def __init__(self):
+    def __init__(self, strategy=None):
+        if strategy is not None:
+            self.strategy = strategy
+
         # Inherit logger and ZMQ socket from parent:
         self.log = self.strategy.env._log
         self.socket = self.strategy.env._socket
@@ -58,6 +68,18 @@ class _BTgymAnalyzer(bt.Analyzer):
         self.get_timestamp = self.strategy._get_timestamp
         self.get_dataset_info = self.strategy.env._get_info
 
+        # Observation dtypes as declared by strategy `state_shape` spaces, see _cast_state():
+        self.state_dtypes = self._get_dtypes(self.strategy.p.state_shape)
+
+        # Observation delta encoding, see _encode_state():
+        self.delta_observations = self.strategy.env._delta_observations
+        self.last_state = None
+        self.last_state_iteration = None
+
+        # Step phases timing, if enabled:
+        self.latency = self.strategy.env._latency
+        self.last_handshake_time = None
+
         self.message = None
         self.step_to_render = None # Due to reset(), this will get populated before first render() call.
 
@@ -69,11 +91,158 @@ class _BTgymAnalyzer(bt.Analyzer):
         except:
             pass
 
-        self.info_list = []
+        # Full info history, if enabled, see _collect_info():
+        self.info_history = self.strategy.env._info_history
+        self.info_keys = None
+        self.info_arrays = None
+        self.info_size = 0
 
     def prenext(self):
         pass
 
+    def _collect_info(self):
+        """
+        Stores strategy info of current step. Info dictionary values are kept
+        in per-key arrays, preallocated for `skip_frame` steps at first call; float values are stored as
+        float64, any other as objects. Non-dictionary info objects are stored as is; so are
+        all info objects once info keys or type change.
+        """
+        info = self.strategy.get_info()
+        if self.info_arrays is None:
+            size = max(self.strategy.p.skip_frame, 1)
+            if isinstance(info, dict):
+                self.info_keys = list(info.keys())
+                self.info_arrays = [
+                    np.empty(size, dtype=np.float64 if isinstance(info[key], float) else object)
+                    for key in self.info_keys
+                ]
+
+            else:
+                self.info_arrays = [np.empty(size, dtype=object)]
+
+        if self.info_keys is not None and (not isinstance(info, dict) or set(info.keys()) != set(self.info_keys)):
+            self._drop_info_keys()
+
+        if self.info_size == self.info_arrays[0].shape[0]:
+            # Got more steps than expected between responses, double up:
+            self.info_arrays = [np.concatenate([array, np.empty_like(array)]) for array in self.info_arrays]
+
+        if self.info_keys is not None:
+            for i, key in enumerate(self.info_keys):
+                if self.info_arrays[i].dtype != object and not isinstance(info[key], float):
+                    # Got not a float, keep objects for this key from now on:
+                    self.info_arrays[i] = self.info_arrays[i].astype(object)
+
+                self.info_arrays[i][self.info_size] = info[key]
+
+        else:
+            self.info_arrays[0][self.info_size] = info
+
+        self.info_size += 1
+
+    def _drop_info_keys(self):
+        """
+        Switches info collection from per-key arrays to single array of info objects, keeping collected ones.
+        """
+        collected = self._get_info_history()
+        array = np.empty(self.info_arrays[0].shape[0], dtype=object)
+        for i, info in enumerate(collected):
+            array[i] = info
+
+        self.info_keys = None
+        self.info_arrays = [array]
+        self.info_size = len(collected)
+
+    def _get_info_history(self):
+        """
+        Returns list of info objects of all steps collected since last call and resets history.
+        """
+        columns = [array[:self.info_size].tolist() for array in self.info_arrays]
+        self.info_size = 0
+        if self.info_keys is not None:
+            return [dict(zip(self.info_keys, values)) for values in zip(*columns)]
+
+        else:
+            return columns[0]
+
+    @classmethod
+    def _get_dtypes(cls, space):
+        """
+        Returns [nested] dictionary of dtypes of given [nested] dictionary of spaces; None for spaces with no dtype.
+        """
+        if isinstance(space, dict):
+            return {key: cls._get_dtypes(value) for key, value in space.items()}
+
+        elif isinstance(getattr(space, 'spaces', None), dict):
+            return cls._get_dtypes(space.spaces)
+
+        else:
+            return getattr(space, 'dtype', None)
+
+    def _cast_state(self, state, dtypes):
+        """
+        Casts observation state values to dtypes of corresponding `state_shape` spaces, so observation
+        is sent and kept by every consumer as declared, e.g. float32 price windows rather than float64.
+        Values with no space or dtype declared are left as is.
+
+        Args:
+            state:      [nested] observation state as returned by strategy.get_state()
+            dtypes:     [nested] dictionary of dtypes
+
+        Returns:
+            cast state
+        """
+        if isinstance(dtypes, dict):
+            if isinstance(state, dict):
+                return {key: self._cast_state(value, dtypes.get(key)) for key, value in state.items()}
+
+            return state
+
+        elif dtypes is not None and state is not None:
+            return np.asarray(state, dtype=dtypes)
+
+        return state
+
+    def _encode_state(self, state):
+        """
+        Wire-level delta encoding of observation state: time-embedded arrays,
+        found to be shifted by number of strategy iterations passed since last response,
+        are replaced with newest rows only; names and number of rows are sent under `_delta` key.
+        Any other value, as well as first response of the episode, is sent as is.
+
+        Args:
+            state:  observation state as returned by strategy.get_state()
+
+        Returns:
+            encoded state
+        """
+        encoded = state
+        if isinstance(state, dict):
+            if self.last_state is not None:
+                num_rows = self.strategy.iteration - self.last_state_iteration
+                encoded = {}
+                delta = {}
+                for key, value in state.items():
+                    last_value = self.last_state.get(key)
+                    if isinstance(value, np.ndarray) and isinstance(last_value, np.ndarray)\
+                            and value.ndim > 0 and value.shape == last_value.shape\
+                            and 0 < num_rows < value.shape[0]\
+                            and np.array_equal(value[:-num_rows], last_value[num_rows:]):
+                        encoded[key] = value[-num_rows:]
+                        delta[key] = num_rows
+
+                    else:
+                        encoded[key] = value
+
+                if len(delta) > 0:
+                    encoded['_delta'] = delta
+
+            # Strategies are free to reuse state dictionary, keep shallow copy:
+            self.last_state = dict(state)
+            self.last_state_iteration = self.strategy.iteration
+
+        return encoded
+
     def stop(self):
         pass
 
@@ -81,7 +250,7 @@ class _BTgymAnalyzer(bt.Analyzer):
         """
         Stop, take picture and get out.
         """
-        self.log.debug('RunStop() invoked with {}'.format(self.strategy.broker_message))
+        self.log.debug('RunStop() invoked with {}'.format(broker_message_to_str(self.strategy.broker_message)))
 
         # Do final renderings, it will be kept by renderer class, not sending anywhere:
         self.render.render(self.render_at_stop, step_to_render=self.step_to_render, send_img=False)
@@ -96,21 +265,43 @@ class _BTgymAnalyzer(bt.Analyzer):
         # We'll do it every step:
         # If it's time to leave:
         is_done = self.strategy._get_done()
-        # Collect step info:
-        self.info_list.append(self.strategy.get_info())
+        is_response_step = self.strategy.iteration % self.strategy.p.skip_frame == 0 or is_done
+
+        # Collect step info, every step if full history is requested or only when it is to be sent:
+        if self.info_history:
+            self._collect_info()
+
+        elif is_response_step:
+            info = [self.strategy.get_info()]
+
         # Put agent on hold:
         self.strategy.action = 'hold'
 
         # Only if it's time to communicate or episode has come to end:
-        if self.strategy.iteration % self.strategy.p.skip_frame == 0 or is_done:
+        if is_response_step:
 
             #print('Analyzer_strat_iteration:', self.strategy.iteration)
             #print('Analyzer_env_iteration:', self.strategy.env_iteration)
 
+            latency = self.latency
+            if latency is not None:
+                phase_start = time.time()
+                if self.last_handshake_time is not None:
+                    latency.add('bar_processing', phase_start - self.last_handshake_time)
+
             # Gather response:
             raw_state = self.strategy._get_raw_state()
-            state = self.strategy.get_state()
+            state = self._cast_state(self.strategy.get_state(), self.state_dtypes)
+            if latency is not None:
+                phase_end = time.time()
+                latency.add('get_state', phase_end - phase_start)
+                phase_start = phase_end
+
             reward = self.strategy.get_reward()
+            if latency is not None:
+                phase_end = time.time()
+                latency.add('get_reward', phase_end - phase_start)
+                phase_start = phase_end
 
             # Halt and wait to receive message from outer world:
             self.message = self.socket.recv_pyobj()
@@ -154,6 +345,11 @@ class _BTgymAnalyzer(bt.Analyzer):
                 msg = 'COMM recieved: {}'.format(self.message)
                 self.log.debug(msg)
 
+            if latency is not None:
+                phase_end = time.time()
+                latency.add('socket_wait', phase_end - phase_start)
+                phase_start = phase_end
+
             # Store agent action:
             if 'action' in self.message: # now it should!
                 self.strategy.action = self.message['action']
@@ -164,9 +360,18 @@ class _BTgymAnalyzer(bt.Analyzer):
                 raise AssertionError(msg)
 
             # Send response as <o, r, d, i> tuple (Gym convention),
-            # opt to send entire info_list or just latest part:
-            info = [self.info_list[-1]]
+            # with entire info history since last response or just latest part:
+            if self.info_history:
+                info = self._get_info_history()
+
+            if self.delta_observations:
+                state = self._encode_state(state)
+
             self.socket.send_pyobj((state, reward, is_done, info))
+            if latency is not None:
+                phase_end = time.time()
+                latency.add('serialization', phase_end - phase_start)
+                phase_start = phase_end
 
             # Increment global time by sending timestamp to data_server, if authorized;
             if self.can_increment_global_time:
@@ -181,23 +386,40 @@ class _BTgymAnalyzer(bt.Analyzer):
                 )
                 global_time_response = self.data_socket.recv_pyobj()
                 self.log.debug('DATA_COMM/glob.time received: {}'.format(global_time_response))
+                if latency is not None:
+                    latency.add('data_server', time.time() - phase_start)
 
             # Back up step information for rendering.
             # It pays when using skip-frames: will'll get future state otherwise.
 
-            self.step_to_render = ({'human':raw_state}, state, reward, is_done, self.info_list)
+            self.step_to_render = ({'human':raw_state}, state, reward, is_done, info)
 
-            # Reset info:
-            self.info_list = []
             self.strategy.env_iteration += 1
 
+            if latency is not None:
+                self.last_handshake_time = time.time()
+
         # If done, initiate fallback to Control Mode:
         if is_done:
             self.early_stop()
 
         # Strategy housekeeping:
         self.strategy.iteration += 1
-        self.strategy.broker_message = '-'
+
+        # Broker events are reported with info of the step they happened at,
+        # or accumulated till next response if no full history is collected:
+        if self.info_history or is_response_step:
+            self.strategy.broker_message = ()
+
+
+class _BTgymAnalyzer(_BTgymEpisodeComm, bt.Analyzer):
+    """
+    This [kind of] misused analyzer handles strategy/environment communication logic
+    while in episode mode.
+    As part of core server operational logic, it should not be explicitly called/edited.
+    Yes, it actually analyzes nothing.
+    """
+    pass
 
     ##############################  BTgym Server Main  ##############################
 
@@ -246,6 +468,10 @@ class BTgymServer(multiprocessing.Process):
         connect_timeout=90,
         log_level=None,
         task=0,
+        delta_observations=False,
+        latency_stat=False,
+        info_history=False,
+        prefetch_episode=True,
     ):
         """
 
@@ -256,6 +482,12 @@ class BTgymServer(multiprocessing.Process):
             data_network_address:   data communication, str
             connect_timeout:        seconds, int
             log_level:              int, logbook.level
+            delta_observations:     bool, send only newest rows of time-embedded observation arrays
+            latency_stat:           bool, record step phases timing histograms, reported with episode statistic
+            info_history:           bool, collect strategy info every step and send info of all skipped frames
+                                    with response; if False - info is composed for response step only
+            prefetch_episode:       bool, prepare next episode in background while current one runs,
+                                    expecting it to be requested with same sample configuration
         """
 
         super(BTgymServer, self).__init__()
@@ -269,10 +501,28 @@ class BTgymServer(multiprocessing.Process):
         self.data_network_address = data_network_address
         self.connect_timeout = connect_timeout # server connection timeout in seconds.
         self.connect_timeout_step = 0.01
+        self.delta_observations = delta_observations
+        self.latency_stat = latency_stat
+        self.latency = None
+        self.info_history = info_history
+        self.prefetch_episode = prefetch_episode
+        self.prefetch_thread = None
+        self.prefetched = None
+        self.aux_observers = []
+
+        # Set by server process when it is ready to serve, see btgym.utils.wait_for_ready():
+        self.ready = multiprocessing.Event()
 
         self.trial_sample = None
         self.trial_stat = None
         self.dataset_stat = None
+        self.trial_origin = None
+
+        # Trial data file shared with slave environments and its handle:
+        self.shared_trial = None
+        self.shared_trial_handle = None
+        self.previous_trial_handle = None
+        self.shared_trial_num = 0
 
     @staticmethod
     def _comm_with_timeout(socket, message):
@@ -334,25 +584,32 @@ class BTgymServer(multiprocessing.Process):
             self.log.error(msg)
             raise ConnectionError(msg)
 
-    def get_trial(self, **reset_kwargs):
+    def get_trial(self, socket=None, **reset_kwargs):
         """
 
         Args:
+            socket:         data_server socket to use, default is server process one
             reset_kwargs:   dictionary of args to pass to parent data iterator
 
         Returns:
-            trial_sample, trial_stat, dataset_stat
+            trial_sample, trial_stat, dataset_stat, origin, timestamp
         """
+        is_main = socket is None
+        if is_main:
+            socket = self.data_socket
+
         wait = 0
         while True:
             # Get new data subset:
             data_server_response = self._comm_with_timeout(
-                socket=self.data_socket,
+                socket=socket,
                 message={'ctrl': '_get_data', 'kwargs': reset_kwargs}
             )
             if data_server_response['status'] in 'ok':
                 self.log.debug('Data_server @{} responded in ~{:1.6f} seconds.'.
                                format(self.data_network_address, data_server_response['time']))
+                if self.latency is not None and is_main:
+                    self.latency.add('data_server', data_server_response['time'])
 
             else:
                 msg = 'BtgymServer_sampling_attempt: data_server @{} unreachable with status: <{}>.'. \
@@ -370,6 +627,9 @@ class BTgymServer(multiprocessing.Process):
                     self.log.info(
                         'Domain dataset not ready, wait time left: {:4.2f}s.'.format(self.wait_for_data_reset - wait)
                     )
+                elif not is_main:
+                    raise RuntimeError('Failed to assert Domain dataset is ready.')
+
                 else:
                     data_server_response = self._comm_with_timeout(
                         socket=self.data_socket,
@@ -380,9 +640,30 @@ class BTgymServer(multiprocessing.Process):
                     raise RuntimeError('Failed to assert Domain dataset is ready. Exiting.')
 
             except (AssertionError, KeyError) as e:
-                break
-        # Get trial instance:
-        trial_sample = data_server_response['message']['sample']
+                pass
+
+            else:
+                continue
+
+            # Get trial instance:
+            if 'handle' in data_server_response['message']:
+                # Master environment shares its trial data by reference:
+                try:
+                    trial_sample = BTgymBaseData.from_shared(data_server_response['message']['handle'])
+
+                except FileNotFoundError:
+                    # Master has moved two trials ahead since handle was sent and removed that file, ask again:
+                    self.log.debug(
+                        'Shared trial file {} is gone, requesting trial again.'.
+                        format(data_server_response['message']['handle']['filename'])
+                    )
+                    continue
+
+            else:
+                trial_sample = data_server_response['message']['sample']
+
+            break
+
         trial_stat = trial_sample.describe()
         trial_sample.reset()
         dataset_stat = data_server_response['message']['stat']
@@ -393,16 +674,17 @@ class BTgymServer(multiprocessing.Process):
 
     def get_trial_message(self):
         """
-        Prepares  message containing current trial instance, mimicking data_server message protocol.
-        Intended for serving requests from data_slave environment.
+        Prepares  message containing current trial handle, mimicking data_server message protocol.
+        Intended for serving requests from data_slave environment: trial data is not sent
+        but shared as memory-mapped file, see share_trial().
 
         Returns:
-            dict containing trial instance, d_set statistic and origin key; dict containing 'ctrl' response if master
+            dict containing trial handle, d_set statistic and origin key; dict containing 'ctrl' response if master
             d_set is not ready;
         """
         if self.trial_sample is not None:
             message = {
-                'sample': self.trial_sample,
+                'handle': self.share_trial(),
                 'stat': self.dataset_stat,
                 'origin': 'master_environment',
                 'timestamp': self.get_global_time()
@@ -414,15 +696,59 @@ class BTgymServer(multiprocessing.Process):
 
         return message
 
-    def get_global_time(self):
+    def share_trial(self):
+        """
+        Writes current trial data to shared file, once per trial. Previous trial file is kept for one more trial,
+        so slave environment which got its handle just before trial change can still map it, and removed then;
+        slave environments still holding that trial keep their mapping valid.
+
+        Returns:
+            trial handle, see BTgymBaseData.to_shared()
+        """
+        if self.shared_trial is not self.trial_sample:
+            self._remove_shared_file(self.previous_trial_handle)
+            self.previous_trial_handle = self.shared_trial_handle
+            self.shared_trial_num += 1
+            filename = os.path.join(
+                '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(),
+                'btgym_{}_{}_trial_{}'.format(self.task, os.getpid(), self.shared_trial_num)
+            )
+            self.shared_trial_handle = self.trial_sample.to_shared(filename)
+            self.shared_trial = self.trial_sample
+            self.log.debug('Shared Trial <{}> as: {}'.format(self.trial_sample.filename, filename))
+
+        return self.shared_trial_handle
+
+    def unshare_trial(self):
+        """
+        Removes current and previous shared trial files, if any.
+        """
+        self._remove_shared_file(self.previous_trial_handle)
+        self._remove_shared_file(self.shared_trial_handle)
+        self.shared_trial = None
+        self.shared_trial_handle = None
+        self.previous_trial_handle = None
+
+    def _remove_shared_file(self, handle):
+        if handle is not None:
+            try:
+                os.remove(handle['filename'])
+
+            except OSError as e:
+                self.log.warning('Failed to remove shared trial file: {}'.format(e))
+
+    def get_global_time(self, socket=None):
         """
         Asks dataserver for current dataset global_time.
 
+        Args:
+            socket:     data_server socket to use, default is server process one
+
         Returns:
             POSIX timestamp
         """
         data_server_response = self._comm_with_timeout(
-            socket=self.data_socket,
+            socket=self.data_socket if socket is None else socket,
             message={'ctrl': '_get_global_time'}
         )
         if data_server_response['status'] in 'ok':
@@ -436,6 +762,148 @@ class BTgymServer(multiprocessing.Process):
 
         return data_server_response['message']['timestamp']
 
+    def _make_cerebro(self):
+        """
+        Makes episode engine: copy of cerebro template with server communication utilities added.
+        """
+        cerebro = copy.deepcopy(self.cerebro)
+        cerebro._socket = self.socket
+        cerebro._data_socket = self.data_socket
+        cerebro._log = self.log
+        cerebro._render = self.render
+        cerebro._delta_observations = self.delta_observations
+        cerebro._latency = self.latency
+        cerebro._info_history = self.info_history
+
+        # Pass methods for serving capabilities:
+        cerebro._get_data = self.get_trial_message
+        cerebro._get_info = self.get_dataset_stat
+
+        # Add auxillary observers, if not already (lightweight engines keep these records by themselves):
+        for aux in self.aux_observers:
+            is_added = False
+            for observer in cerebro.observers:
+                if aux in observer:
+                    is_added = True
+            if not is_added:
+                cerebro.addobserver(aux)
+
+        # Add communication utility:
+        if isinstance(cerebro, bt.Cerebro):
+            cerebro.addanalyzer(_BTgymAnalyzer, _name='_env_analyzer',)
+
+        else:
+            cerebro.addanalyzer(_BTgymEpisodeComm, _name='_env_analyzer',)
+
+        return cerebro
+
+    def _sample_episode(self, trial_sample, episode_config, current_timestamp):
+        """
+        Samples episode from trial and prepares its data feed and statistic.
+
+        Args:
+            trial_sample:       trial to sample from
+            episode_config:     dict, episode sampling configuration
+            current_timestamp:  dataset global time
+
+        Returns:
+            dict holding episode sample, its data feed and statistic and global time episode is sampled at.
+        """
+        episode_config = copy.deepcopy(episode_config)
+        if episode_config['timestamp'] is None or episode_config['timestamp'] < current_timestamp:
+            episode_config['timestamp'] = current_timestamp
+
+        self.log.info(
+            'Requesting episode from <{}> with args: {}'.format(trial_sample.filename, episode_config)
+        )
+        sample = trial_sample.sample(**episode_config)
+        self.log.debug('Got new Episode: <{}>'.format(sample.filename))
+
+        return dict(
+            sample=sample,
+            stat=sample.describe(),
+            feed=sample.to_btfeed(),
+            timestamp=episode_config['timestamp'],
+        )
+
+    def _prefetch_episode(self, sample_config, prefetch_trial):
+        """
+        Episode prefetch thread body: prepares engine, [new trial] and episode for given sample configuration.
+        Uses its own data_server socket; any error is kept to fall back to synchronous preparation.
+
+        Args:
+            sample_config:      dict, expected next reset sample configuration
+            prefetch_trial:     bool, if False - new trial is not requested ahead, only engine is prepared
+        """
+        prefetched = dict(
+            sample_config=sample_config,
+            cerebro=None,
+            trial=None,
+            trial_sample=None,
+            episode=None,
+            error=None,
+        )
+        data_socket = self.data_context.socket(zmq.REQ)
+        data_socket.setsockopt(zmq.RCVTIMEO, self.connect_timeout * 1000)
+        data_socket.setsockopt(zmq.SNDTIMEO, self.connect_timeout * 1000)
+        data_socket.connect(self.data_network_address)
+        try:
+            prefetched['cerebro'] = self._make_cerebro()
+
+            # Slave environment runs trial master one holds at reset time, no data to prepare ahead:
+            if self.trial_origin == 'data_server' and (prefetch_trial or not sample_config['trial_config']['get_new']):
+                if sample_config['trial_config']['get_new']:
+                    prefetched['trial'] = self.get_trial(socket=data_socket, **sample_config['trial_config'])
+                    trial_sample, _, _, origin, current_timestamp = prefetched['trial']
+                    trial_sample.set_logger(self.log_level, self.task)
+
+                else:
+                    trial_sample = self.trial_sample
+                    current_timestamp = self.get_global_time(socket=data_socket)
+
+                prefetched['trial_sample'] = trial_sample
+                prefetched['episode'] = self._sample_episode(
+                    trial_sample,
+                    sample_config['episode_config'],
+                    current_timestamp
+                )
+
+        except Exception as e:
+            prefetched['error'] = e
+
+        finally:
+            data_socket.close(linger=0)
+
+        self.prefetched = prefetched
+
+    def _start_prefetch(self, sample_config, prefetch_trial=True):
+        if self.prefetch_episode:
+            self.prefetch_thread = threading.Thread(
+                target=self._prefetch_episode,
+                args=(copy.deepcopy(sample_config), prefetch_trial),
+                daemon=True,
+            )
+            self.prefetch_thread.start()
+
+    def _get_prefetched(self):
+        """
+        Waits for prefetch thread to finish.
+
+        Returns:
+            prefetched episode dictionary or None
+        """
+        if self.prefetch_thread is None:
+            return None
+
+        self.prefetch_thread.join()
+        self.prefetch_thread = None
+        prefetched, self.prefetched = self.prefetched, None
+
+        if prefetched['error'] is not None:
+            self.log.warning('Episode prefetch failed with: {}, preparing episode anew.'.format(prefetched['error']))
+
+        return prefetched
+
     def run(self):
         """
         Server process runtime body. This method is invoked by env._start_server().
@@ -451,6 +919,19 @@ class BTgymServer(multiprocessing.Process):
         self.process = multiprocessing.current_process()
         self.log.info('PID: {}'.format(self.process.pid))
 
+        if self.latency_stat:
+            self.latency = LatencyStat()
+
+        # Shared trial file is kept in memory until removed, do it when terminated, see BTgymEnv._stop_server();
+        # same for render worker, which outlives server killed by default handler:
+        def terminate_handler(signum, frame):
+            self.unshare_trial()
+            self.render.close()
+            signal.signal(signum, signal.SIG_DFL)
+            os.kill(os.getpid(), signum)
+
+        signal.signal(signal.SIGTERM, terminate_handler)
+
         # Runtime Housekeeping:
         cerebro = None
         episode_result = dict()
@@ -496,13 +977,20 @@ class BTgymServer(multiprocessing.Process):
         # Init renderer:
         self.render.initialize_pyplot()
 
+        # Exclude objects alive by now (modules, templates) from collections
+        # to keep per-episode gc.collect() cheap:
+        if hasattr(gc, 'freeze'):
+            gc.freeze()
+
+        self.ready.set()
+
         # Mandatory DrawDown and auxillary plotting observers to add to data-master strategy instance:
         # TODO: make plotters optional args
         if self.render.enabled:
-            aux_obsrevers = [bt.observers.DrawDown, Reward, Position, NormPnL]
+            self.aux_observers = [bt.observers.DrawDown, Reward, Position, NormPnL]
 
         else:
-            aux_obsrevers = [bt.observers.DrawDown]
+            self.aux_observers = [bt.observers.DrawDown]
 
         # Server 'Control Mode' loop:
         for episode_number in itertools.count(0):
@@ -519,6 +1007,8 @@ class BTgymServer(multiprocessing.Process):
                         # send last run statistic, release comm channel and exit:
                         message = 'Exiting.'
                         self.log.info(message)
+                        self.unshare_trial()
+                        self.render.close()
                         self.socket.send_pyobj(message)
                         self.socket.close()
                         self.context.destroy()
@@ -568,27 +1058,6 @@ class BTgymServer(multiprocessing.Process):
 
             # Got '_reset' signal -> prepare Cerebro subclass and run episode:
             start_time = time.time()
-            cerebro = copy.deepcopy(self.cerebro)
-            cerebro._socket = self.socket
-            cerebro._data_socket = self.data_socket
-            cerebro._log = self.log
-            cerebro._render = self.render
-
-            # Pass methods for serving capabilities:
-            cerebro._get_data = self.get_trial_message
-            cerebro._get_info = self.get_dataset_stat
-
-            # Add auxillary observers, if not already:
-            for aux in aux_obsrevers:
-                is_added = False
-                for observer in cerebro.observers:
-                    if aux in observer:
-                        is_added = True
-                if not is_added:
-                    cerebro.addobserver(aux)
-
-            # Add communication utility:
-            cerebro.addanalyzer(_BTgymAnalyzer, _name='_env_analyzer',)
 
             # Data preparation:
             # Parse args we got with _reset call:
@@ -605,17 +1074,41 @@ class BTgymServer(multiprocessing.Process):
                         '_reset <{}> kwarg not found, using default values: {}'.format(key, config)
                     )
 
+            # Pick up whatever is prepared in background and still valid for this request:
+            prefetched = self._get_prefetched()
+            if prefetched is None:
+                prefetched = dict(cerebro=None, trial=None, trial_sample=None, episode=None, sample_config=None)
+
+            cerebro = prefetched['cerebro']
+            if cerebro is None:
+                cerebro = self._make_cerebro()
+
+            # Prefetched trial is valid if requested with same config and global time has not moved since:
+            trial = prefetched['trial']
+            if trial is not None:
+                if prefetched['sample_config']['trial_config'] != sample_config['trial_config']:
+                    self.log.debug('Discarding prefetched Trial <{}>: config changed.'.format(trial[0].filename))
+                    trial = None
+
+                elif trial[-1] != self.get_global_time():
+                    self.log.debug('Discarding prefetched Trial <{}>: global time changed.'.format(trial[0].filename))
+                    trial = None
+
             # Get new Trial from data_server if requested,
             # despite bult-in new/reuse data object sampling option, perform checks here to avoid
             # redundant traffic:
-            if sample_config['trial_config']['get_new'] or self.trial_sample is None:
+            if trial is not None:
+                self.trial_sample, self.trial_stat, self.dataset_stat, self.trial_origin, current_timestamp = trial
+                self.log.info('Got prefetched Trial <{}>'.format(self.trial_sample.filename))
+
+            elif sample_config['trial_config']['get_new'] or self.trial_sample is None:
                 self.log.info(
                     'Requesting new Trial sample with args: {}'.format(sample_config['trial_config'])
                 )
-                self.trial_sample, self.trial_stat, self.dataset_stat, origin, current_timestamp =\
+                self.trial_sample, self.trial_stat, self.dataset_stat, self.trial_origin, current_timestamp =\
                     self.get_trial(**sample_config['trial_config'])
 
-                if origin in 'data_server':
+                if self.trial_origin in 'data_server':
                     self.trial_sample.set_logger(self.log_level, self.task)
 
                 self.log.debug('Got new Trial: <{}>'.format(self.trial_sample.filename))
@@ -628,30 +1121,51 @@ class BTgymServer(multiprocessing.Process):
                 'current global_time: {}'.format(datetime.datetime.fromtimestamp(current_timestamp))
             )
             # Get episode:
-            if sample_config['episode_config']['timestamp'] is None or\
-                    sample_config['episode_config']['timestamp'] < current_timestamp:
-                sample_config['episode_config']['timestamp'] = current_timestamp
+            episode_timestamp = sample_config['episode_config']['timestamp']
+            if episode_timestamp is None or episode_timestamp < current_timestamp:
+                episode_timestamp = current_timestamp
+
+            episode_data = prefetched['episode']
+            if episode_data is not None and (
+                prefetched['trial_sample'] is not self.trial_sample or
+                prefetched['sample_config']['episode_config'] != sample_config['episode_config'] or
+                episode_data['timestamp'] != episode_timestamp
+            ):
+                self.log.debug('Discarding prefetched Episode <{}>.'.format(episode_data['sample'].filename))
+                episode_data = None
+
+            if episode_data is None:
+                episode_data = self._sample_episode(
+                    self.trial_sample,
+                    sample_config['episode_config'],
+                    current_timestamp
+                )
 
-            self.log.info(
-                'Requesting episode from <{}> with args: {}'.
-                format(self.trial_sample.filename, sample_config['episode_config'])
-            )
+            else:
+                self.log.info('Got prefetched Episode <{}>'.format(episode_data['sample'].filename))
 
-            episode_sample = self.trial_sample.sample(**sample_config['episode_config'])
-            self.log.debug('Got new Episode: <{}>'.format(episode_sample.filename))
+            episode_sample = episode_data['sample']
 
             # Get episode data statistic and pass it to strategy params:
             cerebro.strats[0][0][2]['trial_stat'] = self.trial_stat
             cerebro.strats[0][0][2]['trial_metadata'] = self.trial_sample.metadata
             cerebro.strats[0][0][2]['dataset_stat'] = self.dataset_stat
-            cerebro.strats[0][0][2]['episode_stat'] = episode_sample.describe()
+            cerebro.strats[0][0][2]['episode_stat'] = episode_data['stat']
             cerebro.strats[0][0][2]['metadata'] = episode_sample.metadata
 
             # Set nice broker cash plotting:
             cerebro.broker.set_shortcash(False)
 
             # Convert and add data to engine:
-            cerebro.adddata(episode_sample.to_btfeed())
+            cerebro.adddata(episode_data['feed'])
+
+            # Prepare next episode while this one runs.
+            # Requesting trial has side effects on data domain: stateful one moves to next trial in sequence;
+            # prefetched trial gets discarded if this episode moves global time; not requested ahead in both cases:
+            can_increment_global_time = episode_sample.metadata['type'] and \
+                episode_sample.metadata['parent_sample_type']
+            prefetch_trial = not can_increment_global_time and not self.trial_sample.metadata.get('stateful', False)
+            self._start_prefetch(sample_config, prefetch_trial)
 
             # Finally:
             episode = cerebro.run(stdstats=True, preload=False, oldbuysell=True)[0]
@@ -674,6 +1188,11 @@ class BTgymServer(multiprocessing.Process):
             for name in analyzers_list:
                 episode_result[name] = episode.analyzers.getbyname(name).get_analysis()
 
+            if self.latency is not None:
+                # Per-episode step phases timing:
+                episode_result['latency'] = self.latency.summary()
+                self.latency.reset()
+
             gc.collect()
 
         # Just in case -- we actually shouldn't get there except by some error:
@@ -17,6 +17,8 @@
 #
 ###############################################################################
 
+import datetime
+
 import backtrader as bt
 import backtrader.indicators as btind
 
@@ -32,7 +34,154 @@ from btgym.strategy.utils import norm_value, decayed_result, exp_scale
 ############################## Base BTgymStrategy Class ###################
 
 
-class BTgymBaseStrategy(bt.Strategy):
+class BTgymTradingMixin():
+    """
+    Single instrument market orders and episode termination logic shared by BTgymBaseStrategy
+    and its backtrader-free counterpart btgym.engine.BTgymVectorStrategy.
+
+    Relies on strategy `buy()`, `sell()`, `close()`, `broker.get_value()` and
+    engine-specific `_get_max_drawdown()` accessor.
+    """
+
+    def get_done(self):
+        """
+        Episode termination estimator,
+        defines any trading logic conditions episode stop is called upon, e.g. <OMG! Stop it, we became too rich!>.
+        It is just a structural a convention method. Default method is empty.
+
+        Expected to return:
+            tuple (<is_done, type=bool>, <message, type=str>).
+        """
+        return False, '-'
+
+    def _get_done(self):
+        """
+        Default episode termination method,
+        checks base conditions episode stop is called upon:
+            1. Reached maximum episode duration. Need to check it explicitly, because <self.is_done> flag
+               is sent as part of environment response.
+            2. Got '_done' signal from outside. E.g. via env.reset() method invoked by outer RL algorithm.
+            3. Hit drawdown threshold.
+            4. Hit target profit threshold.
+
+        This method shouldn't be overridden or called explicitly.
+
+        Runtime execution logic is:
+            terminate episode if:
+                get_done() returned (True, 'something')
+                OR
+                ANY _get_done() default condition is met.
+        """
+        if not self.is_done_enabled:
+            # Episode is on its way,
+            # apply base episode termination rules:
+            # Do we approaching the end of the episode?:
+            if self.iteration >= \
+                    self.data.numrecords - self.inner_embedding - self.p.skip_frame - self.steps_till_is_done:
+                self._start_done_countdown('END OF DATA')
+
+            # Any money left?:
+            if self._get_max_drawdown() >= self.p.drawdown_call:
+                self._start_done_countdown('DRAWDOWN CALL')
+
+            # Party time?
+            if self.broker.get_value() > self.target_value:
+                self._start_done_countdown('TARGET REACHED')
+
+            # Custom get_done() results, if any:
+            condition, message = self.get_done()
+            if condition:
+                self._start_done_countdown(message)
+
+        else:
+            # Now in episode termination phase,
+            # just keep hitting `Close` button:
+            self.steps_till_is_done -=1
+            self.broker_message += (('close', (self.final_message,)),)
+            self.order = self.close()
+            self.log.debug(
+                'Episode countdown contd. at: {}, CLOSE, {}, r:{}'.format(
+                    self.iteration,
+                    self.final_message,
+                    self.reward
+                )
+            )
+
+        if self.steps_till_is_done <= 0:
+            # Now we've done, terminate:
+            self.is_done = True
+
+        return self.is_done
+
+    def _start_done_countdown(self, message):
+        """
+        Starts episode termination countdown for clean exit:
+        to forcefully execute final `close` order and compute proper reward
+        we need to make `steps_till_is_done` number of steps until `is_done` flag can be safely risen.
+        """
+        self.is_done_enabled = True
+        self.broker_message += (('done', (message,)),)
+        self.final_message = message
+        self.order = self.close()
+        self.log.debug(
+            'Episode countdown started at: {}, {}, r:{}'.format(self.iteration, message, self.reward)
+        )
+
+    def notify_order(self, order):
+        """
+        Shamelessly taken from backtrader tutorial.
+        """
+        if order.status in [order.Submitted, order.Accepted]:
+            # Buy/Sell order submitted/accepted to/by broker - Nothing to do
+            return
+        # Check if an order has been completed
+        # Attention: broker could reject order if not enough cash
+        if order.status in [order.Completed]:
+            if order.isbuy():
+                self.broker_message += (
+                    ('buy_executed', (order.executed.price, order.executed.value, order.executed.comm)),
+                )
+                self.buyprice = order.executed.price
+                self.buycomm = order.executed.comm
+
+            else:  # Sell
+                self.broker_message += (
+                    ('sell_executed', (order.executed.price, order.executed.value, order.executed.comm)),
+                )
+            self.bar_executed = len(self)
+
+        elif order.status in [order.Canceled, order.Margin, order.Rejected]:
+            self.broker_message += (('order_failed', (order.getstatusname(),)),)
+            # Rise order_failed flag until get_reward() will [hopefully] use and reset it:
+            self.order_failed += 1
+        self.order = None
+
+    def next(self):
+        """
+        Default implementation.
+        Defines one step environment routine for server 'Episode mode';
+        At least, it should handle order execution logic according to action received.
+        """
+        # Simple action-to-order logic:
+        if self.action == 'hold' or self.order or self.is_done_enabled:
+            pass
+        elif self.action == 'buy':
+            self.order = self.buy()
+            self.broker_message += (('buy_created', ()),)
+        elif self.action == 'sell':
+            self.order = self.sell()
+            self.broker_message += (('sell_created', ()),)
+        elif self.action == 'close':
+            self.order = self.close()
+            self.broker_message += (('close_created', ()),)
+
+        #print('next_call, iteration:', self.iteration)
+
+        # Somewhere after this point, server-side _BTgymAnalyzer() is exchanging information with environment wrapper,
+        # obtaining <self.action> , composing and sending <state,reward,done,info> etc... never mind.
+
+
+class BTgymBaseStrategy(BTgymTradingMixin, bt.Strategy):
     """
     Controls Environment inner dynamics and backtesting logic. Provides gym'my (State, Action, Reward, Done, Info) data.
     Any State, Reward and Info computation logic can be implemented by subclassing BTgymStrategy and overriding
@@ -180,7 +329,7 @@ class BTgymBaseStrategy(bt.Strategy):
         self.reward = 0
         self.order = None
         self.order_failed = 0
-        self.broker_message = '_'
+        self.broker_message = ()  # tuple of (code, args) broker events, see btgym.strategy.utils.BROKER_MESSAGES
         self.final_message = '_'
         self.raw_state = None
         self.time_stamp = 0
@@ -448,9 +597,9 @@ class BTgymBaseStrategy(bt.Strategy):
         Sets attr. and returns current data timestamp.
 
         Returns:
-            POSIX timestamp
+            POSIX timestamp, naive data time taken as UTC the same way data classes do
         """
-        self.time_stamp = self._get_time().timestamp()
+        self.time_stamp = self._get_time().replace(tzinfo=datetime.timezone.utc).timestamp()
 
         return self.time_stamp
 
@@ -499,7 +648,12 @@ class BTgymBaseStrategy(bt.Strategy):
         Note:
             Due to 'skip_frame' feature, INFO part of environment response transmitted by server can be  a list
             containing either all skipped frame's info objects, i.e. [info[-9], info[-8], ..., info[0]] or
-            just latest one, [info[0]]. This behaviour is set inside btgym.server._BTgymAnalyzer().next() method.
+            just latest one, [info[0]]. By default, info is composed only when response is to be sent;
+            `info_history=True` environment kwarg makes server collect it every step.
+            This behaviour is set inside btgym.server._BTgymAnalyzer().next() method.
+
+            `broker_message` is a tuple of (code, args) events,
+            use `btgym.strategy.utils.broker_message_to_str()` to get text.
         """
         return dict(
             step=self.iteration,
@@ -512,132 +666,8 @@ class BTgymBaseStrategy(bt.Strategy):
             max_drawdown=self.stats.drawdown.maxdrawdown[0],
         )
 
-    def get_done(self):
+    def _get_max_drawdown(self):
         """
-        Episode termination estimator,
-        defines any trading logic conditions episode stop is called upon, e.g. <OMG! Stop it, we became too rich!>.
-        It is just a structural a convention method. Default method is empty.
-
-        Expected to return:
-            tuple (<is_done, type=bool>, <message, type=str>).
-        """
-        return False, '-'
-
-    def _get_done(self):
+        Returns max. drawdown as recorded by DrawDown observer.
         """
-        Default episode termination method,
-        checks base conditions episode stop is called upon:
-            1. Reached maximum episode duration. Need to check it explicitly, because <self.is_done> flag
-               is sent as part of environment response.
-            2. Got '_done' signal from outside. E.g. via env.reset() method invoked by outer RL algorithm.
-            3. Hit drawdown threshold.
-            4. Hit target profit threshold.
-
-        This method shouldn't be overridden or called explicitly.
-
-        Runtime execution logic is:
-            terminate episode if:
-                get_done() returned (True, 'something')
-                OR
-                ANY _get_done() default condition is met.
-        """
-        if not self.is_done_enabled:
-            # Episode is on its way,
-            # apply base episode termination rules:
-            is_done_rules = [
-                # Do we approaching the end of the episode?:
-                (self.iteration >= \
-                 self.data.numrecords - self.inner_embedding - self.p.skip_frame - self.steps_till_is_done,
-                 'END OF DATA'),
-                # Any money left?:
-                (self.stats.drawdown.maxdrawdown[0] >= self.p.drawdown_call, 'DRAWDOWN CALL'),
-                # Party time?
-                (self.env.broker.get_value() > self.target_value, 'TARGET REACHED'),
-            ]
-            # Append custom get_done() results, if any:
-            is_done_rules += [self.get_done()]
-
-            # Sweep through rules:
-            for (condition, message) in is_done_rules:
-                if condition:
-                    # Start episode termination countdown for clean exit:
-                    # to forcefully execute final `close` order and compute proper reward
-                    # we need to make `steps_till_is_done` number of steps until `is_done` flag can be safely risen:
-                    self.is_done_enabled = True
-                    self.broker_message += message
-                    self.final_message = message
-                    self.order = self.close()
-                    self.log.debug(
-                        'Episode countdown started at: {}, {}, r:{}'.format(self.iteration, message, self.reward)
-                    )
-
-        else:
-            # Now in episode termination phase,
-            # just keep hitting `Close` button:
-            self.steps_till_is_done -=1
-            self.broker_message = 'CLOSE, {}'.format(self.final_message)
-            self.order = self.close()
-            self.log.debug(
-                'Episode countdown contd. at: {}, {}, r:{}'.format(self.iteration, self.broker_message, self.reward)
-            )
-
-        if self.steps_till_is_done <= 0:
-            # Now we've done, terminate:
-            self.is_done = True
-
-        return self.is_done
-
-    def notify_order(self, order):
-        """
-        Shamelessly taken from backtrader tutorial.
-        """
-        if order.status in [order.Submitted, order.Accepted]:
-            # Buy/Sell order submitted/accepted to/by broker - Nothing to do
-            return
-        # Check if an order has been completed
-        # Attention: broker could reject order if not enough cash
-        if order.status in [order.Completed]:
-            if order.isbuy():
-                self.broker_message = 'BUY executed,\nPrice: {:.5f}, Cost: {:.4f}, Comm: {:.4f}'. \
-                    format(order.executed.price,
-                           order.executed.value,
-                           order.executed.comm)
-                self.buyprice = order.executed.price
-                self.buycomm = order.executed.comm
-
-            else:  # Sell
-                self.broker_message = 'SELL executed,\nPrice: {:.5f}, Cost: {:.4f}, Comm: {:.4f}'. \
-                    format(order.executed.price,
-                           order.executed.value,
-                           order.executed.comm)
-            self.bar_executed = len(self)
-
-        elif order.status in [order.Canceled, order.Margin, order.Rejected]:
-            self.broker_message = 'ORDER FAILED with status: ' + str(order.getstatusname())
-            # Rise order_failed flag until get_reward() will [hopefully] use and reset it:
-            self.order_failed += 1
-        self.order = None
-
-    def next(self):
-        """
-        Default implementation.
-        Defines one step environment routine for server 'Episode mode';
-        At least, it should handle order execution logic according to action received.
-        """
-        # Simple action-to-order logic:
-        if self.action == 'hold' or self.order or self.is_done_enabled:
-            pass
-        elif self.action == 'buy':
-            self.order = self.buy()
-            self.broker_message = 'New BUY created; ' + self.broker_message
-        elif self.action == 'sell':
-            self.order = self.sell()
-            self.broker_message = 'New SELL created; ' + self.broker_message
-        elif self.action == 'close':
-            self.order = self.close()
-            self.broker_message = 'New CLOSE created; ' + self.broker_message
-
-        #print('next_call, iteration:', self.iteration)
-
-        # Somewhere after this point, server-side _BTgymAnalyzer() is exchanging information with environment wrapper,
-        # obtaining <self.action> , composing and sending <state,reward,done,info> etc... never mind.
+        return self.stats.drawdown.maxdrawdown[0]
@@ -93,4 +93,36 @@ def discounted_average(x, gamma=1):
     while len(x.shape) < 2:
         x = x[..., None]
     gamma = gamma * np.ones(x.shape)
-    return np.squeeze(np.average(x, weights=(gamma ** np.arange(x.shape[0])[..., None])[::-1], axis=0))
\ No newline at end of file
+    return np.squeeze(np.average(x, weights=(gamma ** np.arange(x.shape[0])[..., None])[::-1], axis=0))
+
+# Broker message codes and text templates they are formatted with:
+BROKER_MESSAGES = {
+    'buy_created': 'New BUY created',
+    'sell_created': 'New SELL created',
+    'close_created': 'New CLOSE created',
+    'buy_executed': 'BUY executed,\nPrice: {:.5f}, Cost: {:.4f}, Comm: {:.4f}',
+    'sell_executed': 'SELL executed,\nPrice: {:.5f}, Cost: {:.4f}, Comm: {:.4f}',
+    'order_failed': 'ORDER FAILED with status: {}',
+    'done': '{}',
+    'close': 'CLOSE, {}',
+}
+
+
+def broker_message_to_str(message):
+    """
+    Formats structured broker message to text.
+
+    Args:
+        message:    tuple of (code, args) events, code is one of `BROKER_MESSAGES` keys,
+                    args is tuple of template values; strings are passed through as is.
+
+    Returns:
+        string
+    """
+    if isinstance(message, str):
+        return message
+
+    if len(message) == 0:
+        return '-'
+
+    return '; '.join([BROKER_MESSAGES[code].format(*args) for code, args in message])
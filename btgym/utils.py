@@ -0,0 +1,258 @@
+###############################################################################
+#
+# Copyright (C) 2017 Andrew Muzikin
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+###############################################################################
+
+
+import os
+import time
+import math
+import socket
+import psutil
+from subprocess import PIPE
+
+
+def is_port_free(port, host=''):
+    """
+    Checks in-process if local TCP port can be bound to.
+
+    Args:
+        port:   int, port number
+        host:   str, interface address, default is all interfaces
+
+    Returns:
+        bool
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            s.bind((host, int(port)))
+            return True
+
+        except OSError:
+            return False
+
+
+def clear_port(port_list, log=None, timeout=5, poll_interval=0.05):
+    """
+    Terminates processes listening on specified local ports, if any, and waits for ports to get released.
+    Ports are checked in-process first, so no processes are looked up for free ones.
+    Processes not exited within `timeout` after termination are killed.
+
+    Args:
+        port_list:      int or list of ints
+        log:            logbook.Logger instance or None
+        timeout:        max. seconds to wait for processes to exit and for ports to get free
+        poll_interval:  seconds between port checks
+    """
+    if not isinstance(port_list, (list, tuple)):
+        port_list = [port_list]
+
+    busy_ports = [int(port) for port in port_list if not is_port_free(port)]
+    if len(busy_ports) == 0:
+        return
+
+    try:
+        pid_list = [
+            (conn.laddr[1], conn.pid) for conn in psutil.net_connections(kind='tcp')
+            if conn.status == psutil.CONN_LISTEN and conn.laddr and conn.laddr[1] in busy_ports
+            and conn.pid not in [None, os.getpid()]
+        ]
+
+    except psutil.AccessDenied:
+        # Not allowed to inspect other processes connections (e.g. MacOS), fall back to lsof:
+        pid_list = []
+        for port in busy_ports:
+            p = psutil.Popen(['lsof', '-i:{}'.format(port), '-t'], stdout=PIPE, stderr=PIPE)
+            pid_list += [(port, int(pid)) for pid in p.communicate()[0].decode().split()]
+
+    processes = {}
+    for port, pid in set(pid_list):
+        try:
+            if pid not in processes:
+                processes[pid] = psutil.Process(pid)
+                processes[pid].terminate()
+
+        except psutil.NoSuchProcess:
+            pass
+
+    _, alive = psutil.wait_procs(list(processes.values()), timeout=timeout)
+    for process in alive:
+        try:
+            process.kill()
+
+        except psutil.NoSuchProcess:
+            pass
+
+    if len(alive) > 0:
+        psutil.wait_procs(alive, timeout=timeout)
+
+    start_time = time.time()
+    for port in busy_ports:
+        while not is_port_free(port) and time.time() - start_time < timeout:
+            time.sleep(poll_interval)
+
+        if log is not None:
+            if is_port_free(port):
+                log.info('port {} cleared'.format(port))
+
+            else:
+                log.warning('port {} is still in use'.format(port))
+
+
+def wait_for_ready(process, timeout=60, poll_interval=0.01):
+    """
+    Blocks until child process signals it is ready to serve by setting its `ready` event.
+
+    Args:
+        process:        multiprocessing.Process instance holding `ready` multiprocessing.Event
+        timeout:        max. seconds to wait
+        poll_interval:  seconds between process liveness checks
+
+    Raises:
+        ChildProcessError:  if process has exited before getting ready;
+        TimeoutError:       if process has not got ready in time.
+    """
+    start_time = time.time()
+    while not process.ready.wait(poll_interval):
+        if not process.is_alive():
+            raise ChildProcessError(
+                '{} exited with code {} before getting ready.'.format(process.name, process.exitcode)
+            )
+        if time.time() - start_time > timeout:
+            raise TimeoutError('{} has not got ready in {} sec.'.format(process.name, timeout))
+
+
+# Step latency phases recorded by BTgymServer and BTgymEnv when `latency_stat` is enabled:
+LATENCY_PHASES = (
+    'bar_processing',   # backtrader engine time between agent handshakes
+    'get_state',
+    'get_reward',
+    'serialization',    # env response pickling and sending
+    'socket_wait',      # server waiting for agent action
+    'data_server',      # global time update or trial sampling calls to data server
+    'env_round_trip',   # env.step() request-response, agent side
+    'env_decode',       # observation delta decoding, agent side
+)
+
+
+class LatencyHistogram():
+    """
+    Log-scale histogram of time intervals: fixed memory and O(1) update cost.
+    """
+    def __init__(self, min_value=1e-6, max_value=100.0, bins_per_decade=10):
+        """
+        Args:
+            min_value:          seconds, values below fall to underflow bin
+            max_value:          seconds, values above fall to last bin
+            bins_per_decade:    histogram resolution
+        """
+        self.min_value = min_value
+        self.bins_per_decade = bins_per_decade
+        self.num_bins = int(math.ceil(math.log10(max_value / min_value) * bins_per_decade)) + 1
+        self.reset()
+
+    def reset(self):
+        self.counts = [0] * self.num_bins
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, value):
+        """
+        Records time interval in seconds.
+        """
+        if value < self.min_value:
+            i = 0
+
+        else:
+            i = min(int(math.log10(value / self.min_value) * self.bins_per_decade) + 1, self.num_bins - 1)
+
+        self.counts[i] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def upper_edge(self, i):
+        return self.min_value * 10 ** (i / self.bins_per_decade)
+
+    def percentile(self, q):
+        """
+        Returns upper bin edge estimate of q-th percentile, seconds.
+        """
+        if self.count == 0:
+            return 0.0
+
+        target = q / 100 * self.count
+        cumulative = 0
+        for i, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return min(self.upper_edge(i), self.max)
+
+        return self.max
+
+    def summary(self):
+        """
+        Returns:
+            dictionary of count and mean, median, 90th, 99th percentiles and max. values in milliseconds,
+            and non-empty histogram bins as list of [upper_edge_ms, count] pairs.
+        """
+        return dict(
+            count=self.count,
+            mean_ms=self.total / max(self.count, 1) * 1e3,
+            p50_ms=self.percentile(50) * 1e3,
+            p90_ms=self.percentile(90) * 1e3,
+            p99_ms=self.percentile(99) * 1e3,
+            max_ms=self.max * 1e3,
+            histogram=[[self.upper_edge(i) * 1e3, count] for i, count in enumerate(self.counts) if count > 0],
+        )
+
+
+class LatencyStat():
+    """
+    Per-phase latency histograms.
+    """
+    def __init__(self, **kwargs):
+        """
+        Args:
+            **kwargs:   LatencyHistogram kwargs
+        """
+        self.histogram_kwargs = kwargs
+        self.histograms = dict()
+
+    def add(self, phase, value):
+        """
+        Records `value` seconds spent in `phase`.
+        """
+        try:
+            self.histograms[phase].add(value)
+
+        except KeyError:
+            self.histograms[phase] = LatencyHistogram(**self.histogram_kwargs)
+            self.histograms[phase].add(value)
+
+    def summary(self):
+        """
+        Returns:
+            dictionary of phase summaries
+        """
+        return {phase: histogram.summary() for phase, histogram in self.histograms.items()}
+
+    def reset(self):
+        self.histograms = dict()